@@ -0,0 +1,82 @@
+"""
+Benchmark of the YAML and JSON codecs and the binary format on large configs.
+
+Writes the config of a synthetic hierarchy (see synthetic.py) with every
+available codec and in the binary format, and reports the median time to
+save and load it, and the file size. Each file is read back by the default
+codec of its format, so all backends are checked to produce compatible
+documents.
+
+usage: python benchmarks/bench_codecs.py [--depth D ...] [--number N]
+"""
+
+import json
+import statistics
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+from synthetic import load_module, num_options
+
+from parsonaut import binary
+from parsonaut.serialization import CODECS, load_codec, save_codec
+
+
+def measure(fn, number: int) -> float:
+    times = list()
+    for _ in range(number):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def bench(dct: dict, tmpdir, number: int) -> list[tuple[str, float, float, int]]:
+    results = list()
+    for fmt, codecs in CODECS.items():
+        for name, codec in codecs.items():
+            if not codec.available():
+                continue
+            pth = Path(tmpdir) / f"config.{name}.{fmt}"
+            save = measure(lambda: save_codec(dct, pth, fmt, name), number)
+            load = measure(lambda: load_codec(pth, fmt, name), number)
+            assert load_codec(pth, fmt) == dct, f"{name} does not round trip"
+            results.append((f"{fmt}/{name}", save, load, pth.stat().st_size))
+
+    pth = Path(tmpdir) / "config.pnb"
+    save = measure(lambda: pth.write_bytes(binary.encode(dct)), number)
+    load = measure(lambda: binary.decode(pth.read_bytes()), number)
+    assert json.loads(json.dumps(binary.decode(pth.read_bytes()))) == dct
+    results.append(("binary", save, load, pth.stat().st_size))
+    return results
+
+
+if __name__ == "__main__":
+    cli = ArgumentParser()
+    cli.add_argument("--width", type=int, default=10)
+    cli.add_argument("--branching", type=int, default=3)
+    cli.add_argument("--depth", type=int, nargs="*", default=[2, 4, 6])
+    cli.add_argument("--number", type=int, default=5)
+    opts = cli.parse_args()
+
+    print(f"{'codec':<16}{'save [ms]':>12}{'load [ms]':>12}{'size [kB]':>12}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for depth in opts.depth:
+            module = load_module(
+                tmpdir,
+                name=f"bench_codecs_{depth}",
+                width=opts.width,
+                depth=depth,
+                branching=opts.branching,
+            )
+            # Tuples are stored as lists, compare with what the codecs load.
+            dct = module.Root.as_lazy().to_dict(with_class_tag_as_str=True)
+            dct = json.loads(json.dumps(dct))
+            options = num_options(opts.width, depth, opts.branching)
+            print(f"depth={depth}, {options} options")
+            for name, save, load, size in bench(dct, tmpdir, opts.number):
+                print(
+                    f"{name:<16}{save * 1e3:>12.2f}{load * 1e3:>12.2f}"
+                    f"{size / 1e3:>12.1f}"
+                )
@@ -0,0 +1,60 @@
+"""
+Startup benchmark of the argparse and native parsing engines.
+
+For synthetic configs of growing size, measures building the parser and the
+first parse (startup), and repeated parses with a warm parser.
+
+usage: python benchmarks/bench_parse.py [--width W] [--depth D ...] [--number N]
+"""
+
+import tempfile
+from argparse import ArgumentParser as CLI
+from time import perf_counter
+
+from synthetic import load_module, num_options
+
+from parsonaut import ArgumentParser
+
+
+def make_argv(depth: int) -> list[str]:
+    prefix = ".".join(["c0"] * depth)
+    prefix = f"{prefix}." if prefix else ""
+    return [f"--{prefix}f0", "7", f"--{prefix}f1", "1e-3", "--f4", "4", "5"]
+
+
+def bench(root, argv, engine: str, number: int) -> tuple[float, float]:
+    start = perf_counter()
+    parser = ArgumentParser(engine=engine)
+    parser.add_options(root.as_lazy())
+    parser.parse_args(argv)
+    startup = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(number):
+        parser.parse_args(argv)
+    return startup, (perf_counter() - start) / number
+
+
+if __name__ == "__main__":
+    cli = CLI()
+    cli.add_argument("--width", type=int, default=10)
+    cli.add_argument("--branching", type=int, default=3)
+    cli.add_argument("--depth", type=int, nargs="*", default=[1, 2, 3, 4])
+    cli.add_argument("--number", type=int, default=20)
+    opts = cli.parse_args()
+
+    print(f"{'options':>8} {'engine':>9} {'startup [ms]':>13} {'parse [ms]':>11}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for depth in opts.depth:
+            module = load_module(
+                tmpdir,
+                name=f"synthetic_{depth}",
+                width=opts.width,
+                depth=depth,
+                branching=opts.branching,
+            )
+            argv = make_argv(depth)
+            n = num_options(opts.width, depth, opts.branching)
+            for engine in ("argparse", "native"):
+                startup, parse = bench(module.Root, argv, engine, opts.number)
+                print(f"{n:>8} {engine:>9} {startup * 1e3:>13.2f} {parse * 1e3:>11.3f}")
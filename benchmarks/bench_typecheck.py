@@ -0,0 +1,121 @@
+"""
+Microbenchmark of annotation checks.
+
+Compares the per-call type dispatch of the original `is_parsable_type`, frozen
+below as it was before validators were compiled, with the cached validators
+from `compile_validator` on the annotations and values used in
+tests/test_typecheck.py.
+
+usage: python benchmarks/bench_typecheck.py [--number N]
+"""
+
+from argparse import ArgumentParser
+from builtins import Ellipsis
+from functools import lru_cache
+from timeit import timeit
+from types import UnionType
+from typing import Any, Optional, Type, Union, get_args, get_origin
+
+from parsonaut.typecheck import BASIC_TYPES, compile_validator
+
+# Frozen copy of the original dispatch, independent of the current typecheck module.
+
+
+def _is_basic_type(typ: Type, basic_typ, value: Any | None = None) -> bool:
+    typ_ok = typ == basic_typ
+    if value is None:
+        return typ_ok
+    else:
+        return typ_ok and isinstance(value, basic_typ)
+
+
+@lru_cache(maxsize=1)
+def _is_flat_tuple_type(typ: Type, args):
+    return (
+        get_origin(typ) == tuple
+        and args[0] in BASIC_TYPES
+        and all(subt in (args[0], Ellipsis) for subt in args)
+    )
+
+
+def _is_flat_tuple_type_value(typ: Type, value: Any | None = None) -> bool:
+    args = get_args(typ)
+    if value is None:
+        return _is_flat_tuple_type(typ, args)
+    else:
+        return (
+            isinstance(value, tuple)
+            and _is_flat_tuple_type(typ, args)
+            and (len(args) == len(value) or Ellipsis in args)
+            and all(isinstance(item, args[0]) for item in value)
+        )
+
+
+def _is_optional_single_type(typ: Type, value: Any | None):
+    if isinstance(typ, UnionType) or getattr(typ, "__origin__", None) is Union:
+        args = get_args(typ)
+        non_none_args = [a for a in args if a is not type(None)]
+        if len(non_none_args) == 1:
+            typ = non_none_args[0]
+            is_ok = True if value is None else isinstance(value, typ)
+            return is_ok, non_none_args[0]
+    return False, typ
+
+
+def _is_parsable_type_single(typ: Type, value: Any | None = None) -> bool:
+    return any(
+        (
+            _is_basic_type(typ, int, value),
+            _is_basic_type(typ, float, value),
+            _is_basic_type(typ, bool, value),
+            _is_basic_type(typ, str, value),
+            _is_flat_tuple_type_value(typ, value),
+        )
+    )
+
+
+def baseline_is_parsable_type(typ: Type, value: Any | None = None) -> bool:
+    is_optional, inner_type = _is_optional_single_type(typ, value)
+    if is_optional:
+        return _is_parsable_type_single(inner_type, value)
+    else:
+        return _is_parsable_type_single(typ, value)
+
+
+CASES = (
+    [(typ, typ()) for typ in BASIC_TYPES]
+    + [(tuple[typ], (typ(),)) for typ in BASIC_TYPES]
+    + [(tuple[typ, typ], (typ(), typ())) for typ in BASIC_TYPES]
+    + [(tuple[typ, ...], (typ(), typ(), typ())) for typ in BASIC_TYPES]
+    + [
+        (tuple[int], (1.0,)),
+        (tuple[int, int], (1, 1.0)),
+        (tuple[int, ...], (1, 1.0)),
+        (int | None, 5),
+        (int | None, "hi"),
+        (Optional[str], "hello"),
+        (Union[int, str], "hello"),
+        (list[int], [1]),
+    ]
+)
+
+
+def dispatch():
+    for typ, value in CASES:
+        baseline_is_parsable_type(typ, value)
+
+
+def compiled():
+    for typ, value in CASES:
+        validate = compile_validator(typ)
+        validate is not None and validate(value)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--number", type=int, default=10_000)
+    number = parser.parse_args().number
+
+    for name, fn in (("dispatch", dispatch), ("compiled", compiled)):
+        t = timeit(fn, number=number)
+        print(f"{name:>10}: {t / number / len(CASES) * 1e9:8.1f} ns/check")
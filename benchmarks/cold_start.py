@@ -0,0 +1,228 @@
+"""
+Cold-start benchmark of parsonaut entrypoints.
+
+Every measurement runs in a fresh interpreter, so module imports, signature
+resolution and parser construction are all paid again, as when launching a
+training script. For synthetic hierarchies of growing size it reports:
+
+    import     `import parsonaut`
+    classes    importing the module that defines the config classes
+    construct  `ArgumentParser()` + `add_options(Root.as_lazy())`
+    parse      the first `parse_args(argv)`, including the registration of the
+               options, which `add_options` defers to the first parse
+    help       the first `parse_args(["--help"])`, in its own process
+    from_file  `Lazy.from_file` of the parsed config, fully validated
+    process    wall time of the whole interpreter run
+
+The entrypoints in `examples/` are run with `--help` and reported as import
+and process time (skipped if their dependencies are missing).
+
+Results are stored as JSON and can be compared against an earlier run:
+
+usage: python benchmarks/cold_start.py [--depth D ...] [--output new.json] [--compare old.json]
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser as CLI
+from pathlib import Path
+
+from synthetic import num_options, write_module
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PHASES = ("import", "classes", "construct", "parse", "help", "from_file", "process")
+
+# Runs in the fresh interpreter and prints the phase timings as JSON.
+DRIVER = """
+import json, sys
+from time import perf_counter
+
+times = dict()
+start = perf_counter()
+import parsonaut
+times["import"] = perf_counter() - start
+
+mode, target, argv, config = sys.argv[1], sys.argv[2], json.loads(sys.argv[3]), sys.argv[4]
+if mode == "example":
+    import runpy
+    sys.argv = [target, *argv]
+    try:
+        runpy.run_path(target, run_name="__main__")
+    except SystemExit:
+        pass
+else:
+    import importlib
+    start = perf_counter()
+    Root = importlib.import_module(target).Root
+    times["classes"] = perf_counter() - start
+
+    start = perf_counter()
+    parser = parsonaut.ArgumentParser()
+    parser.add_options(Root.as_lazy())
+    times["construct"] = perf_counter() - start
+
+    if argv == ["--help"]:
+        import io, contextlib
+        start = perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                parser.parse_args(argv)
+            except SystemExit:
+                pass
+        times["help"] = perf_counter() - start
+    else:
+        start = perf_counter()
+        lzy = parser.parse_args(argv)
+        times["parse"] = perf_counter() - start
+
+        lzy.to_file(config)
+        start = perf_counter()
+        parsonaut.Lazy.from_file(config).to_dict()
+        times["from_file"] = perf_counter() - start
+
+print(json.dumps(times))
+"""
+
+
+def run(mode: str, target: str, argv: list[str], cwd, config: str = "") -> dict | None:
+    """Run the driver in a fresh interpreter, None if the target fails to run."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(ROOT), str(cwd), env.get("PYTHONPATH")) if p
+    )
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", DRIVER, mode, target, json.dumps(argv), config],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        return None
+    times = json.loads(proc.stdout.strip().splitlines()[-1])
+    times["process"] = wall
+    return times
+
+
+def median_times(repeat: int, *args, **kwargs) -> dict | None:
+    runs = [run(*args, **kwargs) for _ in range(repeat)]
+    if any(r is None for r in runs):
+        return None
+    return {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+
+
+def bench_synthetic(opts, tmpdir) -> list[dict]:
+    results = list()
+    for depth in opts.depth:
+        name = f"cold_start_{opts.width}_{depth}_{opts.branching}"
+        write_module(
+            tmpdir,
+            name=name,
+            width=opts.width,
+            depth=depth,
+            branching=opts.branching,
+            choices=opts.choices,
+        )
+        config = str(Path(tmpdir) / f"{name}.yaml")
+        parse = median_times(
+            opts.repeat, "synthetic", name, ["--f0", "3"], tmpdir, config
+        )
+        help_times = median_times(opts.repeat, "synthetic", name, ["--help"], tmpdir)
+        if parse is None or help_times is None:
+            raise RuntimeError(f"Synthetic benchmark {name} failed.")
+        parse["help"] = help_times["help"]
+        parse["help_process"] = help_times["process"]
+        results.append(
+            dict(
+                name=f"synthetic depth={depth}",
+                options=num_options(opts.width, depth, opts.branching),
+                times=parse,
+            )
+        )
+    return results
+
+
+def bench_examples(opts, tmpdir) -> list[dict]:
+    results = list()
+    for example in sorted((ROOT / "examples").glob("*.py")):
+        times = median_times(opts.repeat, "example", str(example), ["--help"], tmpdir)
+        results.append(dict(name=f"examples/{example.name} --help", times=times))
+    return results
+
+
+def git_version() -> str:
+    proc = subprocess.run(
+        ["git", "describe", "--always", "--dirty"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return proc.stdout.strip() or "unknown"
+
+
+def print_results(results: list[dict], baseline: dict | None = None) -> None:
+    base = {r["name"]: r["times"] for r in baseline["results"]} if baseline else {}
+    print(f"{'benchmark':<36}" + "".join(f"{p + ' [ms]':>16}" for p in PHASES))
+    for result in results:
+        times = result["times"]
+        if times is None:
+            print(f"{result['name']:<36} skipped, the entrypoint failed to run")
+            continue
+        cells = list()
+        for phase in PHASES:
+            if phase not in times:
+                cells.append(f"{'-':>16}")
+                continue
+            cell = f"{times[phase] * 1e3:.2f}"
+            old = (base.get(result["name"]) or {}).get(phase)
+            if old:
+                cell += f" ({times[phase] / old:.2f}x)"
+            cells.append(f"{cell:>16}")
+        print(f"{result['name']:<36}" + "".join(cells))
+
+
+if __name__ == "__main__":
+    cli = CLI()
+    cli.add_argument("--width", type=int, default=10)
+    cli.add_argument("--branching", type=int, default=3)
+    cli.add_argument("--depth", type=int, nargs="*", default=[0, 1, 2, 3, 4])
+    cli.add_argument("--choices", action="store_true")
+    cli.add_argument("--repeat", type=int, default=5)
+    cli.add_argument("--no-examples", action="store_true")
+    cli.add_argument("--output", help="Store the results in this JSON file.")
+    cli.add_argument("--compare", help="Show ratios to results stored earlier.")
+    opts = cli.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        results = bench_synthetic(opts, tmpdir)
+        if not opts.no_examples:
+            results += bench_examples(opts, tmpdir)
+
+    baseline = None
+    if opts.compare:
+        with open(opts.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if opts.output:
+        with open(opts.output, "w") as f:
+            json.dump(
+                dict(
+                    version=git_version(),
+                    python=platform.python_version(),
+                    platform=platform.platform(),
+                    settings=vars(opts),
+                    results=results,
+                ),
+                f,
+                indent=4,
+            )
@@ -0,0 +1,78 @@
+"""
+Synthetic Parsable hierarchies of configurable size.
+
+Every node has `width` scalar and tuple fields and `branching` nested
+children, down to `depth` levels. With `choices`, every other child is a
+Choices field selecting between two node classes of the same level.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+FIELDS = (
+    ("int", "1"),
+    ("float", "0.5"),
+    ("str", '"hello"'),
+    ("bool", "False"),
+    ("tuple[int, ...]", "(1, 2, 3)"),
+)
+
+
+def make_source(
+    width: int = 10, depth: int = 2, branching: int = 2, choices: bool = False
+) -> str:
+    lines = ["from parsonaut import Choices, Lazy, Parsable", ""]
+    for level in range(depth + 1):
+        for variant in ("A", "B") if choices else ("A",):
+            params = [
+                f"f{i}: {FIELDS[i % len(FIELDS)][0]} = {FIELDS[i % len(FIELDS)][1]}"
+                for i in range(width)
+            ]
+            if level > 0:
+                for j in range(branching):
+                    if choices and j % 2:
+                        params.append(f"c{j}: Choice{level - 1} = Choice{level - 1}.A")
+                    else:
+                        child = f"Node{level - 1}A"
+                        params.append(f"c{j}: Lazy[{child}, ...] = {child}.as_lazy()")
+            lines += [
+                "",
+                f"class Node{level}{variant}(Parsable):",
+                "    def __init__(",
+                "        self,",
+                *[f"        {p}," for p in params],
+                "    ):",
+                "        pass",
+                "",
+            ]
+        if choices:
+            lines += [
+                "",
+                f"class Choice{level}(Choices):",
+                f"    A = Node{level}A.as_lazy()",
+                f"    B = Node{level}B.as_lazy()",
+                "",
+            ]
+    lines += ["", f"Root = Node{depth}A", ""]
+    return "\n".join(lines)
+
+
+def num_options(width: int, depth: int, branching: int) -> int:
+    return sum(width * branching**level for level in range(depth + 1))
+
+
+def write_module(directory, name: str = "synthetic_config", **kwargs) -> Path:
+    pth = Path(directory) / f"{name}.py"
+    pth.write_text(make_source(**kwargs))
+    return pth
+
+
+def load_module(directory, name: str = "synthetic_config", **kwargs):
+    """Write a synthetic hierarchy into `directory` and import it."""
+    pth = write_module(directory, name, **kwargs)
+    spec = importlib.util.spec_from_file_location(name, pth)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
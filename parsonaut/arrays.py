@@ -0,0 +1,68 @@
+import os
+import sys
+from hashlib import blake2b
+from typing import Any, Type, get_args, get_origin
+
+# Marks a config value stored in a sidecar .npy file: {ARRAY_TAG: "relative/path.npy"}
+ARRAY_TAG = "_array"
+
+
+def _numpy():
+    # numpy is optional: if it was never imported, no annotation or value can be an array.
+    return sys.modules.get("numpy")
+
+
+def is_ndarray_type(typ: Type) -> bool:
+    """Check if `typ` is `np.ndarray` or a parametrized ndarray such as `NDArray[np.float32]`."""
+    np = _numpy()
+    return np is not None and (typ is np.ndarray or get_origin(typ) is np.ndarray)
+
+
+def ndarray_scalar_type(typ: Type) -> Type | None:
+    """The scalar type of an annotation such as `NDArray[np.float32]`.
+
+    Returns None if the annotation does not restrict the dtype.
+    """
+    np = _numpy()
+    args = get_args(typ)
+    if np is None or len(args) != 2:
+        return None
+    scalar = get_args(args[1])
+    if len(scalar) == 1 and isinstance(scalar[0], type):
+        if issubclass(scalar[0], np.generic):
+            return scalar[0]
+    return None
+
+
+def is_ndarray(value: Any) -> bool:
+    np = _numpy()
+    return np is not None and isinstance(value, np.ndarray)
+
+
+def array_fingerprint(arr) -> tuple:
+    """A hashable summary of an array, computed without copying contiguous data."""
+    np = _numpy()
+    digest = blake2b(memoryview(np.ascontiguousarray(arr)).cast("B")).digest()
+    return ("ndarray", arr.shape, arr.dtype.str, digest)
+
+
+def save_array(arr, f) -> None:
+    import numpy as np
+
+    np.save(f, arr, allow_pickle=False)
+
+
+def load_array(pth):
+    """Load an .npy file, memory-mapped (read-only) if it is a local file."""
+    import numpy as np
+
+    pth = str(pth)
+    if os.path.isfile(pth):
+        return np.load(pth, mmap_mode="r", allow_pickle=False)
+
+    from io import BytesIO
+
+    from .serialization import open_best
+
+    with open_best(pth, "rb") as f:
+        return np.load(BytesIO(f.read()), allow_pickle=False)
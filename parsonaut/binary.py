@@ -0,0 +1,282 @@
+"""A compact, self-describing binary encoding of config dictionaries.
+
+Only the standard library is used. A document is
+
+    MAGIC, string table, value
+
+The string table is a varint count followed by varint-length prefixed UTF-8
+strings. Every key, class path and string value is stored once in the table
+and referenced by its index. A value is a one byte tag followed by
+
+    NONE, FALSE, TRUE, MISSING   nothing
+    INT                          zigzag varint
+    FLOAT                        little-endian double
+    STR                          varint string index
+    SEQ                          varint length, values
+    PACKED                       typecode, varint byte length, little-endian items
+    DICT                         varint length, (varint key index, value) pairs
+    OBJECT                       varint class path index, then as DICT
+    NDARRAY                      varint dtype index, varint ndim, varint shape,
+                                 varint byte length, C-ordered data
+
+Dicts with a "_class" entry are stored as objects, so that `decode` can build
+each node (e.g. a Lazy) directly from its fields. Homogeneous int and float
+sequences are stored as packed arrays and decoded like `maybe_pack` does.
+"""
+
+import struct
+import sys
+from array import array
+from typing import Any, Callable
+
+from .arrays import is_ndarray
+from .packed import PACK_MIN_LENGTH, TYPECODES, PackedTuple
+from .typecheck import Missing, MissingType
+
+MAGIC = b"PNB\x01"
+CLASS_KEY = "_class"
+
+NONE, FALSE, TRUE, MISSING, INT, FLOAT, STR, SEQ, PACKED, DICT, OBJECT, NDARRAY = range(
+    12
+)
+
+_DOUBLE = struct.Struct("<d")
+_INT64 = (-(2**63), 2**63)
+_SWAP = sys.byteorder != "little"
+
+
+def encode(dct: dict) -> bytes:
+    """Encode a config dictionary, e.g. from `to_dict(with_class_tag_as_str=True)`.
+
+    Args:
+        dct (dict): Nested dictionary of parsable values, tuples, arrays and
+            Missing.
+
+    Raises:
+        TypeError: If a value cannot be encoded.
+
+    Returns:
+        bytes: The encoded document.
+    """
+    strings: dict[str, int] = dict()
+    body = bytearray()
+    _encode(dct, body, strings)
+
+    out = bytearray(MAGIC)
+    _write_varint(out, len(strings))
+    for s in strings:
+        raw = s.encode()
+        _write_varint(out, len(raw))
+        out += raw
+    return bytes(out + body)
+
+
+def decode(data, build: Callable[[str, dict], Any] | None = None) -> Any:
+    """Decode a document created by `encode`.
+
+    Args:
+        data: bytes-like object holding the document.
+        build (Callable[[str, dict], Any] | None, optional): Called with the class
+            path and the decoded fields of every object, innermost first.
+            Defaults to building dicts with a "_class" entry.
+
+    Raises:
+        ValueError: If `data` is not a valid document.
+
+    Returns:
+        Any: The decoded value.
+    """
+    if bytes(data[: len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a parsonaut binary config.")
+    try:
+        return _Decoder(data, build or _build_dict).decode()
+    except (IndexError, KeyError, UnicodeDecodeError) as e:
+        raise ValueError("Corrupted parsonaut binary config.") from e
+
+
+def _build_dict(path: str, fields: dict) -> dict:
+    return {CLASS_KEY: path, **fields}
+
+
+def _write_varint(out: bytearray, n: int) -> None:
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _intern(strings: dict[str, int], s: str) -> int:
+    idx = strings.get(s)
+    if idx is None:
+        idx = strings[s] = len(strings)
+    return idx
+
+
+def _encode(value, out: bytearray, strings: dict[str, int]) -> None:
+    if value is None:
+        out.append(NONE)
+    elif value is True or value is False:
+        out.append(TRUE if value else FALSE)
+    elif isinstance(value, int):
+        out.append(INT)
+        _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+    elif isinstance(value, float):
+        out.append(FLOAT)
+        out += _DOUBLE.pack(value)
+    elif isinstance(value, str):
+        out.append(STR)
+        _write_varint(out, _intern(strings, value))
+    elif isinstance(value, MissingType):
+        out.append(MISSING)
+    else:
+        _encode_container(value, out, strings)
+
+
+def _encode_container(value, out: bytearray, strings: dict[str, int]) -> None:
+    if isinstance(value, PackedTuple):
+        _encode_packed(array(value.typecode, value.tobytes()), out)
+    elif isinstance(value, (tuple, list)):
+        _encode_seq(value, out, strings)
+    elif isinstance(value, dict):
+        _encode_dict(value, out, strings)
+    elif is_ndarray(value):
+        _encode_ndarray(value, out, strings)
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} value {value!r}.")
+
+
+def _encode_seq(value, out: bytearray, strings: dict[str, int]) -> None:
+    types = set(map(type, value))
+    if types == {float} or (
+        types == {int} and _INT64[0] <= min(value) and max(value) < _INT64[1]
+    ):
+        _encode_packed(array(TYPECODES[types.pop()], value), out)
+        return
+    out.append(SEQ)
+    _write_varint(out, len(value))
+    for v in value:
+        _encode(v, out, strings)
+
+
+def _encode_packed(data: array, out: bytearray) -> None:
+    if _SWAP:
+        data.byteswap()
+    raw = data.tobytes()
+    out.append(PACKED)
+    out += data.typecode.encode()
+    _write_varint(out, len(raw))
+    out += raw
+
+
+def _encode_dict(value: dict, out: bytearray, strings: dict[str, int]) -> None:
+    if CLASS_KEY in value:
+        out.append(OBJECT)
+        _write_varint(out, _intern(strings, value[CLASS_KEY]))
+        _write_varint(out, len(value) - 1)
+    else:
+        out.append(DICT)
+        _write_varint(out, len(value))
+    for k, v in value.items():
+        if k == CLASS_KEY:
+            continue
+        if not isinstance(k, str):
+            raise TypeError(f"Cannot encode {type(k).__name__} key {k!r}.")
+        _write_varint(out, _intern(strings, k))
+        _encode(v, out, strings)
+
+
+def _encode_ndarray(value, out: bytearray, strings: dict[str, int]) -> None:
+    import numpy as np
+
+    out.append(NDARRAY)
+    _write_varint(out, _intern(strings, value.dtype.str))
+    _write_varint(out, value.ndim)
+    for n in value.shape:
+        _write_varint(out, n)
+    raw = memoryview(np.ascontiguousarray(value)).cast("B")
+    _write_varint(out, len(raw))
+    out += raw
+
+
+class _Decoder:
+    def __init__(self, data, build: Callable[[str, dict], Any]) -> None:
+        self.data = data
+        self.build = build
+        self.pos = len(MAGIC)
+        self.strings = [self.read_str() for _ in range(self.read_varint())]
+
+    def decode(self) -> Any:
+        value = self.read()
+        if self.pos != len(self.data):
+            raise ValueError("Trailing data after the parsonaut binary config.")
+        return value
+
+    def read_varint(self) -> int:
+        data, pos = self.data, self.pos
+        result = shift = 0
+        while True:
+            b = data[pos]
+            pos += 1
+            result |= (b & 0x7F) << shift
+            if b < 0x80:
+                self.pos = pos
+                return result
+            shift += 7
+
+    def read_bytes(self, n: int):
+        start = self.pos
+        self.pos += n
+        if self.pos > len(self.data):
+            raise IndexError("Unexpected end of data.")
+        return self.data[start : self.pos]
+
+    def read_str(self) -> str:
+        return str(self.read_bytes(self.read_varint()), "utf-8")
+
+    def read_fields(self) -> dict:
+        strings = self.strings
+        return {
+            strings[self.read_varint()]: self.read() for _ in range(self.read_varint())
+        }
+
+    def read(self) -> Any:
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == OBJECT:
+            path = self.strings[self.read_varint()]
+            return self.build(path, self.read_fields())
+        elif tag == STR:
+            return self.strings[self.read_varint()]
+        elif tag == INT:
+            z = self.read_varint()
+            return z >> 1 if not z & 1 else -(z >> 1) - 1
+        elif tag == FLOAT:
+            return _DOUBLE.unpack(self.read_bytes(8))[0]
+        elif tag < INT:
+            return (None, False, True, Missing)[tag]
+        elif tag == PACKED:
+            return self.read_packed()
+        elif tag == SEQ:
+            return tuple(self.read() for _ in range(self.read_varint()))
+        elif tag == DICT:
+            return self.read_fields()
+        elif tag == NDARRAY:
+            return self.read_ndarray()
+        raise ValueError(f"Unknown tag {tag} in the parsonaut binary config.")
+
+    def read_packed(self) -> Any:
+        data = array(str(self.read_bytes(1), "ascii"))
+        data.frombytes(self.read_bytes(self.read_varint()))
+        if _SWAP:
+            data.byteswap()
+        if len(data) < PACK_MIN_LENGTH:
+            return tuple(data.tolist())
+        return PackedTuple(data)
+
+    def read_ndarray(self):
+        import numpy as np
+
+        dtype = np.dtype(self.strings[self.read_varint()])
+        shape = tuple(self.read_varint() for _ in range(self.read_varint()))
+        raw = self.read_bytes(self.read_varint())
+        return np.frombuffer(raw, dtype=dtype).reshape(shape)
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import sys
+from functools import partial
+from pathlib import Path
+from types import BuiltinFunctionType, FunctionType, SimpleNamespace
+from typing import Any, Iterable
+
+from .lazy import TYPE_NAME, Choices, Lazy
+from .packed import PackedTuple
+
+# Directory of the parse cache used by `Parsable.parse_args`, unset disables it.
+CACHE_ENV = "PARSONAUT_PARSE_CACHE"
+
+# Bump when the layout of the cache entries changes.
+CACHE_VERSION = 2
+
+# Sources of parsonaut itself, a change of the parsing code invalidates all entries.
+_PACKAGE_SOURCES = tuple(sorted(str(p) for p in Path(__file__).parent.glob("*.py")))
+
+
+class ParseCache:
+    """On-disk cache of parse results, one JSON file per command line.
+
+    An entry is looked up by argv and the parser templates, and it is valid as
+    long as the source files of all classes involved in the parse are unchanged.
+    A hit returns the config without building any parser.
+
+    Only parse results are stored, not the option tables. Their converters and
+    actions are functions and classes that JSON cannot hold, and a miss has to
+    resolve the selected choices from the class signatures anyway. A miss
+    builds the parser of its selection as without the cache.
+    """
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        self.directory = Path(directory)
+
+    @staticmethod
+    def from_env() -> "ParseCache | None":
+        directory = os.environ.get(CACHE_ENV)
+        return ParseCache(directory) if directory else None
+
+    def key(self, args: list[str], templates: Any) -> str:
+        """Hash the command line and a JSON-serializable description of the parser."""
+        payload = json.dumps([CACHE_VERSION, args, templates], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def load(self, key: str) -> dict | None:
+        """Load the entry of `key` if it exists and its sources are unchanged."""
+        try:
+            with open(self.directory / f"{key}.json") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if any(source_fingerprint(pth) != fp for pth, fp in entry["sources"]):
+            return None
+        return entry
+
+    def store(self, key: str, result, sources: Iterable[str]) -> bool:
+        """Store a parse result, return False if it cannot be stored.
+
+        Results with values that are not JSON-serializable or with classes that
+        cannot be imported by name (e.g. defined in a function) are not stored.
+
+        The entry is written to a temporary file and renamed, so concurrent
+        jobs never read a partial entry.
+        """
+        try:
+            entry = dict(
+                sources=[
+                    (pth, source_fingerprint(pth))
+                    for pth in sorted(set(sources).union(_PACKAGE_SOURCES))
+                ],
+                result=dump_result(result),
+            )
+            data = json.dumps(entry, default=_json_default)
+        except (TypeError, ValueError):
+            return False
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / f"{key}.{os.getpid()}.tmp"
+        tmp.write_text(data)
+        os.replace(tmp, self.directory / f"{key}.json")
+        return True
+
+
+def source_fingerprint(pth: str) -> list | None:
+    try:
+        st = os.stat(pth)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def class_source(cls) -> str | None:
+    module = sys.modules.get(getattr(cls, "__module__", None))  # type: ignore
+    return getattr(module, "__file__", None)
+
+
+def template_key(value: Any) -> Any:
+    """A JSON-serializable description of a value that does not force Lazy signatures."""
+    if isinstance(value, Lazy):
+        cls = value.cls
+        key = [f"{cls.__module__}.{cls.__qualname__}"]
+        if isinstance(value, Choices):
+            key.append(f"{type(value).__qualname__}.{value.name}")
+        signature = object.__getattribute__(value, "_signature")
+        if isinstance(signature, partial):
+            # Lazy.from_class(cls, *args, **kwargs): the first arg is the class
+            key.append([template_key(v) for v in signature.args[1:]])
+            key.append({k: template_key(v) for k, v in signature.keywords.items()})
+        else:
+            key.append({k: template_key(v) for k, (_, v) in signature.items()})
+        return key
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, (tuple, list, PackedTuple)):
+        return [template_key(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): template_key(v) for k, v in value.items()}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (FunctionType, BuiltinFunctionType)):
+        # the repr of a function contains its memory address
+        return f"{value.__module__}.{value.__qualname__}"
+    return repr(value)
+
+
+def dump_result(result) -> dict:
+    """Convert a parse result into JSON-serializable form."""
+    if isinstance(result, Lazy):
+        return dict(lazy=_dump_lazy(result))
+    return dict(namespace={k: _dump_value(v) for k, v in vars(result).items()})
+
+
+def load_result(dct: dict):
+    if "lazy" in dct:
+        return Lazy.from_dict(dct["lazy"])
+    return SimpleNamespace(**{k: _load_value(v) for k, v in dct["namespace"].items()})
+
+
+def _dump_lazy(lzy: Lazy) -> dict:
+    dct = lzy.to_dict(with_class_tag=True, flatten=True)
+    for k, v in dct.items():
+        if k == TYPE_NAME or k.endswith(f".{TYPE_NAME}"):
+            if v.__qualname__ != v.__name__:
+                raise TypeError(f"Class {v.__qualname__} cannot be imported by name.")
+            dct[k] = f"{v.__module__}.{v.__name__}"
+    return dct
+
+
+def _dump_value(value) -> dict:
+    if isinstance(value, Lazy):
+        return dict(lazy=_dump_lazy(value))
+    elif isinstance(value, tuple):
+        # JSON has no tuples
+        return dict(tuple=value)
+    return dict(value=value)
+
+
+def _load_value(dct: dict):
+    if "lazy" in dct:
+        return Lazy.from_dict(dct["lazy"])
+    elif "tuple" in dct:
+        return tuple(dct["tuple"])
+    return dct["value"]
+
+
+def _json_default(obj):
+    if isinstance(obj, PackedTuple):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
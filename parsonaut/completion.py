@@ -0,0 +1,249 @@
+"""Static shell completion for parsonaut entrypoints.
+
+The completion script or index is generated once from a root Lazy. Completing
+a command line then only runs the script (or reads the index), so it neither
+imports the project nor builds an `ArgumentParser`.
+
+    python -m parsonaut.completion my_project.train.Trainer --prog train.py > train.bash
+    source train.bash  # bash, or zsh through bashcompinit
+"""
+
+import glob
+import json
+import re
+import sys
+from collections import defaultdict
+
+from .lazy import Choices, Lazy
+from .typecheck import AnnotationKind, get_annotation_info
+
+# Value completion of options that take a path.
+FILE = "file"
+
+BOOL_VALUES = ["true", "false"]
+
+
+def completion_index(lzy: Lazy, prog: str) -> dict:
+    """Collect the options of all choice branches of `lzy`.
+
+    Options are grouped by the choices that must be selected for them to
+    exist. Every branch is visited, so this is meant to run once, offline.
+
+    Args:
+        lzy (Lazy): The root config, as passed to `ArgumentParser.add_options`.
+        prog (str): Name of the command to complete.
+
+    Returns:
+        dict: A JSON-serializable index:
+            {
+                "prog": prog,
+                "choices": [[choice flag, default name], ...],
+                "groups": [[[[choice index, name], ...], [[flag, values], ...]], ...],
+            }
+            where values is a list of names, FILE or None for free text.
+    """
+    choices = list()
+    groups = defaultdict(list)
+    groups[()].append(["--help", None])
+    _collect(lzy, "", (), choices, groups)
+    return dict(
+        prog=prog,
+        choices=choices,
+        groups=[[list(map(list, cond)), options] for cond, options in groups.items()],
+    )
+
+
+def _collect(lzy: Lazy, prefix: str, conditions: tuple, choices: list, groups):
+    for k, (typ, value) in sorted(lzy.signature.items()):
+        flag = f"--{prefix}{k}"
+        if not Lazy.is_lazy_type(typ):
+            groups[conditions].append([flag, _values(typ)])
+        elif isinstance(value, Choices):
+            idx = len(choices)
+            choices.append([flag, value.name])
+            groups[conditions].append([flag, [e.name for e in type(value)]])
+            for e in type(value):
+                _collect(
+                    e, f"{prefix}{k}.", conditions + ((idx, e.name),), choices, groups
+                )
+        else:
+            _collect(value, f"{prefix}{k}.", conditions, choices, groups)
+
+
+def _values(typ) -> list | str | None:
+    kind = get_annotation_info(typ).kind
+    if kind is AnnotationKind.BOOL:
+        return BOOL_VALUES
+    elif kind is AnnotationKind.ARRAY:
+        return FILE
+    return None
+
+
+def complete(index: dict, words: list[str]) -> list[str]:
+    """Complete a command line from a completion index.
+
+    Args:
+        index (dict): Output of `completion_index`.
+        words (list[str]): The words after the command, the last one is the
+            word being completed.
+
+    Returns:
+        list[str]: The candidates for the last word.
+    """
+    *before, cur = words or [""]
+    selected = [default for _, default in index["choices"]]
+    choice_flags = {flag: i for i, (flag, _) in enumerate(index["choices"])}
+    for i, word in enumerate(before):
+        key, eq, value = word.partition("=")
+        if not eq:
+            value = before[i + 1] if i + 1 < len(before) else ""
+        if key in choice_flags:
+            selected[choice_flags[key]] = value
+
+    options = dict()
+    for conditions, group in index["groups"]:
+        if all(selected[idx] == name for idx, name in conditions):
+            options.update(group)
+    all_values = {
+        flag: values for _, group in index["groups"] for flag, values in group
+    }
+
+    key, eq, value = cur.partition("=")
+    if eq and key in all_values:
+        return [f"{key}={v}" for v in _complete_value(all_values[key], value)]
+    if before and before[-1] in all_values and all_values[before[-1]] is not None:
+        return _complete_value(all_values[before[-1]], cur)
+    return [flag for flag in options if flag.startswith(cur)]
+
+
+def _complete_value(values, cur: str) -> list[str]:
+    if values == FILE:
+        return sorted(glob.glob(f"{cur}*"))
+    return [v for v in values or () if v.startswith(cur)]
+
+
+def completion_script(index: dict) -> str:
+    """Render a completion index as a bash script, also usable in zsh.
+
+    The selected choices are tracked in shell variables, so the script offers
+    only the options of the selected branches.
+
+    Args:
+        index (dict): Output of `completion_index`.
+
+    Returns:
+        str: The completion script.
+    """
+    prog = index["prog"]
+    func = "_parsonaut_" + re.sub(r"\W", "_", prog)
+
+    defaults = " ".join(
+        f"c{i}='{default}'" for i, (_, default) in enumerate(index["choices"])
+    )
+    assignments = "".join(
+        f'            {flag}) c{i}="$value" ;;\n'
+        for i, (flag, _) in enumerate(index["choices"])
+    )
+
+    value_cases = dict()
+    for _, group in index["groups"]:
+        for flag, values in group:
+            if values == FILE:
+                value_cases[flag] = 'compgen -f -- "$cur"'
+            elif values:
+                value_cases[flag] = f"compgen -W '{' '.join(values)}' -- \"$cur\""
+    value_cases = "".join(
+        f"        {flag}) COMPREPLY=($({cmd})); return ;;\n"
+        for flag, cmd in value_cases.items()
+    )
+
+    option_lines = list()
+    for conditions, group in index["groups"]:
+        flags = " ".join(flag for flag, _ in group)
+        if not conditions:
+            option_lines.append(f"    opts+=' {flags}'")
+            continue
+        test = " && ".join(f"\"$c{idx}\" == '{name}'" for idx, name in conditions)
+        option_lines.append(f"    if [[ {test} ]]; then opts+=' {flags}'; fi")
+
+    return _SCRIPT.format(
+        prog=prog,
+        func=func,
+        defaults=f"local {defaults}" if defaults else ":",
+        assignments=assignments,
+        value_cases=value_cases,
+        options="\n".join(option_lines),
+    )
+
+
+_SCRIPT = """\
+# Completion of {prog} for bash and zsh, generated by parsonaut.completion.
+if [[ -n "${{ZSH_VERSION:-}}" ]]; then
+    autoload -U +X bashcompinit && bashcompinit
+fi
+
+{func}() {{
+    local cur="${{COMP_WORDS[COMP_CWORD]}}" prev="${{COMP_WORDS[COMP_CWORD-1]}}"
+    local key value i opts=""
+    {defaults}
+    for ((i = 1; i < COMP_CWORD; i++)); do
+        key="${{COMP_WORDS[i]}}"
+        value="${{COMP_WORDS[i+1]}}"
+        if [[ "$value" == "=" ]]; then
+            value="${{COMP_WORDS[i+2]}}"
+        fi
+        case "$key" in
+{assignments}        esac
+    done
+
+    # --flag=value is split into "--flag" "=" "value"
+    if [[ "$cur" == "=" ]]; then
+        cur=""
+    elif [[ "$prev" == "=" ]]; then
+        prev="${{COMP_WORDS[COMP_CWORD-2]}}"
+    fi
+    case "$prev" in
+{value_cases}    esac
+
+{options}
+    COMPREPLY=($(compgen -W "$opts" -- "$cur"))
+}}
+complete -F {func} {prog}
+"""
+
+
+def write_completion(lzy: Lazy, pth, prog: str, index: bool = False) -> None:
+    """Write a completion script, or a JSON completion index if `index` is True."""
+    dct = completion_index(lzy, prog)
+    with open(pth, "w") as f:
+        if index:
+            json.dump(dct, f, separators=(",", ":"))
+        else:
+            f.write(completion_script(dct))
+
+
+def main(argv=None) -> None:
+    from argparse import ArgumentParser
+
+    from .serialization import maybe_import
+
+    parser = ArgumentParser(
+        prog="python -m parsonaut.completion",
+        description="Print a completion script of a Parsable entrypoint.",
+    )
+    parser.add_argument("cls", help="Import path of the root class, e.g. pkg.mod.Model")
+    parser.add_argument("--prog", required=True, help="Name of the command to complete")
+    parser.add_argument(
+        "--index", action="store_true", help="Print a JSON index instead of a script"
+    )
+    args = parser.parse_args(argv)
+
+    dct = completion_index(Lazy.from_class(maybe_import(args.cls)), args.prog)
+    if args.index:
+        sys.stdout.write(json.dumps(dct, separators=(",", ":")) + "\n")
+    else:
+        sys.stdout.write(completion_script(dct))
+
+
+if __name__ == "__main__":
+    main()
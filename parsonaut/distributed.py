@@ -0,0 +1,92 @@
+"""Parse the command line on one rank and share the config with all ranks.
+
+Only the source rank reads argv and config files. The others receive the
+config as a compact flat dict over the default torch.distributed process
+group (or `group`) and rebuild it without touching the filesystem.
+"""
+
+import sys
+from typing import Any
+
+from .cache import dump_result, load_result
+from .serialization import is_module_available
+
+
+def _dist():
+    """torch.distributed if a process group is initialized, else None."""
+    if not is_module_available("torch"):
+        return None
+    import torch.distributed as dist
+
+    if not dist.is_available() or not dist.is_initialized():
+        return None
+    return dist
+
+
+def broadcast_lazy(lzy: Any = None, src: int = 0, group=None) -> Any:
+    """Broadcast a Lazy config (or a parse result with Lazy values) from `src`.
+
+    Args:
+        lzy (Any, optional): The config on rank `src`, ignored on other ranks.
+            Defaults to None.
+        src (int, optional): The rank holding the config. Defaults to 0.
+        group (optional): The process group. Defaults to the default group.
+
+    Returns:
+        Any: The config, rebuilt on ranks other than `src`. Without an
+            initialized process group `lzy` is returned unchanged.
+    """
+    dist = _dist()
+    if dist is None:
+        return lzy
+
+    is_src = dist.get_rank() == src
+    payload = [dump_result(lzy) if is_src else None]
+    dist.broadcast_object_list(payload, src=src, group=group)
+    return lzy if is_src else load_result(payload[0])
+
+
+def parse_args_distributed(parsable, *args, src: int = 0, group=None, **kwargs):
+    """Parse the command line on rank `src` only and broadcast the result.
+
+    If parsing exits on rank `src` (e.g. on `--help` or an invalid option),
+    all ranks exit with the same status instead of waiting for the config.
+    Other errors on rank `src` are re-raised there and raise a RuntimeError on
+    the other ranks.
+
+    Args:
+        parsable: A `Parsable` subclass, or an `ArgumentParser` with options.
+        *args: Passed to `parse_args` of `parsable`, the defaults of a
+            `Parsable` or the command line of an `ArgumentParser`.
+        src (int, optional): The rank that parses. Defaults to 0.
+        group (optional): The process group. Defaults to the default group.
+        **kwargs: Passed to `parse_args` of `parsable`.
+
+    Returns:
+        The parse result, same on all ranks.
+    """
+    dist = _dist()
+    if dist is None or dist.get_rank() == src:
+        try:
+            result = parsable.parse_args(*args, **kwargs)
+            payload = None if dist is None else dump_result(result)
+        except BaseException as e:
+            # Release the other ranks, they wait for the config otherwise.
+            if dist is not None:
+                code = e.code if isinstance(e, SystemExit) else None
+                error = ("error", (isinstance(e, SystemExit), code, repr(e)))
+                dist.broadcast_object_list([error], src=src, group=group)
+            raise
+        if dist is not None:
+            dist.broadcast_object_list([("ok", payload)], src=src, group=group)
+        return result
+
+    payload = [None]
+    dist.broadcast_object_list(payload, src=src, group=group)
+    status, value = payload[0]
+    if status == "error":
+        is_exit, code, message = value
+        if is_exit:
+            sys.exit(code)
+        raise RuntimeError(f"Parsing the command line failed on rank {src}: {message}")
+    return load_result(value)
@@ -2,8 +2,17 @@ from enum import Enum
 from functools import partial
 from typing import Any, Callable, Generic, Mapping, ParamSpec, Type, TypeVar, get_args
 
-from .serialization import Serializable, maybe_import
-from .typecheck import Missing, MissingType, is_parsable_type
+from . import binary
+from .arrays import array_fingerprint, is_ndarray
+from .packed import PackedTuple, maybe_pack
+from .serialization import Serializable, class_tag, maybe_import, open_compressed
+from .typecheck import (
+    AnnotationKind,
+    Missing,
+    MissingType,
+    compile_validator,
+    get_annotation_info,
+)
 
 T = TypeVar("T")
 P = ParamSpec("P")
@@ -39,26 +48,41 @@ class Lazy(Generic[T, P], Serializable):
         object.__setattr__(self, "_signature", signature)
 
     def __hash__(self) -> int:
-        return hash(
-            tuple(
-                self.to_dict(
-                    with_annotations=True, with_class_tag=True, flatten=True
-                ).items()
-            )
-        )
+        dct = self.to_dict(with_annotations=True, with_class_tag=True, flatten=True)
+        return hash(tuple((k, _hashable(v)) for k, v in dct.items()))
 
     def __eq__(self, __value: "object | Lazy") -> bool:
         return hash(self) == hash(__value)
 
     def __str__(self):
-        return lazy_str(self.to_dict(with_class_tag=True))
+        # Rendered strings are cached on the (frozen) node and reused by parents.
+        out = vars(self).get("_str")
+        if out is None:
+            out = _join_lines(_render_lines(self))
+            object.__setattr__(self, "_str", out)
+        return out
+
+    def write(
+        self, f, max_depth: int | None = None, max_length: int | None = None
+    ) -> None:
+        """Stream the pretty-printed config into a file object.
+
+        Args:
+            f: A text file object to write to.
+            max_depth (int | None, optional): Nested configs deeper than this
+                are collapsed to ``Name(...)``. Defaults to None (no limit).
+            max_length (int | None, optional): Collections longer than this
+                are truncated. Defaults to None (no limit).
+        """
+        lazy_write(self, f, max_depth=max_depth, max_length=max_length)
 
     def __getattr__(self, x):
         signature = object.__getattribute__(self, "signature")
         if x not in signature:
             return object.__getattribute__(self, x)
-        else:
-            return signature[x][1]
+        value = signature[x][1]
+        # Packed tuples are an internal representation, user code gets tuples.
+        return tuple(value) if isinstance(value, PackedTuple) else value
 
     def __setattr__(self, *args):
         # This is here for Enum support, otherwise all frozen
@@ -83,13 +107,8 @@ class Lazy(Generic[T, P], Serializable):
 
     @staticmethod
     def is_lazy_type(typ):
-        origin = getattr(typ, "__origin__", None)
-        if origin is None and isinstance(typ, type) and issubclass(typ, Lazy):
-            return True
-        elif origin == Lazy:
-            return True
-        else:
-            return False
+        info = get_annotation_info(typ)
+        return info.kind is AnnotationKind.LAZY and not info.nullable
 
     @staticmethod
     def from_class(
@@ -156,15 +175,18 @@ class Lazy(Generic[T, P], Serializable):
                 continue
 
             # skip non-parsable - the user can fill them in with to_eager() call
-            if not is_parsable_type(typ):
+            validate = compile_validator(typ)
+            if validate is None:
                 if not skip_non_parsable:
                     assert (
                         value is Missing
                     ), f"Cannot initialize Lazy[{cl.__name__}, ...] with variable {name=} and non-parsable type={typ}."
                 continue
 
+            value = canonicalize_value(typ, value)
+
             # check if the provided value is parsable and matches the annotation
-            assert value == Missing or is_parsable_type(typ, value), (
+            assert value is Missing or value is None or validate(value), (
                 f"Provided value {name}={value} does not match "
                 f"the provided annotation {name}: {typ}"
             )
@@ -199,7 +221,7 @@ class Lazy(Generic[T, P], Serializable):
         if with_class_tag:
             dct[TYPE_NAME] = self.cls
         elif with_class_tag_as_str:
-            dct[TYPE_NAME] = f"{self.cls.__module__}.{self.cls.__name__}"
+            dct[TYPE_NAME] = class_tag(self.cls)
         for k, (typ, value) in sorted(self.signature.items()):
 
             if Lazy.is_lazy_type(typ):
@@ -224,7 +246,7 @@ class Lazy(Generic[T, P], Serializable):
         return dct
 
     @staticmethod
-    def from_dict(dct):
+    def from_dict(dct, resolve: Callable[[str], Type] = maybe_import):
         # For now we assume the dict contains TYPE_NAME
         # In the future, we should be able to infer the TYPE_NAME also for sub-classes from defaults
         if any("." in k for k in dct):
@@ -232,24 +254,38 @@ class Lazy(Generic[T, P], Serializable):
 
         signature = dict()
 
-        cls = maybe_import(dct[TYPE_NAME])
+        cls = resolve(dct[TYPE_NAME])
 
         for k, v in dct.items():
             if k == TYPE_NAME:
                 continue
             elif isinstance(v, dict):
-                signature[k] = Lazy.from_dict(v)
+                signature[k] = Lazy.from_dict(v, resolve)
             else:
                 signature[k] = v
 
         return Lazy.from_class(cls, **signature)
 
+    @staticmethod
+    def from_binary(pth):
+        # Nodes are built while decoding, without a nested dict of the whole config.
+        with open_compressed(pth, "rb") as f:
+            return binary.decode(f.read(), build=_build_lazy)
+
+    @staticmethod
+    def _from_record(dct: dict, resolve: Callable[[str], Type]) -> "Lazy":
+        return Lazy.from_dict(dct, resolve)
+
     def to_eager(self, *args: P.args, **kwargs: P.kwargs) -> T:
         assert not args, "Please pass named parameters only."
 
         kwargs2 = self.to_dict(recursive=False)
         kwargs = {**kwargs2, **kwargs}
         kwargs = {k: v for k, v in kwargs.items() if not isinstance(v, MissingType)}
+        # Packed tuples are an internal representation, user code gets tuples.
+        kwargs = {
+            k: tuple(v) if isinstance(v, PackedTuple) else v for k, v in kwargs.items()
+        }
 
         return self.cls(
             *args,
@@ -257,6 +293,10 @@ class Lazy(Generic[T, P], Serializable):
         )
 
 
+def _build_lazy(path: str, fields: dict) -> Lazy:
+    return Lazy.from_class(maybe_import(path), **fields)
+
+
 class Choices(Lazy, Enum):
     def __new__(cls, value):
         assert isinstance(
@@ -293,6 +333,28 @@ def set_typecheck_eager(eager: bool = True):
     TYPECHECK_EAGER = eager
 
 
+def _hashable(item):
+    # Arrays are not hashable, they are represented by a fingerprint of their data.
+    if isinstance(item, tuple) and len(item) == 2 and is_ndarray(item[1]):
+        typ, value = item
+        return typ, array_fingerprint(value)
+    return item
+
+
+def canonicalize_value(typ, value):
+    """Bring a parsable value into its in-memory form.
+
+    Lists (e.g. loaded from JSON or YAML) become tuples for tuple annotations
+    and long numeric tuples are packed.
+    """
+    info = get_annotation_info(typ)
+    if info.kind is AnnotationKind.FLAT_TUPLE:
+        if isinstance(value, list):
+            value = tuple(value)
+        value = maybe_pack(value, info.inner)
+    return value
+
+
 def get_signature(func: Callable, *args, **kwargs) -> dict[str, tuple[Type, Any]]:
     """Get the signature of a function, including the types of the arguments."""
     from inspect import _empty, signature
@@ -310,9 +372,9 @@ def get_signature(func: Callable, *args, **kwargs) -> dict[str, tuple[Type, Any]
             continue
 
         value = bound.arguments.get(
-            param_name, param.default if param.default != _empty else Missing
+            param_name, param.default if param.default is not _empty else Missing
         )
-        annotation = param.annotation if param.annotation != _empty else MissingType
+        annotation = param.annotation if param.annotation is not _empty else MissingType
         ret[param_name] = (annotation, value)
 
     return ret
@@ -356,25 +418,101 @@ def unflatten_dict(flat: dict) -> dict:
     return base
 
 
-def lazy_str(dct: dict, level: int = 1):
+INDENT = "    "
 
-    def format_attr(k, v):
-        if isinstance(v, str):
-            return f"{k}='{v}'"
-        else:
-            return f"{k}={v}"
 
+def _format_attr(k, v) -> str:
+    if isinstance(v, str):
+        return f"{k}='{v}'"
+    else:
+        return f"{k}={v}"
+
+
+def lazy_str(dct: dict, level: int = 1):
     header = f'{dct["_class"].__name__}'
     attrs = [
         (
             f"{k}={lazy_str(v, level=level + 1)}"
             if isinstance(v, dict)
-            else format_attr(k, v)
+            else _format_attr(k, v)
         )
         for k, v in dct.items()
         if k != "_class"
     ]
-    indent = "    "
-    attrs = f",\n{indent * level}".join(attrs)
-    out = f"{header}(\n{indent * level}{attrs},\n{indent * (level - 1)})"
+    attrs = f",\n{INDENT * level}".join(attrs)
+    out = f"{header}(\n{INDENT * level}{attrs},\n{INDENT * (level - 1)})"
     return out
+
+
+def _render_lines(lzy: Lazy) -> tuple[tuple[int, str], ...]:
+    # Children are rendered once (and cached) as lines with their indent level,
+    # which is shifted when they are embedded. Line breaks in string values are
+    # part of a line and never indented.
+    lines = vars(lzy).get("_lines")
+    if lines is not None:
+        return lines
+    lines = [(0, f"{lzy.cls.__name__}(")]
+    for k, (typ, value) in sorted(lzy.signature.items()):
+        if Lazy.is_lazy_type(typ) and isinstance(value, Lazy):
+            (_, first), *rest, (_, last) = _render_lines(value)
+            lines.append((1, f"{k}={first}"))
+            lines.extend((depth + 1, text) for depth, text in rest)
+            lines.append((1, f"{last},"))
+        else:
+            lines.append((1, f"{_format_attr(k, value)},"))
+    lines.append((0, ")"))
+    lines = tuple(lines)
+    object.__setattr__(lzy, "_lines", lines)
+    return lines
+
+
+def _join_lines(lines: tuple[tuple[int, str], ...], level: int = 0) -> str:
+    # The first line continues the current one and is not indented.
+    (_, first), *rest = lines
+    return "\n".join([first, *(f"{INDENT * (d + level)}{t}" for d, t in rest)])
+
+
+def lazy_write(
+    lzy: Lazy,
+    f,
+    max_depth: int | None = None,
+    max_length: int | None = None,
+    level: int = 1,
+) -> None:
+    """Write the string representation of `lzy` into a file object piece by piece.
+
+    Without any limits, the output is identical to ``str(lzy)``.
+
+    Args:
+        lzy (Lazy): The config to write.
+        f: A text file object.
+        max_depth (int | None, optional): Maximum nesting level to expand.
+        max_length (int | None, optional): Maximum number of printed items of a collection.
+        level (int, optional): Current nesting level. Defaults to 1.
+    """
+    name = lzy.cls.__name__
+    if max_depth is not None and level > max_depth:
+        f.write(f"{name}(...)")
+        return
+    if max_depth is None and max_length is None and "_lines" in vars(lzy):
+        f.write(_join_lines(vars(lzy)["_lines"], level - 1))
+        return
+
+    f.write(f"{name}(\n")
+    for k, (typ, value) in sorted(lzy.signature.items()):
+        f.write(f"{INDENT * level}{k}=")
+        if Lazy.is_lazy_type(typ):
+            lazy_write(value, f, max_depth, max_length, level=level + 1)
+        elif isinstance(value, str):
+            f.write(f"'{value}'")
+        elif (
+            max_length is not None
+            and isinstance(value, (tuple, list, PackedTuple))
+            and len(value) > max_length
+        ):
+            items = ", ".join(repr(v) for v in value[:max_length])
+            f.write(f"({items}, ...<{len(value) - max_length} more>)")
+        else:
+            f.write(f"{value}")
+        f.write(",\n")
+    f.write(f"{INDENT * (level - 1)})")
@@ -0,0 +1,186 @@
+import json
+import os
+from array import array
+from collections.abc import Sequence
+from typing import Any, Callable, Type
+
+# Numeric tuples shorter than this are kept as plain tuples.
+PACK_MIN_LENGTH = 1024
+
+TYPECODES = {int: "q", float: "d"}
+INNER_TYPES = {code: typ for typ, code in TYPECODES.items()}
+
+
+class PackedTuple(Sequence):
+    """An immutable tuple of ints or floats stored in a compact `array.array`.
+
+    It supports the read-only tuple interface (indexing, slicing, iteration,
+    len, equality with tuples, hashing), but it is not a `tuple` subclass, so
+    `Lazy` attributes and `Lazy.to_eager` hand out plain tuples instead.
+    Two packed tuples are compared by their raw buffers, a comparison with a
+    tuple boxes the elements. The hash is the one of the equal tuple, computed
+    once.
+    """
+
+    __slots__ = ("_data", "_hash")
+
+    def __init__(self, data: array) -> None:
+        assert (
+            data.typecode in INNER_TYPES
+        ), f"Unsupported typecode {data.typecode}, expected one of {tuple(INNER_TYPES)}."
+        self._data = data
+        self._hash = None
+
+    @staticmethod
+    def from_values(values, inner: Type) -> "PackedTuple":
+        return PackedTuple(array(TYPECODES[inner], values))
+
+    @staticmethod
+    def from_bytes(buffer, inner: Type) -> "PackedTuple":
+        data = array(TYPECODES[inner])
+        data.frombytes(buffer)
+        return PackedTuple(data)
+
+    @property
+    def inner_type(self) -> Type:
+        return INNER_TYPES[self._data.typecode]
+
+    @property
+    def typecode(self) -> str:
+        return self._data.typecode
+
+    def tolist(self) -> list:
+        return self._data.tolist()
+
+    def tobytes(self) -> bytes:
+        return self._data.tobytes()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PackedTuple(self._data[index])
+        return self._data[index]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __contains__(self, value) -> bool:
+        return value in self._data
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PackedTuple):
+            return self.typecode == other.typecode and self._data == other._data
+        elif isinstance(other, tuple):
+            return len(self._data) == len(other) and self._data.tolist() == list(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(tuple(self._data))
+        return self._hash
+
+    def __repr__(self) -> str:
+        return repr(tuple(self._data))
+
+    def __reduce__(self):
+        return PackedTuple, (self._data,)
+
+
+def maybe_pack(value: Any, inner: Type) -> Any:
+    """Pack a long homogeneous int or float tuple into a `PackedTuple`.
+
+    Values that are short, not strictly of type `inner` (e.g. bools in an int
+    tuple) or out of the array range are returned unchanged.
+
+    Args:
+        value (Any): The value to pack.
+        inner (Type): The element type from the tuple annotation.
+
+    Returns:
+        Any: A `PackedTuple` or the original value.
+    """
+    if (
+        inner not in TYPECODES
+        or not isinstance(value, tuple)
+        or len(value) < PACK_MIN_LENGTH
+        or set(map(type, value)) != {inner}
+    ):
+        return value
+    try:
+        return PackedTuple.from_values(value, inner)
+    except OverflowError:
+        return value
+
+
+# numpy dtype kinds matching the inner type of a flat tuple
+_DTYPE_KINDS = {int: "iu", float: "f", bool: "b", str: "U"}
+
+
+def load_tuple(
+    pth, inner: Type, arity: int = -1, convert: Callable | None = None
+) -> Any:
+    """Read a flat tuple from a .npy, .txt or .json file.
+
+    .npy files are memory-mapped and validated by their dtype. .json files hold
+    a list, .txt files whitespace separated values (one per line for strings),
+    both are read in bulk and validated by the set of their element types.
+    Long int and float tuples are returned packed.
+
+    Args:
+        pth: Path to the file.
+        inner (Type): The element type from the tuple annotation.
+        arity (int, optional): The tuple length, -1 for any. Defaults to -1.
+        convert (Callable | None, optional): Converts .txt tokens. Defaults to `inner`.
+
+    Returns:
+        Any: A tuple or a `PackedTuple`.
+
+    Raises:
+        ValueError: If the file does not contain a flat tuple of `inner` values
+            and length `arity`.
+    """
+    from .serialization import open_best
+
+    ext = os.path.splitext(str(pth))[1]
+    if ext == ".npy":
+        value = _load_npy(pth, inner)
+    elif ext == ".json":
+        with open_best(pth, "r") as f:
+            values = json.load(f)
+        types = set(map(type, values)) if isinstance(values, list) else {dict}
+        if inner is float and types <= {int, float}:
+            values, types = list(map(float, values)), {float}
+        if not types <= {inner}:
+            names = ", ".join(sorted(t.__name__ for t in types))
+            raise ValueError(f"expected a list of {inner.__name__}, got {names}")
+        value = maybe_pack(tuple(values), inner)
+    elif ext == ".txt":
+        with open_best(pth, "r") as f:
+            text = f.read()
+        tokens = text.splitlines() if inner is str else text.split()
+        value = maybe_pack(tuple(map(convert or inner, tokens)), inner)
+    else:
+        raise ValueError(f"unsupported file {pth}, expected .npy, .txt or .json")
+
+    if arity != -1 and len(value) != arity:
+        raise ValueError(f"expected {arity} values, got {len(value)}")
+    return value
+
+
+def _load_npy(pth, inner: Type) -> Any:
+    from .arrays import load_array
+
+    arr = load_array(pth)
+    if arr.ndim != 1 or arr.dtype.kind not in _DTYPE_KINDS[inner]:
+        raise ValueError(
+            f"expected a 1-d array of {inner.__name__}, got {arr.dtype} {arr.shape}"
+        )
+    if inner not in TYPECODES or len(arr) < PACK_MIN_LENGTH:
+        return tuple(arr.tolist())
+    if arr.dtype.kind == "u" and arr.dtype.itemsize == 8 and arr.max() >> 63:
+        raise ValueError("uint64 values out of the int range")
+    # A single copy from the memory map into the packed buffer.
+    arr = arr.astype(TYPECODES[inner], copy=False)
+    return PackedTuple.from_bytes(memoryview(arr).cast("B"), inner)
@@ -1,8 +1,14 @@
+import os
 from abc import ABCMeta
 from typing import Callable, Type
 
 from .lazy import Lazy, P, T
-from .serialization import Serializable, is_module_available, open_best
+from .serialization import (
+    Serializable,
+    is_module_available,
+    open_best,
+    use_transport_params,
+)
 
 
 class ParsableMeta(ABCMeta):
@@ -69,12 +75,26 @@ class Parsable(Serializable, metaclass=ParsableMeta):
     def from_dict(cls, dct) -> Lazy:
         return Lazy.from_class(cls).from_dict(dct)
 
+    @classmethod
+    def from_binary(cls, pth) -> Lazy:
+        return Lazy.from_binary(pth)
+
+    @classmethod
+    def _from_record(cls, dct: dict, resolve: Callable[[str], Type]) -> Lazy:
+        return Lazy.from_dict(dct, resolve)
+
     @classmethod
     def parse_args(cls: Type[T] | Callable[P, T], *args, **kwargs) -> Lazy[T, P]:
+        from .cache import CACHE_ENV
         from .parse import ArgumentParser
 
-        parser = ArgumentParser()
-        parser.add_options(cls.as_lazy(*args, **kwargs))
+        lzy = cls.as_lazy(*args, **kwargs)
+        parser = ArgumentParser(
+            cache_dir=os.environ.get(CACHE_ENV),
+            # unless the class has its own config option
+            config_flag=None if "config" in lzy.signature else "--config",
+        )
+        parser.add_options(lzy)
         params = parser.parse_args()
         return params
 
@@ -86,26 +106,28 @@ class Parsable(Serializable, metaclass=ParsableMeta):
         raise NotImplementedError()
 
     @classmethod
-    def from_checkpoint(cls, pth):
+    def from_checkpoint(cls, pth, transport_params: dict | None = None):
         assert (
             torch is not None
         ), f"Loading {cls} from checkpoint requires torch installed."
 
         pth = str(pth).rstrip("/")
-        obj = cls.from_file(f"{pth}/config.yaml").to_eager()
+        with use_transport_params(transport_params):
+            obj = cls.from_file(f"{pth}/config.yaml").to_eager()
 
-        with open_best(f"{pth}/weights.pt", "rb") as f:
-            state_dict = torch.load(f)
+            with open_best(f"{pth}/weights.pt", "rb") as f:
+                state_dict = torch.load(f)
         obj.load_state_dict(state_dict)
         return obj
 
-    def to_checkpoint(self, pth):
+    def to_checkpoint(self, pth, transport_params: dict | None = None):
         assert (
             torch is not None
         ), f"Saving {self.__class__} to checkpoint requires torch installed."
 
         pth = str(pth)
-        self.to_file(f"{pth}/config.yaml")
-        state_dict = self.state_dict()
-        with open_best(f"{pth}/weights.pt", "wb") as f:
-            torch.save(state_dict, f)
+        with use_transport_params(transport_params):
+            self.to_file(f"{pth}/config.yaml")
+            state_dict = self.state_dict()
+            with open_best(f"{pth}/weights.pt", "wb") as f:
+                torch.save(state_dict, f)
@@ -1,40 +1,116 @@
+import itertools
+import os
 import re
 import sys
 from argparse import SUPPRESS, Action
 from argparse import ArgumentParser as _ArgumentParser
-from argparse import ArgumentTypeError
+from argparse import ArgumentTypeError, Namespace
 from collections import defaultdict
 from types import SimpleNamespace
+from typing import Any, Callable, Iterator, NamedTuple
 
-from parsonaut.lazy import TYPE_NAME, Choices, Lazy
+import yaml
+
+from parsonaut.arrays import load_array
+from parsonaut.cache import ParseCache, class_source, load_result, template_key
+from parsonaut.lazy import TYPE_NAME, Choices, Lazy, flatten_dict
+from parsonaut.packed import load_tuple
+from parsonaut.serialization import class_tag, load_dict
 from parsonaut.typecheck import (
+    AnnotationKind,
     Missing,
-    get_flat_tuple_inner_type,
-    is_bool_type,
-    is_flat_tuple_type,
-    is_float_type,
-    is_int_type,
-    is_optional_single_type,
-    is_str_type,
+    compile_validator,
+    get_annotation_info,
 )
 
 BOOL_TRUE_FLAGS = ("yes", "true", "t", "y", "1")
 BOOL_FALSE_FLAGS = ("no", "false", "f", "n", "0")
 
 
+ENGINES = ("argparse", "native")
+
+SWEEP_MODES = ("product", "zip")
+
+
 class ArgumentParser(_ArgumentParser):
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        engine: str = "argparse",
+        help_max_options: int = 100,
+        cache_dir: str | os.PathLike | None = None,
+        config_flag: str | None = None,
+        env_prefix: str | None = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            engine (str, optional): "argparse" parses every command line with
+                the stdlib argparse. "native" converts `--a.b.c value` options
+                directly from a hash table of the selected options and falls
+                back to argparse for help, unknown options and errors.
+                Defaults to "argparse".
+            help_max_options (int, optional): If `--help [SCOPE]` would list
+                more options, nested configs are summarized by a single line
+                each. Defaults to 100.
+            cache_dir (str | os.PathLike | None, optional): Directory of an
+                on-disk cache of parse results. A command line parsed before
+                with unchanged sources is loaded without building any parser.
+                Defaults to None, i.e. no cache.
+            config_flag (str | None, optional): A flag such as "--config" that
+                reads option values from a .yaml or .json file. Keys are dotted
+                option paths (nested dicts are flattened), the `_class` of a
+                choice field selects the choice. Defaults to None.
+            env_prefix (str | None, optional): Read option values from
+                environment variables `<env_prefix>_A__B=value` as `--a.b=value`.
+                Defaults to None.
+
+        The values are layered: option defaults < config file < environment
+        < command line. They are merged into one dotted-path map and the
+        Lazy configs are built from it once.
+        """
+        assert engine in ENGINES, f"Unknown {engine=}, choose from {ENGINES}."
+        self.engine = engine
+        self.help_max_options = help_max_options
+        self.cache = ParseCache(cache_dir) if cache_dir else None
+        self.config_flag = config_flag
+        self.env_prefix = env_prefix
         self.lazy_roots = list()
         self.args = dict()
         self.aliases = dict()
-        self.choices = defaultdict(list)
-        self.choices_defaults = dict()
+        # Registered options indexed by their dotted path.
+        self.trie = OptionTrie()
         # We allow add_options without dest if it is the only source of
         # args.
         self._lazy_without_dest = False
+        # Lazy options are registered on first use: (lzy, prefix)
+        self._pending = list()
+        # Everything added to the parser, describes it in the parse cache key.
+        self._templates = list()
+        # Annotations of flat tuple options, which can be read with `--name @path`.
+        self._tuples = dict()
+        # Parsers and native option tables built for a particular selection of choices.
+        self._parsers = dict()
+        self._tables = dict()
 
         super().__init__(*args, **kwargs)
 
+        # The help action is registered in self.args by super().__init__.
+        self._parser_kwargs = dict(
+            prog=self.prog,
+            usage=self.usage,
+            description=self.description,
+            epilog=self.epilog,
+            formatter_class=self.formatter_class,
+            prefix_chars=self.prefix_chars,
+            fromfile_prefix_chars=self.fromfile_prefix_chars,
+            argument_default=self.argument_default,
+            conflict_handler=self.conflict_handler,
+            add_help=False,
+            allow_abbrev=self.allow_abbrev,
+            exit_on_error=self.exit_on_error,
+        )
+
     def add_options(self, lzy: Lazy, dest: str | None = None):
         assert (
             not self._lazy_without_dest
@@ -44,89 +120,117 @@ class ArgumentParser(_ArgumentParser):
             assert dest not in self.lazy_roots
             self.lazy_roots.append(dest)
         else:
-            assert set(self.args.keys()) == {
-                "--help"
-            }, "Cannot add lazy options without a destination name if other args are present"
+            assert (
+                set(self.args.keys()) == {"--help"} and not self._pending
+            ), "Cannot add lazy options without a destination name if other args are present"
 
         prefix = f"{dest}." if dest is not None else ""
-        self._add_options(lzy, prefix=prefix)
+        self._pending.append((lzy, prefix))
+        self._templates.append(("options", dest, lzy))
+        self._clear_cache()
         if dest is None:
             self._lazy_without_dest = True
 
     def _add_options(self, lzy: Lazy, prefix: str = ""):
-        self.add_argument(f"--{prefix}_class", default=lzy.cls, help=SUPPRESS)
+        self._register(f"--{prefix}_class", dict(default=lzy.cls, help=SUPPRESS))
         for k, (typ, value) in sorted(lzy.signature.items()):
             if Lazy.is_lazy_type(typ):
                 if isinstance(value, Choices):
-                    self.add_argument(
+                    self._register(
                         f"--{prefix}{k}",
-                        type=str,
-                        choices=[e.name for e in type(value)],
-                        default=value.name,
+                        dict(
+                            type=str,
+                            choices=[e.name for e in type(value)],
+                            default=value.name,
+                        ),
                     )
-                    self.choices_defaults[f"{prefix}{k}"] = value.name
-                    for e in type(value):
-                        self.choices[f"{prefix}{k}"].append(e.name)
-                        # Add a [] marker to highlight choice values.
-                        # We use the marks later to trim the choices.
-                        self._add_options(e, prefix=f"{prefix}{k}.[{e.name}].")
+                    # The options of a branch are added only once it is selected.
+                    node = self.trie.find(f"{prefix}{k}".split("."))
+                    node.choice_default = value.name
+                    node.branches = {e.name: (e, f"{prefix}{k}") for e in type(value)}
                 else:
                     self._add_options(value, prefix=f"{prefix}{k}.")
             else:
-                self.add_option(f"{prefix}{k}", value, typ)
+                self._add_option(f"{prefix}{k}", value, typ)
 
     def add_option(self, name, value, typ):
         assert isinstance(name, str)
         assert not self._lazy_without_dest
+        self._add_pending()
+        self._templates.append(("option", name, value, typ))
+        self._add_option(name, value, typ)
+        self._clear_cache()
+
+    def _add_option(self, name, value, typ):
+        validate = compile_validator(typ)
+        assert validate is not None, f"Cannot add option {name} of type {typ}."
+        info = get_annotation_info(typ)
 
         name = f"--{name}"
-        check_val = value if value is not Missing else None
         required = False
 
-        _, typ = is_optional_single_type(typ, None)
+        # bool defaults may also be strings, they are converted by str2bool
+        assert (
+            info.kind is AnnotationKind.BOOL
+            or value is Missing
+            or value is None
+            or validate(value)
+        ), f"Default value {name}={value} does not match the annotation {typ}."
 
+        # np.ndarray, read from a .npy file
+        if info.kind is AnnotationKind.ARRAY:
+            self._register(
+                name,
+                dict(
+                    type=load_array,
+                    default=value,
+                    metavar="PATH.npy",
+                    required=required,
+                ),
+            )
         # bool
-        if is_bool_type(typ):
-            self.add_argument(
+        elif info.kind is AnnotationKind.BOOL:
+            self._register(
                 name,
-                type=str2bool,
-                default=value if value is not Missing else None,
-                metavar=f"{typ.__name__}",
-                required=required,
+                dict(
+                    type=str2bool,
+                    default=value if value is not Missing else None,
+                    metavar="bool",
+                    required=required,
+                ),
             )
         # int | float | str
-        elif (
-            is_int_type(typ, check_val)
-            or is_str_type(typ, check_val)
-            or is_float_type(typ, check_val)
-        ):
-            self.add_argument(
+        elif info.kind is not AnnotationKind.FLAT_TUPLE:
+            self._register(
                 name,
-                type=typ,
-                default=value,
-                metavar=f"{typ.__name__}",
-                required=required,
+                dict(
+                    type=info.base,
+                    default=value,
+                    metavar=f"{info.base.__name__}",
+                    required=required,
+                ),
             )
         # tuple[bool | int | float |str , ...]
-        elif is_flat_tuple_type(typ, check_val):
-            subtyp, nitems = get_flat_tuple_inner_type(typ)
+        else:
+            subtyp, nitems = info.inner, info.arity
             nargs = "*" if nitems == -1 else nitems
             if nargs == "*":
                 metavar = f"{subtyp.__name__},"
             else:
                 metavar = f"{subtyp.__name__}"
 
-            self.add_argument(
+            self._tuples[name] = info
+            self._register(
                 name,
-                nargs=nargs,
-                metavar=metavar,
-                type=subtyp if subtyp != bool else str2bool,
-                default=tuple(value) if value is not Missing else None,
-                required=required,
-                action=collect_as(tuple),
+                dict(
+                    nargs=nargs,
+                    metavar=metavar,
+                    type=subtyp if subtyp != bool else str2bool,
+                    default=value if value is not Missing else None,
+                    required=required,
+                    action=collect_as(tuple),
+                ),
             )
-        else:
-            raise
 
     def add_argument(self, *name_or_flags, **kwargs):
         assert not self._lazy_without_dest
@@ -137,72 +241,571 @@ class ArgumentParser(_ArgumentParser):
         elif len(name_or_flags) == 1:
             (name,) = name_or_flags
 
+        self._add_pending()
+        self._templates.append(("argument", name_or_flags, kwargs))
+        self._register(name, kwargs)
+        self._clear_cache()
+
+    def add_subparsers(self, **kwargs):
+        # Subcommands are parsed by argparse itself, see `_get_parser`.
+        kwargs.setdefault("parser_class", _ArgumentParser)
+        return super().add_subparsers(**kwargs)
+
+    def _add_pending(self):
+        # Keep the registration order of lazy and plain options.
+        while self._pending:
+            lzy, prefix = self._pending.pop(0)
+            self._add_options(lzy, prefix=prefix)
+
+    def _clear_cache(self):
+        self._parsers.clear()
+        self._tables.clear()
+
+    def _register(self, name: str, kwargs: dict):
         self.args[name] = kwargs
+        self.trie.insert(name.lstrip(self.prefix_chars).split("."), name)
 
-    def parse_args(self, args=None):  # noqa: C901
-        from collections import defaultdict
+    def parse_args(self, args=None):
+        args, config_path = self._layer(sys.argv[1:] if args is None else args)
 
-        args = sys.argv[1:] if args is None else args
+        requested, scope = self._help_request(args)
+        if requested:
+            self._print_message(self.format_help(args, scope=scope), sys.stdout)
+            self.exit()
 
-        # Choices trimming:
-        # Check if user provided a specific value for a choice and trim the other options
-        choices = sorted(
-            self.choices.items(), key=lambda x: len(x[0].split(".")), reverse=True
+        if self.cache is None:
+            return self._parse_args(args, self._load_config(config_path))
+
+        # Files read with `--name @path` are part of the key and the sources.
+        files = [
+            os.path.abspath(arg.partition("@")[2])
+            for arg in args
+            if arg.startswith("@") or "=@" in arg
+        ]
+        if config_path is not None:
+            files.append(os.path.abspath(config_path))
+        argparse_args = [
+            [(action.option_strings, action.dest) for action in self._actions],
+            template_key(self._defaults),
+        ]
+        key = self.cache.key(
+            args, [template_key(self._templates), files, argparse_args]
         )
-        for k, v in choices:
-            # If yes, read it from the command line
-            prefix = re.sub(r"\[.*?\]\.", "", f"--{k}")
-            if prefix in args:
-                position = args.index(prefix)
-                assert (
-                    len(args) > position + 1
-                ), f"Expected a value after the choice {prefix}"
-                val = args[args.index(prefix) + 1]
-                assert (
-                    val in v
-                ), f"error: argument {prefix}: invalid choice '{val}' (choose from {', '.join(v)})"
+        entry = self.cache.load(key)
+        if entry is not None:
+            return load_result(entry["result"])
+
+        result = self._parse_args(args, self._load_config(config_path))
+        self.cache.store(key, result, sources=self._sources().union(files))
+        return result
+
+    def _parse_args(self, args, config: dict | None = None) -> Any:
+        args_dict, selection, _ = self._parse_dict(args, config)
+        return self._build_result(args_dict, selection)
+
+    def _parse_dict(self, args, config: dict | None = None) -> tuple[dict, tuple, list]:
+        selection, names = self._select(args, config)
+        args, loaded = self._load_tuple_files(args, names)
+        # Config file values replace the option defaults.
+        defaults = self._config_defaults(config, selection, names) if config else {}
+        if (
+            self.engine == "native"
+            and not self._has_fromfile_args(args)
+            and not self._has_argparse_args()
+        ):
+            table = self._get_table(selection, names)
+            parsed = table.parse(args, defaults) if table is not None else None
+            if parsed is not None:
+                return {**parsed, **loaded}, selection, names
+
+        parser = self._get_parser(selection, names)
+        parsed = vars(parser.parse_args(args, namespace=Namespace(**defaults)))
+        return {**parsed, **loaded}, selection, names
+
+    def _layer(self, args) -> tuple[list, str | None]:
+        """Prepend environment overrides to args and take out the config flag.
+
+        Returns:
+            tuple[list, str | None]: The args and the config path, if any.
+        """
+        args = list(args)
+        if self.env_prefix:
+            prefix = f"{self.env_prefix}_"
+            args[:0] = [
+                f"--{var[len(prefix):].lower().replace('__', '.')}={value}"
+                for var, value in sorted(os.environ.items())
+                if var.startswith(prefix) and len(var) > len(prefix)
+            ]
+        if self.config_flag is None:
+            return args, None
+
+        rest, path = list(), None
+        i = 0
+        while i < len(args):
+            flag, eq, value = args[i].partition("=")
+            if flag != self.config_flag:
+                rest.append(args[i])
+            elif eq:
+                path = value
+            elif i + 1 < len(args):
+                path = args[i + 1]
+                i += 1
             else:
-                val = self.choices_defaults[k]
-
-            # We remove choice options:
-            # - not selected by the user
-            # - not default
-            for choice in v:
-                if choice != val:
-                    remove_prefix = f"--{k}.[{choice}]"
-                    for key in self.args.copy():
-                        if key.startswith(remove_prefix):
-                            del self.args[key]
-
-        for k in self.args.copy():
-            if "[" in k:
-                kk = re.sub(r"\[.*?\]\.", "", k)
-                self.args[kk] = self.args[k]
-                del self.args[k]
-
-        for name in self.args:
+                self.error(f"argument {flag}: expected one argument")
+            i += 1
+        return rest, path
+
+    def _load_config(self, path: str | None) -> dict | None:
+        """Load a config file as a flat dotted-path map."""
+        if path is None:
+            return None
+        try:
+            dct = load_dict(path)
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            self.error(f"argument {self.config_flag}: cannot read {path}: {e}")
+        if not isinstance(dct, dict):
+            self.error(f"argument {self.config_flag}: {path} does not hold a mapping")
+        return flatten_dict(dct)
+
+    def _config_defaults(self, config: dict, selection: tuple, names: list) -> dict:
+        """Map the config values to the dests of the selected options."""
+        dests = dict()
+        for name in names:
+            dest = self.args[name].get("dest") or re.sub(r"\[.*?\]\.", "", name).lstrip(
+                self.prefix_chars
+            ).replace("-", "_")
+            dests[dest] = name
+
+        # Values of choices other than the selected ones are ignored.
+        ignored = list()
+        for dest, _ in selection:
+            cls = config.get(f"{dest}.{TYPE_NAME}")
+            selected = self.args[dests[f"{dest}.{TYPE_NAME}"]]["default"]
+            if cls is not None and not is_class_tag(cls, selected):
+                ignored.append(f"{dest}.")
+        ignored = tuple(ignored)
+
+        defaults, unknown = dict(), list()
+        for k, v in config.items():
+            if k.startswith(ignored):
+                continue
+            elif k in dests:
+                defaults[k] = self._convert_config_value(dests[k], k, v)
+            else:
+                unknown.append(k)
+        if unknown:
+            self.error(
+                f"argument {self.config_flag}: unknown options {', '.join(unknown)}"
+            )
+        return defaults
+
+    def _convert_config_value(self, name: str, key: str, value: Any) -> Any:
+        """Convert a config value with the type and choices of its option.
+
+        Values are converted like the strings of the command line, so that e.g.
+        `lr: 1` gives a float and `lr: 1e-3` (a string in YAML) a number.
+        """
+        kwargs = self.args[name]
+        convert = kwargs.get("type")
+        if convert is None or key.endswith(TYPE_NAME):
+            return value
+        try:
+            if kwargs.get("nargs") is None:
+                value = _convert_config_item(convert, value)
+            elif isinstance(value, (list, tuple)):
+                value = tuple(_convert_config_item(convert, v) for v in value)
+            elif value is not None:
+                raise TypeError(f"Expected a sequence, got {value!r}.")
+        except (ArgumentTypeError, TypeError, ValueError):
+            self.error(
+                f"argument {self.config_flag}: {key}: invalid "
+                f"{getattr(convert, '__name__', convert)} value: {value!r}"
+            )
+        choices = kwargs.get("choices")
+        if choices is not None and value is not None and value not in choices:
+            self.error(f"argument {self.config_flag}: {key}: invalid choice: {value!r}")
+        return value
+
+    def _load_tuple_files(self, args: list, names: list) -> tuple[list, dict]:
+        """Read the values of `--name @path` tuple options from files.
+
+        The file values never pass through argparse. Returns the remaining
+        args and the loaded values by dest.
+        """
+        if "@" in (self.fromfile_prefix_chars or "") or not any(
+            "@" in arg for arg in args
+        ):
+            return args, dict()
+
+        flags = {re.sub(r"\[.*?\]\.", "", n): n for n in names if n in self._tuples}
+        flags.update({self.aliases[n]: n for n in names if n in self.aliases})
+        rest, loaded = list(), dict()
+        i = 0
+        while i < len(args):
+            flag, eq, value = args[i].partition("=")
+            if not eq and i + 1 < len(args):
+                value = args[i + 1]
+            name = flags.get(flag)
+            if name not in self._tuples or not value.startswith("@"):
+                rest.append(args[i])
+                i += 1
+                continue
+
+            info = self._tuples[name]
+            try:
+                loaded[re.sub(r"\[.*?\]\.", "", name)[2:]] = load_tuple(
+                    value[1:], info.inner, info.arity, self.args[name]["type"]
+                )
+            except (OSError, ValueError, ArgumentTypeError) as e:
+                self.error(f"argument {flag}: cannot read {value[1:]}: {e}")
+            i += 1 if eq else 2
+        return rest, loaded
+
+    def _sources(self) -> set[str]:
+        """Source files of all registered classes and choices."""
+        classes = {
+            kwargs["default"]
+            for name, kwargs in self.args.items()
+            if name == f"--{TYPE_NAME}" or name.endswith(f".{TYPE_NAME}")
+        }
+        stack = [self.trie]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children.values())
+            classes.update(type(choice) for choice, _ in node.branches.values())
+        return {pth for pth in map(class_source, classes) if pth is not None}
+
+    def parse_many(self, argv_list) -> list:
+        """Parse several command lines with the same parser.
+
+        Parsers built for a particular selection of choices are cached, so
+        command lines that select the same choices share the option tables.
+
+        Args:
+            argv_list: An iterable of argument lists.
+
+        Returns:
+            list: One parse result per argument list.
+        """
+        return [self.parse_args(args) for args in argv_list]
+
+    def parse_sweep(self, args=None, mode: str = "product") -> Iterator:
+        """Parse a command line that lists several values for some options.
+
+        An option value `a,b,c` lists values and an int range `start:stop[:step]`
+        (end-exclusive, as `range`) expands to its values, e.g.
+        `--opt.lr 1e-3,3e-4 --model.depth 6:12:2`. Choices can be swept, too.
+
+        The command line without the swept values is parsed once per selection
+        of choices and each swept value is converted once with the type of its
+        option. The configs are built only when the iterator is advanced.
+
+        Args:
+            args (optional): The command line. Defaults to sys.argv[1:].
+            mode (str, optional): "product" iterates over the cartesian product
+                of the swept values, "zip" over the values zipped together.
+                Defaults to "product".
+
+        Returns:
+            Iterator: Parse results, as returned by `parse_args`.
+        """
+        assert mode in SWEEP_MODES, f"Unknown {mode=}, choose from {SWEEP_MODES}."
+        args, config_path = self._layer(sys.argv[1:] if args is None else args)
+
+        requested, scope = self._help_request(args)
+        if requested:
+            self._print_message(self.format_help(args, scope=scope), sys.stdout)
+            self.exit()
+
+        axes = sweep_axes(args)
+        for axis in axes:
+            if not axis.values:
+                self.error(f"argument {axis.flag}: empty sweep")
+        if mode == "zip" and len({len(axis.values) for axis in axes}) > 1:
+            self.error(
+                "zipped sweep values must have the same length, got "
+                + ", ".join(f"{axis.flag}: {len(axis.values)}" for axis in axes)
+            )
+        return self._sweep(args, axes, mode, self._load_config(config_path))
+
+    def _sweep(self, args: list, axes: list, mode: str, config) -> Iterator:
+        values = [axis.values for axis in axes]
+        points = itertools.product(*values) if mode == "product" else zip(*values)
+
+        # selection of choices -> (parsed base command line, swept flag -> (name, dest))
+        bases = dict()
+        converted = dict()
+        for point in points:
+            selection, names = self._select(substitute(args, axes, point), config)
+            if selection not in bases:
+                bases[selection] = self._sweep_base(
+                    args, axes, point, selection, names, config
+                )
+
+            args_dict, options = bases[selection]
+            args_dict = dict(args_dict)
+            for axis, raw in zip(axes, point):
+                if axis.flag not in options:
+                    continue
+                name, dest = options[axis.flag]
+                if (name, raw) not in converted:
+                    converted[name, raw] = self._convert_sweep_value(
+                        axis.flag, name, raw
+                    )
+                args_dict[dest] = converted[name, raw]
+            yield self._build_result(args_dict, selection)
+
+    def _sweep_base(
+        self, args, axes, point, selection, names, config
+    ) -> tuple[dict, dict]:
+        """Parse the command line of a selection with the first value of each swept option."""
+        choices = {f"--{dest}" for dest, _ in selection}
+        base = [
+            raw if axis.flag in choices else axis.values[0]
+            for axis, raw in zip(axes, point)
+        ]
+        args_dict = self._parse_dict(substitute(args, axes, base), config)[0]
+
+        flags = dict()
+        for name in names:
+            flag = re.sub(r"\[.*?\]\.", "", name)
+            flags[flag] = flags[self.aliases.get(name, flag)] = name
+        parser = self._get_parser(selection, names)
+        options = dict()
+        for axis in axes:
+            if axis.flag not in choices and len(axis.values) > 1:
+                name = self._sweep_option(parser, axis.flag, flags)
+                dest = self.args[name].get("dest") or re.sub(
+                    r"\[.*?\]\.", "", name
+                ).lstrip(self.prefix_chars).replace("-", "_")
+                options[axis.flag] = (name, dest)
+        return args_dict, options
+
+    def _sweep_option(self, parser: _ArgumentParser, flag: str, flags: dict) -> str:
+        """The registered name of a swept flag, which may be abbreviated."""
+        actions = parser._option_string_actions
+        action = actions.get(flag)
+        if action is None and parser.allow_abbrev:
+            matches = {a for s, a in actions.items() if s.startswith(flag)}
+            if len(matches) > 1:
+                options = ", ".join(sorted(a.option_strings[-1] for a in matches))
+                self.error(f"ambiguous option: {flag} could match {options}")
+            action = matches.pop() if matches else None
+        if action is None:
+            self.error(f"argument {flag}: unknown option")
+        for option in action.option_strings:
+            if option in flags:
+                return flags[option]
+        self.error(f"argument {flag}: cannot sweep options added by argparse groups")
+
+    def _convert_sweep_value(self, flag: str, name: str, raw: str) -> Any:
+        kwargs = self.args[name]
+        if kwargs.get("nargs") is not None or kwargs.get("action") is not None:
+            self.error(f"argument {flag}: cannot sweep options with several values")
+        convert = kwargs.get("type", str)
+        try:
+            value = convert(raw)
+        except (ArgumentTypeError, TypeError, ValueError):
+            self.error(
+                f"argument {flag}: invalid {getattr(convert, '__name__', convert)} value: {raw!r}"
+            )
+        if kwargs.get("choices") is not None and value not in kwargs["choices"]:
+            self.error(f"argument {flag}: invalid choice: {raw!r}")
+        return value
+
+    def format_usage(self):
+        return self._get_parser(*self._select([])).format_usage()
+
+    def format_help(self, args=None, scope: str | None = None) -> str:
+        """Format the help of the options selected by `args`.
+
+        The help is formatted only on request, from the selected choice branches
+        only. Unselected choices are listed in the help of their flag and, if
+        more than `help_max_options` options would be listed, nested configs
+        are summarized.
+
+        Args:
+            args (optional): Command line selecting choices. Defaults to None.
+            scope (str | None, optional): Dotted path such as `model.encoder`
+                to show the help of that subtree only. Defaults to None.
+
+        Returns:
+            str: The formatted help.
+        """
+        selection, names = self._select([] if args is None else args)
+        choices = dict(selection)
+
+        entries = list()
+        for name in names:
+            kwargs = self.args[name]
+            if kwargs.get("help") == SUPPRESS:
+                continue
+            dest = re.sub(r"\[.*?\]\.", "", name).lstrip(self.prefix_chars)
+            if kwargs.get("action") == "help" or in_scope(dest, scope):
+                entries.append((name, dest, kwargs))
+        if len(entries) <= 1 and scope is not None:
+            self.error(f"argument --help: no options under {scope!r}")
+
+        summarize = len(entries) > self.help_max_options
+        subtrees = defaultdict(int)
+        # Arguments added through argparse groups are listed in the full help.
+        parents = [self] if scope is None else []
+        parser = _ArgumentParser(**self._parser_kwargs, parents=parents)
+        for name, dest, kwargs in entries:
+            relative = dest if scope is None else dest[len(scope) + 1 :]
+            if summarize and "." in relative:
+                subtrees[
+                    dest[: len(dest) - len(relative)] + relative.split(".")[0]
+                ] += 1
+                continue
+
+            flags = (
+                (self.aliases[name], f"--{dest}")
+                if name in self.aliases
+                else (f"--{dest}",)
+            )
+            parser.add_argument(*flags, **help_kwargs(kwargs, choices.get(dest)))
+
+        if self.config_flag is not None and scope is None:
+            parser.add_argument(
+                self.config_flag,
+                metavar="PATH",
+                help="read option values from a .yaml or .json config file",
+            )
+        if subtrees:
+            group = parser.add_argument_group("nested configs")
+            for path, count in subtrees.items():
+                group.add_argument(
+                    f"--{path}.*",
+                    action="store_true",
+                    help=f"{count} options, show them with --help {path}",
+                )
+        return parser.format_help()
+
+    def _help_request(self, args) -> tuple[bool, str | None]:
+        """Check if help was requested and return the dotted SCOPE given after it.
+
+        A token following the help flag is a scope only if options are under it,
+        other tokens such as positional arguments show the full help.
+        """
+        flags = set()
+        for name, kwargs in self.args.items():
+            if kwargs.get("action") == "help":
+                flags.update((name, self.aliases.get(name, name)))
+
+        for i, token in enumerate(args):
+            flag, eq, value = token.partition("=")
+            if flag not in flags:
+                continue
+            if eq:
+                return True, value
+            if i + 1 < len(args) and not args[i + 1].startswith("-"):
+                scope = args[i + 1]
+                _, names = self._select(args)
+                dests = (
+                    re.sub(r"\[.*?\]\.", "", n).lstrip(self.prefix_chars) for n in names
+                )
+                if any(in_scope(dest, scope) for dest in dests):
+                    return True, scope
+            return True, None
+        return False, None
+
+    def _select(self, args, config: dict | None = None) -> tuple[tuple, list]:
+        """Resolve the choices selected in `args` and collect the selected options.
+
+        Only the selected choice branches of the trie are visited. Their options
+        are added on the first visit; unselected branches are never expanded.
+
+        Returns:
+            tuple[tuple, list]: ((choice dest, selected name), ...) and the
+                registered names of all selected options.
+        """
+        self._add_pending()
+        values = option_values(args)
+        selection = list()
+        names = list()
+
+        def visit(node: OptionTrie, path: str):
+            names.extend(node.names)
+            if node.choice_default is not None:
+                # Check if user provided a specific value for a choice, otherwise use the default.
+                flag = f"--{path}"
+                val = values.get(flag)
+                if val is None and config:
+                    val = config_choice(node, path, config)
+                if val is None:
+                    val = node.choice_default
+                assert (
+                    val in node.branches
+                ), f"error: argument {flag}: invalid choice '{val}' (choose from {', '.join(node.branches)})"
+                selection.append((path, val))
+                if f"[{val}]" not in node.children:
+                    self._expand_branch(*node.branches[val])
+                visit(node.children[f"[{val}]"], path)
+            for seg, child in node.children.items():
+                if not seg.startswith("["):
+                    visit(child, f"{path}.{seg}" if path else seg)
+
+        visit(self.trie, "")
+        return tuple(selection), names
+
+    def _expand_branch(self, choice: Choices, prefix: str):
+        # Add a [] marker to highlight choice values.
+        # We use the marks later to select the options of a branch.
+        # Options of a new branch do not affect parsers of other selections.
+        self._add_options(choice, prefix=f"{prefix}.[{choice.name}].")
+
+    def _get_parser(self, selection: tuple, names: list) -> _ArgumentParser:
+        # Arguments of groups, subparsers and set_defaults are registered on this
+        # parser by argparse and copied into each parser, which is rebuilt when
+        # they change.
+        stamp = (len(self._actions), dict(self._defaults))
+        cached = self._parsers.get(selection)
+        if cached is not None and cached[1] == stamp:
+            return cached[0]
+
+        parser = _ArgumentParser(**self._parser_kwargs, parents=[self])
+        for name in names:
             if name in self.aliases:
                 arg = (self.aliases[name], name)
             else:
-                arg = (name,)
-            super().add_argument(*arg, **self.args[name])
+                # Remove the [] choice markers.
+                arg = (re.sub(r"\[.*?\]\.", "", name),)
+            parser.add_argument(*arg, **self.args[name])
 
-        args = super().parse_args(args)
+        self._parsers[selection] = parser, stamp
+        return parser
 
+    def _has_argparse_args(self) -> bool:
+        """Whether arguments or defaults were added through the argparse API."""
+        return bool(self._actions or self._defaults)
+
+    def _has_fromfile_args(self, args) -> bool:
+        prefixes = self.fromfile_prefix_chars
+        return bool(prefixes) and any(a[:1] in prefixes for a in args if a)
+
+    def _get_table(self, selection: tuple, names: list) -> "OptionTable | None":
+        if selection not in self._tables:
+            self._tables[selection] = OptionTable.build(
+                {name: self.args[name] for name in names},
+                self.aliases,
+            )
+        return self._tables[selection]
+
+    def _build_result(self, args_dict: dict, selection: tuple):
         # we can build the Lazy objects from the recursive dicts
-        args_dict = vars(args)
         args_grouped = defaultdict(dict)
+        choice_names = {dest for dest, _ in selection}
+        roots = set(self.lazy_roots)
         for k, v in args_dict.items():
             # Do not add choices names
-            if k in self.choices:
+            if k in choice_names:
                 continue
-            if not k.startswith(tuple(self.lazy_roots)):
-                args_grouped[k] = v
+            root, _, rest = k.partition(".")
+            if root in roots and rest:
+                args_grouped[root][rest] = v
             else:
-                root = [root for root in self.lazy_roots if k.startswith(root)]
-                assert len(root) == 1
-                root = root[0]
-                args_grouped[root][k.split(f"{root}.", 1)[-1]] = v
+                args_grouped[k] = v
 
         args_grouped = dict(args_grouped)
         if self.lazy_roots:
@@ -216,14 +819,285 @@ class ArgumentParser(_ArgumentParser):
             return SimpleNamespace(**args_grouped)
 
 
+class OptionTrie:
+    """Registered option names indexed by their dotted path.
+
+    Options of choice branches are stored under "[<choice name>]" segments,
+    so that a branch can be selected or skipped as a whole.
+    """
+
+    def __init__(self) -> None:
+        self.children: dict[str, "OptionTrie"] = dict()
+        self.names: list[str] = list()
+        # Set for nodes of Choices fields
+        self.choice_default: str | None = None
+        # choice name -> (choice, dotted path of the choice field)
+        self.branches: dict[str, tuple[Choices, str]] = dict()
+
+    def insert(self, path: list[str], name: str) -> "OptionTrie":
+        node = self.find(path)
+        node.names.append(name)
+        return node
+
+    def find(self, path: list[str]) -> "OptionTrie":
+        node = self
+        for part in path:
+            if part not in node.children:
+                node.children[part] = OptionTrie()
+            node = node.children[part]
+        return node
+
+
+def config_choice(node: OptionTrie, path: str, config: dict) -> str | None:
+    """Find the choice of a choice field selected by its `_class` in a config."""
+    cls = config.get(f"{path}.{TYPE_NAME}")
+    if cls is None:
+        return None
+    for name, (choice, _) in node.branches.items():
+        if is_class_tag(cls, choice.cls):
+            return name
+    raise AssertionError(f"error: argument --{path}: no choice of class {cls}")
+
+
+def is_class_tag(tag, cls) -> bool:
+    """Check if a config `_class` entry, a class, path or alias, refers to `cls`."""
+    return tag is cls or tag in (f"{cls.__module__}.{cls.__name__}", class_tag(cls))
+
+
+def in_scope(dest: str, scope: str | None) -> bool:
+    return scope is None or dest == scope or dest.startswith(f"{scope}.")
+
+
+def help_kwargs(kwargs: dict, selected: str | None = None) -> dict:
+    # Registration kwargs of an option with the text shown by format_help.
+    kwargs = dict(kwargs)
+    if selected is not None:
+        others = ", ".join(c for c in kwargs["choices"] if c != selected)
+        kwargs["help"] = f"selected {selected}, other choices: {others}"
+    elif kwargs.get("action") == "help":
+        kwargs["help"] = "show this help message (of a dotted SCOPE only) and exit"
+        kwargs["nargs"] = "?"
+        kwargs["metavar"] = "SCOPE"
+        kwargs.pop("action")
+    return kwargs
+
+
+class NativeOption(NamedTuple):
+    dest: str
+    convert: Callable | None
+    nargs: int | str | None
+    collect: Callable | None
+    choices: Any
+
+
+# Marks flags (such as --help) that are always handled by argparse.
+FALLBACK = None
+# Marks values that failed to convert.
+INVALID = object()
+
+NEGATIVE_NUMBER = re.compile(r"^-\d+$|^-\d*\.\d+$")
+
+
+class OptionTable:
+    """Hash table of options for parsing `--a.b.c value` without argparse.
+
+    `parse` returns None whenever argparse should take over: help, unknown
+    or abbreviated options, positionals and any conversion or arity error,
+    so that argparse produces the error message.
+    """
+
+    SUPPORTED = {"type", "default", "metavar", "required", "help", "nargs"}
+    SUPPORTED |= {"choices", "action"}
+
+    def __init__(self, options: dict, defaults: dict, required: set) -> None:
+        self.options = options
+        self.defaults = defaults
+        self.required = required
+
+    @staticmethod
+    def build(args: dict, aliases: dict) -> "OptionTable | None":
+        """Build a table from registered options, None if argparse is always needed."""
+        options, defaults, required = dict(), dict(), set()
+        for name, kwargs in args.items():
+            flags = (name, aliases[name]) if name in aliases else (name,)
+            action = kwargs.get("action")
+            if action in ("help", "version"):
+                options.update({flag: FALLBACK for flag in flags})
+                continue
+            collect = getattr(action, "collect_type", None)
+            if (
+                not name.startswith("--")
+                or (action is not None and collect is None)
+                or not OptionTable.SUPPORTED.issuperset(kwargs)
+            ):
+                return None
+
+            dest = re.sub(r"\[.*?\]\.", "", name)[2:].replace("-", "_")
+            convert = kwargs.get("type")
+            default = kwargs.get("default")
+            # argparse converts string defaults with the option type
+            if isinstance(default, str) and convert is not None:
+                default = convert(default)
+            defaults[dest] = default
+            if kwargs.get("required"):
+                required.add(dest)
+
+            option = NativeOption(
+                dest, convert, kwargs.get("nargs"), collect, kwargs.get("choices")
+            )
+            options.update({re.sub(r"\[.*?\]\.", "", flag): option for flag in flags})
+        return OptionTable(options, defaults, required)
+
+    def parse(self, args: list, defaults: dict | None = None) -> dict | None:
+        result = {**self.defaults, **(defaults or {})}
+        seen = set()
+        i, n = 0, len(args)
+        while i < n:
+            flag, eq, value = args[i].partition("=")
+            option = self.options.get(flag)
+            if option is None:
+                return None
+            i += 1
+
+            if eq:
+                values = [value]
+            else:
+                limit = n if option.nargs == "*" else i + (option.nargs or 1)
+                end = i
+                while end < min(limit, n) and not self._is_flag(args[end]):
+                    end += 1
+                values, i = args[i:end], end
+
+            parsed = self._convert(option, values)
+            if parsed is INVALID:
+                return None
+            result[option.dest] = parsed
+            seen.add(option.dest)
+
+        if not self.required.issubset(seen):
+            return None
+        return result
+
+    @staticmethod
+    def _is_flag(token: str) -> bool:
+        return token.startswith("-") and not NEGATIVE_NUMBER.match(token)
+
+    @staticmethod
+    def _convert(option: NativeOption, values: list) -> Any:
+        nargs = option.nargs
+        if (nargs is None and len(values) != 1) or (
+            isinstance(nargs, int) and len(values) != nargs
+        ):
+            return INVALID
+        try:
+            if option.convert is not None:
+                values = [option.convert(v) for v in values]
+        except (ValueError, TypeError, ArgumentTypeError):
+            return INVALID
+        if option.choices is not None and any(v not in option.choices for v in values):
+            return INVALID
+        if nargs is None:
+            return values[0]
+        return option.collect(values) if option.collect is not None else values
+
+
+SWEEP_RANGE = re.compile(r"^(-?\d+):(-?\d+)(?::(-?\d+))?$")
+
+
+class SweepAxis(NamedTuple):
+    index: int  # of the token holding the values
+    flag: str
+    prefix: str  # "--flag=" if the values are in the flag token
+    values: list[str]
+
+
+def sweep_axes(args) -> list[SweepAxis]:
+    """Find the `--option` values in args that list several values.
+
+    Values are separated by commas, and int ranges `start:stop[:step]` expand
+    to the values of `range(start, stop, step)`.
+    """
+    axes = list()
+    for i, token in enumerate(args):
+        if not token.startswith("--"):
+            continue
+        flag, eq, raw = token.partition("=")
+        if eq:
+            index, prefix = i, f"{flag}="
+        elif i + 1 < len(args) and not _is_sweep_flag(args[i + 1]):
+            index, prefix, raw = i + 1, "", args[i + 1]
+        else:
+            continue
+        if "," not in raw and not SWEEP_RANGE.match(raw):
+            continue
+
+        values = list()
+        for item in raw.split(","):
+            if match := SWEEP_RANGE.match(item):
+                start, stop, step = match.groups()
+                values.extend(map(str, range(int(start), int(stop), int(step or 1))))
+            else:
+                values.append(item)
+        axes.append(SweepAxis(index, flag, prefix, values))
+    return axes
+
+
+def _is_sweep_flag(token: str) -> bool:
+    return token.startswith("-") and not all(
+        NEGATIVE_NUMBER.match(item) or SWEEP_RANGE.match(item)
+        for item in token.split(",")
+    )
+
+
+def substitute(args: list, axes: list[SweepAxis], values) -> list:
+    """Replace the swept values in args by single values."""
+    args = list(args)
+    for axis, value in zip(axes, values):
+        args[axis.index] = axis.prefix + value
+    return args
+
+
+def option_values(args) -> dict:
+    """Map each `--option` in args to the token following it (or after `=`).
+
+    The last occurrence wins, as in argparse.
+    """
+    values = dict()
+    for i, token in enumerate(args):
+        if not token.startswith("--"):
+            continue
+        if "=" in token:
+            flag, value = token.split("=", 1)
+            values[flag] = value
+        elif i + 1 < len(args):
+            values[token] = args[i + 1]
+    return values
+
+
 def collect_as(coll_type):
     class Collect_as(Action):
+        collect_type = coll_type
+
         def __call__(self, parser, namespace, values, options_string=None):
             setattr(namespace, self.dest, coll_type(values))
 
     return Collect_as
 
 
+def _convert_config_item(convert, value):
+    """Convert a single config value like the command line string of it."""
+    if value is None or value is Missing or type(value) is convert:
+        return value
+    if convert is str2bool and isinstance(value, bool):
+        return value
+    if convert in (int, float, str, str2bool):
+        if isinstance(value, (list, tuple, dict)):
+            raise TypeError(f"Expected a single value, got {value!r}.")
+        return convert(str(value))
+    # Other converters (e.g. of arrays) only get strings, loaded values are kept.
+    return convert(value) if isinstance(value, str) else value
+
+
 def str2bool(v):
     if isinstance(v, bool):
         return v
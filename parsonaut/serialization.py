@@ -1,9 +1,33 @@
+import asyncio
+import atexit
+import contextvars
+import functools
 import importlib
 import json
+import mmap
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from hashlib import blake2b
 from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
 
 import yaml
 
+from . import binary
+from .arrays import ARRAY_TAG, is_ndarray, load_array, save_array
+from .packed import PackedTuple
+from .typecheck import Missing, MissingType
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, writers are not serialized there
+    fcntl = None
+
+# Files with this suffix are stored in the binary format of `binary.py`.
+BINARY_SUFFIX = ".pnb"
+
 
 class DictSerializable:
     def to_dict(self, with_class_tag_as_str) -> dict:
@@ -15,52 +39,115 @@ class DictSerializable:
 
 
 class YamlMixin(DictSerializable):
-    def to_yaml(self, pth):
-        dct = self.to_dict(with_class_tag_as_str=True)
-        save_yaml(dct, pth)
+    def to_yaml(self, pth, codec: str | None = None):
+        _save_yaml_dict(self.to_dict(with_class_tag_as_str=True), pth, codec)
 
     @classmethod
-    def from_yaml(cls, pth):
-        dct = load_yaml(pth)
+    def from_yaml(cls, pth, codec: str | None = None):
+        dct = load_arrays(load_yaml(pth, codec=codec), pth)
         return cls.from_dict(dct)
 
 
 class JsonMixin(DictSerializable):
-    def to_json(self, pth: str):
-        dct = self.to_dict(with_class_tag_as_str=True)
-        save_json(dct, pth)
+    def to_json(self, pth: str, codec: str | None = None):
+        _save_json_dict(self.to_dict(with_class_tag_as_str=True), pth, codec)
 
     @classmethod
-    def from_json(cls, pth: str):
-        dct = load_json(pth)
+    def from_json(cls, pth: str, codec: str | None = None):
+        dct = load_arrays(load_json(pth, codec=codec), pth)
         return cls.from_dict(dct)
 
 
-class Serializable(YamlMixin, JsonMixin):
+class BinaryMixin(DictSerializable):
+    def to_binary(self, pth):
+        _save_binary_dict(self.to_dict(with_class_tag_as_str=True), pth)
+
     @classmethod
-    def from_file(cls, path):
-        return load_serializable(path, cls)
+    def from_binary(cls, pth):
+        with open_compressed(pth, "rb") as f:
+            return cls.from_dict(binary.decode(f.read()))
 
-    def to_file(self, path) -> None:
-        save_serializable(self, path)
 
+class Serializable(YamlMixin, JsonMixin, BinaryMixin):
+    @classmethod
+    def from_file(
+        cls, path, codec: str | None = None, transport_params: dict | None = None
+    ):
+        with use_transport_params(transport_params):
+            return load_serializable(path, cls, codec=codec)
 
-def save_serializable(config: Serializable, path) -> None:
-    if extension_contains(".json", path):
-        config.to_json(path)
-    elif extension_contains(".yaml", path):
-        config.to_yaml(path)
-    else:
-        raise ValueError(f"Unknown serialization format for: {path}")
+    @classmethod
+    def from_jsonl(cls, pth, codec: str | None = None) -> Iterator:
+        """Read the configs of a JSON Lines file written by `save_jsonl`, one at a time."""
+        # Every distinct class path is imported once for the whole file.
+        resolve = functools.cache(maybe_import)
+        for dct in load_jsonl(pth, codec=codec):
+            yield cls._from_record(dct, resolve)
 
+    @classmethod
+    def _from_record(cls, dct: dict, resolve: Callable[[str], type]):
+        if cls == Serializable:
+            return resolve(dct["_class"])._from_record(dct, resolve)
+        return cls.from_dict(dct)
 
-def load_serializable(path, cls):
-    if extension_contains(".json", path):
-        dct = load_json(path)
-    elif extension_contains(".yaml", path):
-        dct = load_yaml(path)
-    else:
-        raise ValueError(f"Unknown serialization format for: {path}")
+    def to_file(
+        self,
+        path,
+        codec: str | None = None,
+        transport_params: dict | None = None,
+        compresslevel: int | None = None,
+    ) -> None:
+        with use_transport_params(transport_params):
+            save_serializable(self, path, codec=codec, compresslevel=compresslevel)
+
+    def to_file_async(
+        self,
+        path,
+        codec: str | None = None,
+        transport_params: dict | None = None,
+        compresslevel: int | None = None,
+    ) -> Future:
+        """Write the config in the background, see `flush_writes`.
+
+        The config dictionary is copied before returning, so later changes of
+        the object are not written (arrays are not copied). Files are written
+        in the order of the calls.
+
+        Returns:
+            Future: Resolves to None once the file is written.
+        """
+        dct = _snapshot(self.to_dict(with_class_tag_as_str=True))
+        return _submit(
+            save_dict, dct, path, codec, transport_params, compresslevel, write=True
+        )
+
+    @classmethod
+    async def from_file_async(
+        cls, path, codec: str | None = None, transport_params: dict | None = None
+    ):
+        """Awaitable `from_file`, it reads after the writes submitted before it."""
+        future = _submit(cls.from_file, path, codec, transport_params)
+        return await asyncio.wrap_future(future)
+
+
+def save_serializable(
+    config: Serializable,
+    path,
+    codec: str | None = None,
+    compresslevel: int | None = None,
+) -> None:
+    save_dict(
+        config.to_dict(with_class_tag_as_str=True),
+        path,
+        codec=codec,
+        compresslevel=compresslevel,
+    )
+
+
+def load_serializable(path, cls, codec: str | None = None):
+    if extension_contains(BINARY_SUFFIX, path) and cls != Serializable:
+        return cls.from_binary(path)
+    dct = load_dict(path, codec=codec)
 
     if cls == Serializable:
         cls = maybe_import(dct["_class"])
@@ -69,50 +156,806 @@ def load_serializable(path, cls):
         return cls.from_dict(dct)
 
 
+def save_dict(
+    dct: dict,
+    path,
+    codec: str | None = None,
+    transport_params: dict | None = None,
+    compresslevel: int | None = None,
+) -> None:
+    """Store a config dictionary in a .yaml, .json or .pnb file.
+
+    It is the single writer behind `to_file` and `to_file_async`. `compresslevel`
+    applies to compressed files, e.g. config.json.gz, and defaults to
+    `COMPRESSION_LEVELS`.
+    """
+    with use_transport_params(transport_params):
+        if extension_contains(BINARY_SUFFIX, path):
+            _save_binary_dict(dct, path, compresslevel)
+        elif extension_contains(".json", path):
+            _save_json_dict(dct, path, codec, compresslevel)
+        elif extension_contains(".yaml", path):
+            _save_yaml_dict(dct, path, codec, compresslevel)
+        else:
+            raise ValueError(f"Unknown serialization format for: {path}")
+
+
+def _save_yaml_dict(
+    dct: dict, path, codec: str | None = None, compresslevel: int | None = None
+) -> None:
+    save_yaml(dump_arrays(dct, path), path, codec=codec, compresslevel=compresslevel)
+
+
+def _save_json_dict(
+    dct: dict, path, codec: str | None = None, compresslevel: int | None = None
+) -> None:
+    save_json(dump_arrays(dct, path), path, codec=codec, compresslevel=compresslevel)
+
+
+def _save_binary_dict(dct: dict, path, compresslevel: int | None = None) -> None:
+    with open_compressed(path, "wb", compresslevel) as f:
+        f.write(binary.encode(dct))
+
+
+def load_dict(path, codec: str | None = None) -> dict:
+    """Load the config dictionary stored in a .yaml, .json or .pnb file, arrays included.
+
+    `codec` selects the backend of the text formats, see `CODECS`. Files with a
+    compression suffix, e.g. config.json.gz, are decompressed while reading.
+    """
+    if extension_contains(BINARY_SUFFIX, path):
+        with open_compressed(path, "rb") as f:
+            return binary.decode(f.read())
+    elif extension_contains(".json", path):
+        dct = load_json(path, codec=codec)
+    elif extension_contains(".yaml", path):
+        dct = load_yaml(path, codec=codec)
+    else:
+        raise ValueError(f"Unknown serialization format for: {path}")
+    return load_arrays(dct, path) if isinstance(dct, dict) else dct
+
+
+# Runs `to_file_async` and `from_file_async`. A single worker keeps the calls in
+# order, so that a file is read only after the writes submitted before.
+_EXECUTOR: ThreadPoolExecutor | None = None
+_PENDING_WRITES: set[Future] = set()
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _snapshot(value):
+    # Copies the mutable containers of a config dictionary.
+    if isinstance(value, dict):
+        return {k: _snapshot(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [_snapshot(v) for v in value]
+    return value
+
+
+def _submit(fn, *args, write: bool = False) -> Future:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(1, thread_name_prefix="parsonaut-io")
+            atexit.register(flush_writes)
+        # The worker sees the transport params of the caller.
+        future = _EXECUTOR.submit(contextvars.copy_context().run, fn, *args)
+        if write:
+            _PENDING_WRITES.add(future)
+    if write:
+        future.add_done_callback(_write_done)
+    return future
+
+
+def _write_done(future: Future) -> None:
+    # Failed writes are kept until `flush_writes` reports them.
+    if future.cancelled() or future.exception() is None:
+        _PENDING_WRITES.discard(future)
+
+
+def flush_writes(timeout: float | None = None) -> None:
+    """Wait until the files submitted by `to_file_async` so far are written.
+
+    Writes that failed before are reported by the next call, once. It runs at
+    interpreter exit, too.
+
+    Args:
+        timeout (float | None, optional): Seconds to wait. Defaults to no limit.
+
+    Raises:
+        TimeoutError: If the writes did not finish in time.
+        Exception: The error of the first failed write among those waited for.
+    """
+    with _EXECUTOR_LOCK:
+        pending = list(_PENDING_WRITES)
+    _, not_done = wait(pending, timeout)
+    if not_done:
+        raise TimeoutError(f"{len(not_done)} config files are still being written.")
+    with _EXECUTOR_LOCK:
+        _PENDING_WRITES.difference_update(pending)
+    for future in pending:
+        if not future.cancelled() and future.exception() is not None:
+            raise future.exception()
+
+
+def save_jsonl(
+    configs: Iterable[Serializable],
+    pth,
+    codec: str | None = None,
+    compresslevel: int | None = None,
+) -> int:
+    """Write many configs into one JSON Lines file, compressed by its suffix.
+
+    Every line holds one `to_dict(with_class_tag_as_str=True)` config. Arrays are
+    not supported, as they cannot be stored in sidecar files per line.
+
+    Args:
+        configs (Iterable[Serializable]): The configs, consumed lazily.
+        pth: Path of the file.
+        codec (str | None, optional): A JSON codec from `CODECS`. Defaults to the
+            best available one.
+        compresslevel (int | None, optional): Defaults to `COMPRESSION_LEVELS`.
+
+    Returns:
+        int: The number of configs written.
+    """
+    dumps = get_codec("json", codec).dumps_line
+    if dumps is None:
+        raise ValueError(f"The json codec {codec} cannot write JSON Lines.")
+    n = 0
+    with open_compressed(pth, "wb", compresslevel) as f:
+        for n, config in enumerate(configs, 1):
+            line = dumps(config.to_dict(with_class_tag_as_str=True))
+            f.write(line if isinstance(line, bytes) else line.encode())
+            f.write(b"\n")
+    return n
+
+
+def load_jsonl(pth, codec: str | None = None) -> Iterator[dict]:
+    """Read the config dictionaries of a JSON Lines file, one at a time."""
+    loads = get_codec("json", codec).loads
+    with open_compressed(pth, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+class ConfigStore:
+    """An append-only store of many configs with random access by run id.
+
+    Configs are encoded with `binary.encode` into one data file. An index file
+    maps run ids and content fingerprints to the offset and length of their
+    record, identical configs are stored once. Reads memory-map both files,
+    look up the last index line of a run and decode a single record, nothing
+    is loaded per entry. Any number of processes can read the store while
+    others append, writers take turns through a lock file.
+
+    The store is a local directory, as memory maps need local files.
+    """
+
+    DATA = "configs.bin"
+    INDEX = "index.tsv"
+    LOCK = "lock"
+
+    def __init__(self, directory) -> None:
+        self.directory = str(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self._mmap: mmap.mmap | None = None
+        self._index_mmap: mmap.mmap | None = None
+
+    def put(self, run_id: str, config: Serializable) -> str:
+        """Store `config` under `run_id`, replacing an earlier config of the run.
+
+        Returns:
+            str: The content fingerprint of the config.
+        """
+        if not run_id or any(c in run_id for c in "\t\r\n"):
+            raise ValueError(f"Invalid run id {run_id!r}.")
+        record = binary.encode(config.to_dict(with_class_tag_as_str=True))
+        fingerprint = blake2b(record, digest_size=16).hexdigest()
+        with self._lock():
+            fields = self._lookup(1, fingerprint)
+            if fields is not None:
+                entry = (int(fields[2]), int(fields[3]))
+            else:
+                with open(self._path(self.DATA), "ab") as f:
+                    entry = (f.seek(0, os.SEEK_END), len(record))
+                    f.write(record)
+            # The record is written before the index entry pointing to it.
+            line = f"{run_id}\t{fingerprint}\t{entry[0]}\t{entry[1]}\n"
+            with open(self._path(self.INDEX), "ab+") as f:
+                if f.seek(0, os.SEEK_END) and not _ends_with_newline(f):
+                    # Terminate the entry of a writer that did not finish.
+                    line = "\n" + line
+                f.write(line.encode())
+        return fingerprint
+
+    def get(self, run_id: str, cls=None):
+        """Load the config of `run_id`, with `cls.from_dict` or its own class."""
+        return self._load(self._find(0, run_id), cls)
+
+    def get_by_fingerprint(self, fingerprint: str, cls=None):
+        return self._load(self._find(1, fingerprint), cls)
+
+    def fingerprint(self, run_id: str) -> str:
+        return self._find(0, run_id)[1]
+
+    def close(self) -> None:
+        for name in ("_mmap", "_index_mmap"):
+            if getattr(self, name) is not None:
+                getattr(self, name).close()
+                setattr(self, name, None)
+
+    def __enter__(self) -> "ConfigStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __contains__(self, run_id: str) -> bool:
+        return self._lookup(0, run_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._run_ids())
+
+    def __len__(self) -> int:
+        return len(self._run_ids())
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _run_ids(self) -> list[str]:
+        # Listing the runs reads the whole index, unlike single lookups.
+        index = self._index()
+        lines = bytes(index[: index.rfind(b"\n") + 1]).decode().splitlines()
+        runs = (fields[0] for fields in map(_index_fields, lines) if fields)
+        return list(dict.fromkeys(runs))
+
+    def _index(self):
+        """The memory-mapped index, mapped again whenever it grew."""
+        try:
+            size = os.path.getsize(self._path(self.INDEX))
+        except FileNotFoundError:
+            return b""
+        if size == 0:
+            return b""
+        if self._index_mmap is None or len(self._index_mmap) != size:
+            if self._index_mmap is not None:
+                self._index_mmap.close()
+            with open(self._path(self.INDEX), "rb") as f:
+                self._index_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._index_mmap
+
+    def _lookup(self, field: int, key: str) -> list[str] | None:
+        """The fields of the last index line with `key` in `field` (0: run id,
+        1: fingerprint), searched backwards in the memory-mapped index."""
+        index = self._index()
+        needle = (f"\n{key}\t" if field == 0 else f"\t{key}\t").encode()
+        # Skip a last line that is still being written.
+        pos = index.rfind(b"\n") + 1
+        while pos > 0:
+            pos = index.rfind(needle, 0, pos)
+            # The needle of a run id misses the first line, it is checked last.
+            start = index.rfind(b"\n", 0, max(pos, 0) + 1) + 1
+            line = bytes(index[start : index.find(b"\n", start)]).decode()
+            fields = _index_fields(line)
+            if fields and fields[field] == key:
+                return fields
+        return None
+
+    def _find(self, field: int, key: str) -> list[str]:
+        fields = self._lookup(field, key)
+        if fields is None:
+            raise KeyError(key)
+        return fields
+
+    def _load(self, fields: list[str], cls):
+        offset, length = int(fields[2]), int(fields[3])
+        if self._mmap is None or len(self._mmap) < offset + length:
+            # The data file grew since it was mapped.
+            if self._mmap is not None:
+                self._mmap.close()
+            with open(self._path(self.DATA), "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        dct = binary.decode(self._mmap[offset : offset + length])
+        return (maybe_import(dct["_class"]) if cls is None else cls).from_dict(dct)
+
+    @contextmanager
+    def _lock(self):
+        with open(self._path(self.LOCK), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _index_fields(line: str) -> list[str] | None:
+    # Lines torn by a crashed writer have fewer fields, they are skipped.
+    fields = line.split("\t")
+    if len(fields) != 4 or not (fields[2].isdigit() and fields[3].isdigit()):
+        return None
+    return fields
+
+
+def _ends_with_newline(f) -> bool:
+    f.seek(-1, os.SEEK_END)
+    return f.read(1) == b"\n"
+
+
 def extension_contains(ext: str, path) -> bool:
     return any(ext == sfx for sfx in Path(path).suffixes)
 
 
-def load_yaml(pth):
-    with open_best(pth, "r") as f:
-        return yaml.safe_load(f)
+def dump_arrays(dct: dict, pth, prefix: str = "") -> dict:
+    """Write array values into sidecar .npy files next to the config file `pth`.
+
+    The arrays are replaced by {ARRAY_TAG: <file name>} references relative to `pth`.
+
+    Args:
+        dct (dict): A nested config dictionary.
+        pth: Path of the config file.
+        prefix (str, optional): Dotted path of `dct` within the config.
+
+    Returns:
+        dict: A copy of `dct` with arrays replaced by references.
+    """
+    out = dict()
+    for k, v in dct.items():
+        if isinstance(v, dict):
+            out[k] = dump_arrays(v, pth, prefix=f"{prefix}{k}.")
+        elif is_ndarray(v):
+            # The full file name keeps config.yaml and config.json apart.
+            name = f"{Path(str(pth)).name}.{prefix}{k}.npy"
+            with open_best(_sibling(pth, name), "wb") as f:
+                save_array(v, f)
+            out[k] = {ARRAY_TAG: name}
+        else:
+            out[k] = v
+    return out
+
+
+def load_arrays(dct: dict, pth) -> dict:
+    """Replace sidecar references in a loaded config with memory-mapped arrays."""
+    for k, v in dct.items():
+        if isinstance(v, dict):
+            if len(v) == 1 and ARRAY_TAG in v:
+                dct[k] = load_array(_sibling(pth, v[ARRAY_TAG]))
+            else:
+                load_arrays(v, pth)
+    return dct
+
+
+def _sibling(pth, name: str) -> str:
+    # Keep URLs such as s3://bucket/config.yaml intact, Path would collapse "//".
+    pth = str(pth)
+    if "://" in pth:
+        return f"{pth.rpartition('/')[0]}/{name}"
+    return os.path.join(os.path.dirname(pth), name)
+
+
+class Codec(NamedTuple):
+    """A backend reading and writing one serialization format.
+
+    `loads` and `dumps` work on text, or on bytes if `binary` is set.
+    """
+
+    loads: Callable[[Any], Any]
+    dumps: Callable[[Any], Any]
+    available: Callable[[], bool] = lambda: True
+    binary: bool = False
+    # Writes a single line, for JSON Lines files.
+    dumps_line: Callable[[Any], Any] | None = None
+
+
+MISSING_TAG = "!missing"
+
+
+def _represent_packed(dumper, data: PackedTuple):
+    return dumper.represent_sequence(
+        "tag:yaml.org,2002:seq", data.tolist(), flow_style=True
+    )
+
+
+def _represent_missing(dumper, data: MissingType):
+    return dumper.represent_scalar(MISSING_TAG, "")
+
+
+def _construct_missing(loader, node) -> MissingType:
+    return Missing
+
+
+class _SafeLoader(yaml.SafeLoader):
+    pass
+
+
+class _SafeDumper(yaml.SafeDumper):
+    pass
+
 
+_LOADERS = [_SafeLoader]
+_DUMPERS = [_SafeDumper]
+if yaml.__with_libyaml__:
 
-def save_yaml(dct, pth):
-    with open_best(pth, "w") as f:
-        yaml.dump(dct, f)
+    class _CSafeLoader(yaml.CSafeLoader):
+        pass
 
+    class _CSafeDumper(yaml.CSafeDumper):
+        pass
 
-def load_json(pth):
-    with open_best(pth, "r") as f:
-        return json.load(f)
+    _LOADERS.append(_CSafeLoader)
+    _DUMPERS.append(_CSafeDumper)
 
+for _loader in _LOADERS:
+    _loader.add_constructor(MISSING_TAG, _construct_missing)
+for _dumper in _DUMPERS:
+    _dumper.add_representer(PackedTuple, _represent_packed)
+    # Tuples are stored as plain lists, so that any YAML reader can load them.
+    _dumper.add_representer(tuple, yaml.SafeDumper.represent_list)
+    _dumper.add_representer(MissingType, _represent_missing)
 
-def save_json(dct, pth):
-    with open_best(pth, "w") as f:
-        json.dump(dct, f, indent=4)
+
+def _yaml_codec(loader, dumper, available=lambda: True) -> Codec:
+    return Codec(
+        loads=lambda data: yaml.load(data, Loader=loader),
+        dumps=lambda dct: yaml.dump(dct, Dumper=dumper),
+        available=available,
+    )
+
+
+def _json_default(obj):
+    if isinstance(obj, PackedTuple):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _orjson_loads(data: bytes):
+    import orjson
+
+    return orjson.loads(data)
+
+
+def _orjson_dumps(dct) -> bytes:
+    import orjson
+
+    return orjson.dumps(dct, default=_json_default, option=orjson.OPT_INDENT_2)
+
+
+def _orjson_dumps_line(dct) -> bytes:
+    import orjson
+
+    return orjson.dumps(dct, default=_json_default)
+
+
+def _ujson_loads(data: str):
+    import ujson
+
+    return ujson.loads(data)
+
+
+def _ujson_dumps(dct) -> str:
+    import ujson
+
+    return ujson.dumps(
+        dct, indent=4, escape_forward_slashes=False, default=_json_default
+    )
+
+
+def _ujson_dumps_line(dct) -> str:
+    import ujson
+
+    return ujson.dumps(
+        dct, ensure_ascii=False, escape_forward_slashes=False, default=_json_default
+    )
+
+
+# Codecs of each format, in the order of preference. The json and ujson codecs
+# write the layout of earlier parsonaut versions, indented by 4 spaces with
+# non-ASCII characters escaped. orjson only supports an indent of 2 spaces and
+# writes UTF-8 text, and it spells some floats differently (0.00001 for 1e-05);
+# all codecs read each other's files. JSON Lines are compact UTF-8 text.
+CODECS: dict[str, dict[str, Codec]] = {
+    "yaml": {
+        "libyaml": _yaml_codec(
+            _LOADERS[-1], _DUMPERS[-1], available=lambda: yaml.__with_libyaml__
+        ),
+        "pyyaml": _yaml_codec(_SafeLoader, _SafeDumper),
+    },
+    "json": {
+        "orjson": Codec(
+            loads=_orjson_loads,
+            dumps=_orjson_dumps,
+            available=lambda: is_module_available("orjson"),
+            binary=True,
+            dumps_line=_orjson_dumps_line,
+        ),
+        "ujson": Codec(
+            loads=_ujson_loads,
+            dumps=_ujson_dumps,
+            available=lambda: is_module_available("ujson"),
+            dumps_line=_ujson_dumps_line,
+        ),
+        "json": Codec(
+            loads=json.loads,
+            dumps=lambda dct: json.dumps(dct, indent=4, default=_json_default),
+            dumps_line=lambda dct: json.dumps(
+                dct, separators=(",", ":"), ensure_ascii=False, default=_json_default
+            ),
+        ),
+    },
+}
+_DEFAULT_CODECS: dict[str, str] = dict()
+
+
+def register_codec(fmt: str, name: str, codec: Codec, default: bool = False) -> None:
+    """Add a codec of format `fmt` ("yaml" or "json").
+
+    Args:
+        fmt (str): The format read and written by the codec.
+        name (str): Name to select the codec with.
+        codec (Codec): The backend.
+        default (bool, optional): Prefer it over the codecs already registered.
+            Defaults to False.
+    """
+    codecs = CODECS[fmt]
+    codecs[name] = codec
+    if default:
+        CODECS[fmt] = {name: codec, **codecs}
+    _DEFAULT_CODECS.pop(fmt, None)
+
+
+def get_codec(fmt: str, name: str | None = None) -> Codec:
+    """Return the codec `name` of format `fmt`, or the best available one.
+
+    Args:
+        fmt (str): "yaml" or "json".
+        name (str | None, optional): A codec from `CODECS[fmt]`. Defaults to the
+            first available one.
+
+    Raises:
+        ValueError: If the codec is unknown or its backend is not installed.
+
+    Returns:
+        Codec: The codec.
+    """
+    codecs = CODECS[fmt]
+    if name is None:
+        if fmt not in _DEFAULT_CODECS:
+            _DEFAULT_CODECS[fmt] = next(n for n, c in codecs.items() if c.available())
+        name = _DEFAULT_CODECS[fmt]
+    if name not in codecs:
+        raise ValueError(f"Unknown {fmt} codec {name}, choose from {list(codecs)}.")
+    codec = codecs[name]
+    if not codec.available():
+        raise ValueError(f"The {fmt} codec {name} is not available.")
+    return codec
+
+
+def load_codec(pth, fmt: str, codec: str | None = None):
+    codec_ = get_codec(fmt, codec)
+    with open_compressed(pth, "rb") as f:
+        data = f.read()
+    return codec_.loads(data if codec_.binary else data.decode("utf-8"))
+
+
+def save_codec(
+    dct, pth, fmt: str, codec: str | None = None, compresslevel: int | None = None
+) -> None:
+    codec_ = get_codec(fmt, codec)
+    data = codec_.dumps(dct)
+    with open_compressed(pth, "wb", compresslevel) as f:
+        f.write(data if codec_.binary else data.encode("utf-8"))
+
+
+def load_yaml(pth, codec: str | None = None):
+    return load_codec(pth, "yaml", codec)
+
+
+def save_yaml(dct, pth, codec: str | None = None, compresslevel: int | None = None):
+    save_codec(dct, pth, "yaml", codec, compresslevel)
+
+
+def load_json(pth, codec: str | None = None):
+    return load_codec(pth, "json", codec)
+
+
+def save_json(dct, pth, codec: str | None = None, compresslevel: int | None = None):
+    save_codec(dct, pth, "json", codec, compresslevel)
+
+
+# Classes registered under short names, and the names of registered classes.
+_REGISTRY: dict[str, type] = dict()
+_ALIASES: dict[type, str] = dict()
+# Import paths resolved so far.
+_IMPORTED: dict[str, type] = dict()
+
+
+def register_class(name: str) -> Callable[[type], type]:
+    """Register a class under a short, stable name, usable as a class decorator.
+
+    Configs of the class store `name` as their `_class` tag instead of the
+    import path. They are more compact and stay loadable if the class moves
+    to another module. Configs stored with the import path still load.
+
+    Args:
+        name (str): The name, without dots so that it never shadows a path.
+
+    Raises:
+        ValueError: If the name or the class is already registered differently.
+    """
+    if not name or "." in name:
+        raise ValueError(f"Invalid class name {name!r}, it must not contain dots.")
+
+    def register(cls: type) -> type:
+        if _REGISTRY.get(name, cls) is not cls:
+            raise ValueError(f"{name} is already registered for {_REGISTRY[name]}.")
+        if _ALIASES.get(cls, name) != name:
+            raise ValueError(f"{cls} is already registered as {_ALIASES[cls]}.")
+        _REGISTRY[name] = cls
+        _ALIASES[cls] = name
+        # A class registered again, e.g. after a module reload, is a new object.
+        clear_import_cache()
+        return cls
+
+    return register
+
+
+def clear_import_cache() -> None:
+    """Forget the classes resolved from import paths by `maybe_import`.
+
+    Call it after reloading or replacing a module, so that its configs are
+    built with the new classes.
+    """
+    _IMPORTED.clear()
+
+
+def class_tag(cls: type) -> str:
+    """The `_class` tag of `cls` in serialized configs."""
+    return _ALIASES.get(cls) or f"{cls.__module__}.{cls.__name__}"
 
 
 def maybe_import(cls_or_str):
-    if isinstance(cls_or_str, str):
+    if not isinstance(cls_or_str, str):
+        return cls_or_str
+    cls = _REGISTRY.get(cls_or_str) or _IMPORTED.get(cls_or_str)
+    if cls is None:
+        if "." not in cls_or_str:
+            raise ValueError(f"No class is registered as {cls_or_str}.")
         module_name, class_name = cls_or_str.rsplit(".", 1)
         module = importlib.import_module(module_name)
-        cls = getattr(module, class_name)
-    else:
-        cls = cls_or_str
+        cls = _IMPORTED[cls_or_str] = getattr(module, class_name)
     return cls
 
 
-def open_best(pth, mode):
-    if is_module_available("smart_open"):
-        from smart_open import open as open_
+# smart_open transport parameters for all files, see `set_transport_params`.
+_TRANSPORT_PARAMS: dict = dict()
+# Overrides them within a `use_transport_params` block.
+_SCOPED_TRANSPORT_PARAMS: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "transport_params", default=None
+)
+
 
-        return open_(pth, mode)
-    else:
+def set_transport_params(params: dict | None) -> None:
+    """Set the smart_open `transport_params` of every file opened by parsonaut.
+
+    Passing a client (e.g. `{"client": boto3.client("s3")}`) lets all config,
+    array and checkpoint files share its session and connection pool instead
+    of creating one per file.
+
+    Args:
+        params (dict | None): The parameters, None to reset them.
+    """
+    global _TRANSPORT_PARAMS
+    _TRANSPORT_PARAMS = dict(params or {})
+
+
+@contextmanager
+def use_transport_params(params: dict | None):
+    """Use `params` instead of the global transport parameters within the block.
+
+    None keeps the current ones.
+    """
+    if params is None:
+        yield
+        return
+    token = _SCOPED_TRANSPORT_PARAMS.set(params)
+    try:
+        yield
+    finally:
+        _SCOPED_TRANSPORT_PARAMS.reset(token)
+
+
+@functools.cache
+def _smart_open():
+    # Detected once, `find_spec` probes the file system.
+    if not is_module_available("smart_open"):
+        return None
+    from smart_open import open as open_
+
+    return open_
+
+
+# Compression modules by file suffix, and their compression levels.
+COMPRESSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "lzma", ".zst": "zstandard"}
+COMPRESSION_LEVELS = {".gz": 6, ".bz2": 9, ".xz": 6, ".zst": 3}
+
+
+def compression_suffix(pth) -> str | None:
+    """The compression suffix of `pth` (e.g. ".gz" of config.json.gz), if any."""
+    suffix = Path(str(pth)).suffix
+    return suffix if suffix in COMPRESSIONS else None
+
+
+@contextmanager
+def open_compressed(pth, mode: str, compresslevel: int | None = None):
+    """`open_best`, with streaming (de)compression chosen by the last suffix of `pth`.
+
+    Supports .gz, .bz2, .xz and, with zstandard installed, .zst files.
+
+    Args:
+        pth: Local path or URL.
+        mode (str): The file mode, text or binary.
+        compresslevel (int | None, optional): Defaults to `COMPRESSION_LEVELS`.
+    """
+    suffix = compression_suffix(pth)
+    if suffix is None:
+        with open_best(pth, mode) as f:
+            yield f
+        return
+
+    module = COMPRESSIONS[suffix]
+    if not is_module_available(module):
+        raise ImportError(f"Opening {pth} requires {module} installed.")
+    if compresslevel is None:
+        compresslevel = COMPRESSION_LEVELS[suffix]
+    raw_mode = mode.replace("t", "").replace("b", "") + "b"
+    # smart_open would compress by the suffix again.
+    with open_best(pth, raw_mode, compression="disable") as raw:
+        with _open_stream(module, raw, mode, compresslevel) as f:
+            yield f
+
+
+def _open_stream(module: str, raw, mode: str, level: int):
+    writing = "r" not in mode
+    if module == "zstandard":
+        import zstandard
+
+        cctx = zstandard.ZstdCompressor(level=level) if writing else None
+        return zstandard.open(raw, mode, cctx=cctx)
+    compressor = importlib.import_module(module)
+    if "b" not in mode and "t" not in mode:
+        mode += "t"
+    if not writing:
+        return compressor.open(raw, mode)
+    elif module == "lzma":
+        return compressor.open(raw, mode, preset=level)
+    return compressor.open(raw, mode, compresslevel=level)
+
+
+def open_best(pth, mode, transport_params: dict | None = None, **kwargs):
+    """Open `pth` with smart_open if available, else with `open`.
+
+    Args:
+        pth: Local path or URL.
+        mode (str): The file mode.
+        transport_params (dict | None, optional): smart_open transport parameters.
+            Defaults to those of `use_transport_params` or `set_transport_params`.
+        **kwargs: Passed to smart_open only, e.g. `compression`.
+    """
+    open_ = _smart_open()
+    if open_ is None:
         return open(pth, mode)
+    if transport_params is None:
+        transport_params = _SCOPED_TRANSPORT_PARAMS.get()
+        if transport_params is None:
+            transport_params = _TRANSPORT_PARAMS
+    if transport_params:
+        kwargs["transport_params"] = transport_params
+    return open_(pth, mode, **kwargs)
 
 
 def is_module_available(*modules: str) -> bool:
-    import importlib
+    import importlib.util
 
     return all(importlib.util.find_spec(m) is not None for m in modules)
@@ -1,7 +1,10 @@
 from builtins import Ellipsis
-from functools import lru_cache
+from enum import Enum
 from types import UnionType
-from typing import Any, Type, Union, get_args, get_origin
+from typing import Any, Callable, NamedTuple, Type, Union, get_args, get_origin
+
+from .arrays import is_ndarray, is_ndarray_type, ndarray_scalar_type
+from .packed import PackedTuple
 
 BASIC_TYPES = (int, float, bool, str)
 
@@ -14,6 +17,103 @@ class MissingType:
 Missing = MissingType()
 
 
+class AnnotationKind(Enum):
+    INT = int
+    FLOAT = float
+    BOOL = bool
+    STR = str
+    FLAT_TUPLE = tuple
+    ARRAY = "ndarray"
+    LAZY = "lazy"
+    OTHER = None
+
+
+class AnnotationInfo(NamedTuple):
+    """Classification of an annotation, computed once per annotation.
+
+    Attributes:
+        kind (AnnotationKind): Kind of the annotation with Optional stripped.
+        base (Type): The annotation with Optional stripped.
+        inner (Type | None): Element type of a flat tuple.
+        arity (int | None): Length of a flat tuple, -1 if it has an ellipsis.
+        nullable (bool): True if the annotation is exactly Optional[base].
+    """
+
+    kind: AnnotationKind
+    base: Any
+    inner: Any = None
+    arity: int | None = None
+    nullable: bool = False
+
+
+_ANNOTATIONS: dict[Any, AnnotationInfo] = dict()
+
+
+def get_annotation_info(typ: Type) -> AnnotationInfo:
+    """Get the cached classification of an annotation.
+
+    Unhashable annotations are classified on every call.
+
+    Args:
+        typ (Type): The annotation to classify.
+
+    Returns:
+        AnnotationInfo: The classification of `typ`.
+    """
+    try:
+        return _ANNOTATIONS[typ]
+    except KeyError:
+        info = _ANNOTATIONS[typ] = _get_annotation_info(typ)
+        return info
+    except TypeError:  # unhashable annotation
+        return _get_annotation_info(typ)
+
+
+def _get_annotation_info(typ: Type) -> AnnotationInfo:
+    if isinstance(typ, UnionType) or getattr(typ, "__origin__", None) is Union:
+        non_none_args = [a for a in get_args(typ) if a is not type(None)]
+        if len(non_none_args) == 1:
+            return _get_annotation_info(non_none_args[0])._replace(nullable=True)
+        return AnnotationInfo(AnnotationKind.OTHER, typ)
+
+    if typ in BASIC_TYPES:
+        return AnnotationInfo(AnnotationKind(typ), typ)
+
+    if _is_lazy_type(typ):
+        return AnnotationInfo(AnnotationKind.LAZY, typ)
+
+    if is_ndarray_type(typ):
+        return AnnotationInfo(AnnotationKind.ARRAY, typ)
+
+    args = get_args(typ)
+    if (
+        # Container is a tuple and contains inner annotation
+        get_origin(typ) == tuple
+        and args
+        # The inner annotation is a BasicType
+        and args[0] in BASIC_TYPES
+        # the follow-up annotations are of the same type, or a trailing Ellipsis
+        and (
+            all(subt == args[0] for subt in args)
+            or (len(args) == 2 and args[1] is Ellipsis)
+        )
+    ):
+        arity = -1 if Ellipsis in args else len(args)
+        return AnnotationInfo(AnnotationKind.FLAT_TUPLE, typ, args[0], arity)
+
+    return AnnotationInfo(AnnotationKind.OTHER, typ)
+
+
+def _is_lazy_type(typ: Type) -> bool:
+    from .lazy import Lazy
+
+    origin = getattr(typ, "__origin__", None)
+    if origin is None and isinstance(typ, type) and issubclass(typ, Lazy):
+        return True
+    else:
+        return origin == Lazy
+
+
 def _is_basic_type(typ: Type, basic_typ, value: Any | None = None) -> bool:
     assert basic_typ in BASIC_TYPES
     typ_ok = typ == basic_typ
@@ -62,17 +162,10 @@ def is_flat_tuple_type(typ: Type, value: Any | None = None) -> bool:
     Returns:
         bool: True if the type is a flat tuple type, False otherwise.
     """
-    args = get_args(typ)
-
-    if value is None:
-        return _is_flat_tuple_type(typ, args)
-    else:
-        return (
-            isinstance(value, tuple)
-            and _is_flat_tuple_type(typ, args)
-            and (len(args) == len(value) or Ellipsis in args)
-            and all(isinstance(item, args[0]) for item in value)
-        )
+    info = get_annotation_info(typ)
+    if info.kind is not AnnotationKind.FLAT_TUPLE or info.nullable:
+        return False
+    return value is None or compile_validator(typ)(value)  # type: ignore
 
 
 def is_optional_single_type(typ: Type, value: Any | None):
@@ -80,31 +173,13 @@ def is_optional_single_type(typ: Type, value: Any | None):
     Returns (True, T) if tp is exactly Optional[T], i.e., Union[T, None] with only one non-None type.
     Returns (False, tp) otherwise.
     """
-    if (
-        isinstance(typ, UnionType)  # e.g. int | None
-        or getattr(typ, "__origin__", None) is Union
-    ):
-        args = get_args(typ)
-        non_none_args = [a for a in args if a is not type(None)]
-        if len(non_none_args) == 1:
-            typ = non_none_args[0]
-            is_ok = True if value is None else isinstance(value, typ)
-            return is_ok, non_none_args[0]
+    info = get_annotation_info(typ)
+    if info.nullable:
+        is_ok = True if value is None else isinstance(value, info.base)
+        return is_ok, info.base
     return False, typ
 
 
-@lru_cache(maxsize=1)
-def _is_flat_tuple_type(typ: Type, args):
-    return (
-        # Container is a tuple and contains inner annotation
-        get_origin(typ) == tuple
-        # The inner annotation is a BasicType
-        and args[0] in BASIC_TYPES
-        # the follow-up annotations are of the same type, or an Ellipsis
-        and all(subt in (args[0], Ellipsis) for subt in args)
-    )
-
-
 def is_parsable_type(typ: Type, value: Any | None = None) -> bool:
     """Check if the given type is parsable.
 
@@ -115,11 +190,8 @@ def is_parsable_type(typ: Type, value: Any | None = None) -> bool:
     Returns:
         bool: True if the type is parsable, False otherwise.
     """
-    is_optional, inner_type = is_optional_single_type(typ, value)
-    if is_optional:
-        return is_parsable_type_single(inner_type, value)
-    else:
-        return is_parsable_type_single(typ, value)
+    validate = compile_validator(typ)
+    return validate is not None and (value is None or validate(value))
 
 
 def is_parsable_type_single(typ: Type, value: Any | None = None) -> bool:
@@ -132,17 +204,103 @@ def is_parsable_type_single(typ: Type, value: Any | None = None) -> bool:
     Returns:
         bool: True if the type is parsable, False otherwise.
     """
-    return any(
-        (
-            is_int_type(typ, value),
-            is_float_type(typ, value),
-            is_bool_type(typ, value),
-            is_str_type(typ, value),
-            is_flat_tuple_type(typ, value),
-        )
+    return (
+        is_int_type(typ, value)
+        or is_float_type(typ, value)
+        or is_bool_type(typ, value)
+        or is_str_type(typ, value)
+        or is_flat_tuple_type(typ, value)
     )
 
 
+Validator = Callable[[Any], bool]
+
+_VALIDATORS: dict[Any, Validator | None] = dict()
+
+
+def compile_validator(typ: Type) -> Validator | None:
+    """Compile an annotation into a single specialized value check.
+
+    The compiled validator is cached by annotation, so repeated checks of the
+    same annotation skip the type dispatch entirely.
+
+    Args:
+        typ (Type): The annotation to compile.
+
+    Returns:
+        Validator | None: A function returning True if a value matches `typ`,
+            or None if `typ` is not parsable.
+    """
+    try:
+        return _VALIDATORS[typ]
+    except KeyError:
+        validate = _VALIDATORS[typ] = _compile_validator(typ)
+        return validate
+    except TypeError:  # unhashable annotation
+        return _compile_validator(typ)
+
+
+def _compile_validator(typ: Type) -> Validator | None:
+    info = get_annotation_info(typ)
+    validate = _compile_single_validator(info)
+    if validate is None or not info.nullable:
+        return validate
+
+    def validate_optional(value) -> bool:
+        return value is None or validate(value)
+
+    return validate_optional
+
+
+def _compile_single_validator(info: AnnotationInfo) -> Validator | None:
+    if info.kind in _BASIC_KINDS:
+        typ = info.base
+
+        def validate_basic(value) -> bool:
+            return isinstance(value, typ)
+
+        return validate_basic
+
+    if info.kind is AnnotationKind.FLAT_TUPLE:
+        inner, length = info.inner, info.arity
+
+        def validate_tuple(value) -> bool:
+            if isinstance(value, PackedTuple):
+                return (length == -1 or len(value) == length) and issubclass(
+                    value.inner_type, inner
+                )
+            # Check the distinct element types instead of every element.
+            return (
+                isinstance(value, tuple)
+                and (length == -1 or len(value) == length)
+                and all(issubclass(t, inner) for t in set(map(type, value)))
+            )
+
+        return validate_tuple
+
+    if info.kind is AnnotationKind.ARRAY:
+        scalar = ndarray_scalar_type(info.base)
+        if scalar is None:
+            return is_ndarray
+
+        # The dtype of NDArray[np.float32] must be float32, of NDArray[np.floating]
+        # any float dtype.
+        def validate_array(value) -> bool:
+            return is_ndarray(value) and issubclass(value.dtype.type, scalar)
+
+        return validate_array
+
+    return None
+
+
+_BASIC_KINDS = (
+    AnnotationKind.INT,
+    AnnotationKind.FLOAT,
+    AnnotationKind.BOOL,
+    AnnotationKind.STR,
+)
+
+
 def get_flat_tuple_inner_type(typ: Type[tuple]) -> tuple[Type, int]:
     """
     Get the inner type and length of a flat tuple.
@@ -160,9 +318,13 @@ def get_flat_tuple_inner_type(typ: Type[tuple]) -> tuple[Type, int]:
         AssertionError: If the type is not a valid flat tuple type.
 
     """
+    info = get_annotation_info(typ)
+    if info.kind is AnnotationKind.FLAT_TUPLE and not info.nullable:
+        return info.inner, info.arity  # type: ignore
+
     args = get_args(typ)
     assert len(args) > 0, "Tuple type must have at least one argument."
-    basetype = get_args(typ)[0]
+    basetype = args[0]
     assert basetype in BASIC_TYPES or is_flat_tuple_type(basetype), (
         "The inner type must be one of the basic types: "
         f"{BASIC_TYPES} or a flat tuple type."
@@ -0,0 +1,95 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from parsonaut import Lazy, Parsable
+from parsonaut.arrays import is_ndarray_type
+from parsonaut.parse import ArgumentParser
+from parsonaut.typecheck import is_parsable_type
+
+np = pytest.importorskip("numpy")
+npt = pytest.importorskip("numpy.typing")
+
+
+class DummyArray(Parsable):
+    def __init__(
+        self,
+        table: np.ndarray = np.arange(10, dtype=np.float32),
+        priors: npt.NDArray[np.int64] | None = None,
+        name: str = "dummy",
+    ):
+        self.table = table
+        self.priors = priors
+
+
+def test_is_ndarray_type():
+    assert is_ndarray_type(np.ndarray)
+    assert is_ndarray_type(npt.NDArray[np.float32])
+    assert not is_ndarray_type(tuple[float, ...])
+
+    assert is_parsable_type(np.ndarray, np.zeros(3))
+    assert is_parsable_type(npt.NDArray[np.float32] | None, None)
+    assert not is_parsable_type(np.ndarray, (1.0, 2.0))
+    # the dtype of a parametrized annotation is checked
+    assert not is_parsable_type(npt.NDArray[np.float32], np.zeros(3, dtype=np.int64))
+    assert is_parsable_type(npt.NDArray[np.floating], np.zeros(3, dtype=np.float16))
+
+
+def test_sidecar_files_of_configs_in_the_same_directory(tmp_path):
+    yaml_config = DummyArray.as_lazy(priors=np.ones(5, dtype=np.int64))
+    json_config = DummyArray.as_lazy(priors=np.zeros(5, dtype=np.int64))
+    yaml_config.to_file(tmp_path / "config.yaml")
+    json_config.to_file(tmp_path / "config.json")
+    assert Lazy.from_file(tmp_path / "config.yaml") == yaml_config
+    assert Lazy.from_file(tmp_path / "config.json") == json_config
+
+
+def test_Lazy_with_arrays():
+    lzy = DummyArray.as_lazy(priors=np.ones(5, dtype=np.int64))
+    assert lzy == lzy.copy()
+    assert lzy != DummyArray.as_lazy(priors=np.zeros(5, dtype=np.int64))
+    assert lzy.to_eager().priors.sum() == 5
+
+
+@pytest.mark.parametrize("ext", ["json", "yaml"])
+def test_arrays_roundtrip_through_sidecar_files(ext):
+    lzy = DummyArray.as_lazy(priors=np.ones(5, dtype=np.int64))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / f"config.{ext}"
+        lzy.to_file(path)
+        assert (Path(tmpdir) / f"config.{ext}.table.npy").exists()
+        assert (Path(tmpdir) / f"config.{ext}.priors.npy").exists()
+        assert f"config.{ext}.table.npy" in path.read_text()
+
+        loaded = Lazy.from_file(path)
+        assert isinstance(loaded.table, np.memmap)
+        assert not loaded.table.flags.writeable
+        np.testing.assert_array_equal(loaded.table, lzy.table)
+        np.testing.assert_array_equal(loaded.priors, lzy.priors)
+        assert loaded == lzy
+        del loaded
+
+
+def test_arrays_from_cli():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "priors.npy"
+        np.save(path, np.arange(3))
+
+        parser = ArgumentParser()
+        parser.add_options(DummyArray.as_lazy())
+        args = parser.parse_args(["--priors", str(path)])
+        np.testing.assert_array_equal(args.priors, np.arange(3))
+        np.testing.assert_array_equal(args.table, DummyArray.as_lazy().table)
+        del args
+
+
+def test_arrays_roundtrip_inline_in_binary_files(tmp_path):
+    lzy = DummyArray.as_lazy(priors=np.ones((2, 3), dtype=np.int64))
+    lzy.to_file(tmp_path / "config.pnb")
+    assert [p.name for p in tmp_path.iterdir()] == ["config.pnb"]
+
+    loaded = Lazy.from_file(tmp_path / "config.pnb")
+    np.testing.assert_array_equal(loaded.table, lzy.table)
+    assert loaded.priors.shape == (2, 3)
+    assert loaded == lzy
@@ -0,0 +1,96 @@
+import pytest
+
+from parsonaut import Choices, Lazy, Parsable, Serializable
+from parsonaut.binary import decode, encode
+from parsonaut.packed import PACK_MIN_LENGTH, PackedTuple
+from parsonaut.typecheck import Missing
+
+
+class Encoder(Parsable):
+    def __init__(
+        self,
+        depth: int = 2,
+        scale: float = -0.5,
+        name: str | None = None,
+        dims: tuple[int, ...] = (1, -2, 2**40),
+        tags: tuple[str, ...] = ("a", "b"),
+        weights: tuple[float, ...] = tuple(map(float, range(PACK_MIN_LENGTH))),
+    ) -> None:
+        pass
+
+
+class Decoder(Parsable):
+    def __init__(self, width: int = 4, dropout: bool = True) -> None:
+        pass
+
+
+class Model(Choices):
+    enc = Encoder.as_lazy()
+    dec = Decoder.as_lazy()
+
+
+class Train(Parsable):
+    def __init__(
+        self,
+        model: Model = Model.enc,
+        head: Lazy[Decoder, ...] = Decoder.as_lazy(),
+        lr: float = 0.1,
+        name: str = "encoder",
+    ) -> None:
+        pass
+
+
+def test_encode_decode_values():
+    dct = {
+        "_class": "pkg.Cls",
+        "a": [None, True, False, Missing, 0, -1, 2**70, -(2**70), 1.5, "é"],
+        "b": {"c": (1, 2, 3), "d": (1.0, 2.5), "e": (), "f": (True, 1)},
+        "g": {"_class": "pkg.Cls", "a": "pkg.Cls"},
+    }
+    out = decode(encode(dct))
+    assert out == {
+        "_class": "pkg.Cls",
+        "a": (None, True, False, Missing, 0, -1, 2**70, -(2**70), 1.5, "é"),
+        "b": {"c": (1, 2, 3), "d": (1.0, 2.5), "e": (), "f": (True, 1)},
+        "g": {"_class": "pkg.Cls", "a": "pkg.Cls"},
+    }
+    assert type(out["b"]["c"][0]) is int
+
+    long = decode(encode({"x": tuple(range(PACK_MIN_LENGTH))}))["x"]
+    assert isinstance(long, PackedTuple) and long == tuple(range(PACK_MIN_LENGTH))
+
+
+def test_encode_interns_strings():
+    one = len(encode({"_class": "pkg.Cls", "name": "x"}))
+    nodes = {f"n{i}": {"_class": "pkg.Cls", "name": "x"} for i in range(10)}
+    many = len(encode(nodes))
+    assert many < 10 * one
+
+
+def test_decode_rejects_invalid_data():
+    with pytest.raises(ValueError):
+        decode(b"{}")
+    data = encode({"a": (1, "b")})
+    with pytest.raises(ValueError):
+        decode(data[:-1])
+    with pytest.raises(ValueError):
+        decode(data + b"\x00")
+    with pytest.raises(TypeError):
+        encode({"a": object()})
+
+
+def test_binary_roundtrip(tmp_path):
+    lzy = Train.as_lazy(model=Model.dec, lr=0.5)
+    lzy.to_file(tmp_path / "config.pnb")
+    assert Lazy.from_file(tmp_path / "config.pnb") == lzy
+    assert Train.from_file(tmp_path / "config.pnb") == lzy
+    assert Serializable.from_file(tmp_path / "config.pnb") == lzy
+
+    lzy = Train.as_lazy(model=Encoder.as_lazy(name="x", dims=(5,)))
+    lzy.to_file(tmp_path / "config.pnb")
+    loaded = Lazy.from_file(tmp_path / "config.pnb")
+    assert loaded == lzy
+    assert isinstance(loaded.model.signature["weights"][1], PackedTuple)
+    assert loaded.to_dict(with_class_tag_as_str=True) == lzy.to_dict(
+        with_class_tag_as_str=True
+    )
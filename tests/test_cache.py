@@ -0,0 +1,136 @@
+import importlib
+import sys
+import textwrap
+from functools import partial
+
+import pytest
+
+from parsonaut import Choices, Parsable
+from parsonaut.cache import CACHE_ENV, ParseCache, template_key
+from parsonaut.parse import ArgumentParser
+
+
+class Inner(Parsable):
+    def __init__(self, a: str, b: int = 1) -> None:
+        pass
+
+
+class Inner2(Parsable):
+    def __init__(self, aa: str = "y", bb: tuple[float, ...] = (0.5,)) -> None:
+        pass
+
+
+class Choice(Choices):
+    I1 = Inner.as_lazy()
+    I2 = Inner2.as_lazy()
+
+
+class Outer2(Parsable):
+    def __init__(self, c: Choice = Choice.I1, d: str = "hello") -> None:
+        pass
+
+
+def test_ParseCache_hit_skips_parser_construction(tmp_path):
+    parser = ArgumentParser(cache_dir=tmp_path)
+    parser.add_options(Outer2.as_lazy())
+    args = parser.parse_args(["--c", "I2", "--c.aa", "x"])
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    parser = ArgumentParser(cache_dir=tmp_path)
+    parser.add_options(Outer2.as_lazy())
+    cached = parser.parse_args(["--c", "I2", "--c.aa", "x"])
+    assert cached == args == Outer2.as_lazy(c=Inner2.as_lazy(aa="x"))
+    assert cached.c.bb == (0.5,)
+    # Nothing was registered or built.
+    assert set(parser.args) == {"--help"}
+    assert not parser._parsers
+
+
+def test_ParseCache_keys_on_argv_and_template(tmp_path):
+    def parse(lzy, argv):
+        parser = ArgumentParser(cache_dir=tmp_path)
+        parser.add_options(lzy, dest="model")
+        parser.add_argument("--steps", type=int, default=1)
+        parser.add_argument("--shape", nargs="+", type=int, default=(1, 2))
+        return parser.parse_args(argv)
+
+    assert parse(Inner.as_lazy(), ["--model.a", "x"]).model == Inner.as_lazy(a="x")
+    args = parse(Inner.as_lazy(b=2), ["--model.a", "x", "--steps", "3"])
+    assert args.model == Inner.as_lazy(a="x", b=2)
+    assert args.steps == 3
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+    args = parse(Inner.as_lazy(b=2), ["--model.a", "x", "--steps", "3"])
+    assert args.model == Inner.as_lazy(a="x", b=2)
+    assert args.steps == 3
+    assert args.shape == (1, 2)
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_ParseCache_invalidated_by_source_change(tmp_path, monkeypatch):
+    module = tmp_path / "cached_model.py"
+    source = """
+        from parsonaut import Parsable
+
+        class Model(Parsable):
+            def __init__(self, a: int = {}) -> None:
+                pass
+    """
+    module.write_text(textwrap.dedent(source.format(1)))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "cached_model", raising=False)
+
+    def parse():
+        parser = ArgumentParser(cache_dir=tmp_path / "cache")
+        parser.add_options(importlib.import_module("cached_model").Model.as_lazy())
+        return parser.parse_args([])
+
+    assert parse().a == 1
+    assert parse().a == 1
+
+    module.write_text(textwrap.dedent(source.format(22)))
+    del sys.modules["cached_model"]
+    assert parse().a == 22
+
+
+def test_ParseCache_skips_local_classes(tmp_path):
+    class Local(Parsable):
+        def __init__(self, a: int = 1) -> None:
+            pass
+
+    parser = ArgumentParser(cache_dir=tmp_path)
+    parser.add_options(Local.as_lazy())
+    assert parser.parse_args(["--a", "2"]) == Local.as_lazy(a=2)
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_template_key_does_not_force_signatures():
+    lzy = Outer2.as_lazy(d="x")
+    key = template_key(lzy)
+    assert isinstance(object.__getattribute__(lzy, "_signature"), partial)
+    assert key == template_key(Outer2.as_lazy(d="x"))
+    assert key != template_key(Outer2.as_lazy(d="y"))
+    assert template_key(Choice.I1) != template_key(Choice.I2)
+
+
+def test_Parsable_parse_args_cache_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_ENV, str(tmp_path))
+    monkeypatch.setattr(sys, "argv", ["prog", "--c", "I2", "--c.aa", "x"])
+    assert ParseCache.from_env().directory == tmp_path
+    assert Outer2.parse_args() == Outer2.as_lazy(c=Inner2.as_lazy(aa="x"))
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    monkeypatch.delenv(CACHE_ENV)
+    assert ParseCache.from_env() is None
+
+
+def test_ParseCache_ignores_corrupt_entries(tmp_path):
+    cache = ParseCache(tmp_path)
+    key = cache.key(["--a"], [])
+    (tmp_path / f"{key}.json").write_text("{")
+    assert cache.load(key) is None
+    assert not cache.store(key, object(), [])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,133 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from parsonaut import Choices, Lazy, Parsable
+from parsonaut.completion import (
+    complete,
+    completion_index,
+    completion_script,
+    write_completion,
+)
+
+
+class Adam(Parsable):
+    def __init__(self, lr: float = 0.1, amsgrad: bool = False) -> None:
+        pass
+
+
+class SGD(Parsable):
+    def __init__(self, lr: float = 0.1, momentum: float = 0.9) -> None:
+        pass
+
+
+class Optimizer(Choices):
+    adam = Adam.as_lazy()
+    sgd = SGD.as_lazy()
+
+
+class Encoder(Parsable):
+    def __init__(self, depth: int = 2, opt: Optimizer = Optimizer.adam) -> None:
+        pass
+
+
+class Decoder(Parsable):
+    def __init__(self, width: int = 2) -> None:
+        pass
+
+
+class Model(Choices):
+    enc = Encoder.as_lazy()
+    dec = Decoder.as_lazy()
+
+
+class Train(Parsable):
+    def __init__(
+        self,
+        model: Model = Model.enc,
+        head: Lazy[Decoder, ...] = Decoder.as_lazy(),
+        name: str = "run",
+    ) -> None:
+        pass
+
+
+def test_completion_index_groups_options_by_choice():
+    index = completion_index(Train.as_lazy(), "train.py")
+    assert index["choices"] == [["--model", "enc"], ["--model.opt", "adam"]]
+
+    groups = {
+        tuple(map(tuple, cond)): [flag for flag, _ in group]
+        for cond, group in index["groups"]
+    }
+    assert groups[()] == ["--help", "--head.width", "--model", "--name"]
+    assert groups[((0, "enc"),)] == ["--model.depth", "--model.opt"]
+    assert groups[((0, "dec"),)] == ["--model.width"]
+    assert groups[((0, "enc"), (1, "adam"))] == [
+        "--model.opt.amsgrad",
+        "--model.opt.lr",
+    ]
+    json.dumps(index)
+
+
+@pytest.mark.parametrize(
+    ("words", "expected"),
+    [
+        (
+            ["--model."],
+            ["--model.depth", "--model.opt", "--model.opt.amsgrad", "--model.opt.lr"],
+        ),
+        (["--model", "dec", "--model."], ["--model.width"]),
+        (["--model=dec", "--model."], ["--model.width"]),
+        (
+            ["--model.opt", "sgd", "--model.opt."],
+            ["--model.opt.lr", "--model.opt.momentum"],
+        ),
+        (["--model", ""], ["enc", "dec"]),
+        (["--model.opt.amsgrad", "t"], ["true"]),
+        (["--model=d"], ["--model=dec"]),
+        (["--na"], ["--name"]),
+    ],
+)
+def test_complete(words, expected):
+    index = completion_index(Train.as_lazy(), "train.py")
+    assert complete(index, words) == expected
+
+
+def test_write_completion_index(tmp_path):
+    write_completion(Train.as_lazy(), tmp_path / "train.json", "train.py", index=True)
+    with open(tmp_path / "train.json") as f:
+        assert json.load(f) == completion_index(Train.as_lazy(), "train.py")
+
+
+@pytest.mark.skipif(shutil.which("bash") is None, reason="bash is not available")
+@pytest.mark.parametrize(
+    "words",
+    [
+        ["--model."],
+        ["--model", "dec", "--model."],
+        ["--model.opt", "sgd", "--model.opt."],
+        ["--model", ""],
+        ["--model.opt.amsgrad", "t"],
+        ["--na"],
+    ],
+)
+def test_completion_script_matches_index(tmp_path, words):
+    index = completion_index(Train.as_lazy(), "train.py")
+    script = tmp_path / "train.bash"
+    script.write_text(completion_script(index))
+
+    comp_words = " ".join(f"'{w}'" for w in ["train.py", *words])
+    out = subprocess.run(
+        [
+            "bash",
+            "-c",
+            f"source {script}; COMP_WORDS=({comp_words}); COMP_CWORD={len(words)}; "
+            '_parsonaut_train_py; printf "%s\\n" "${COMPREPLY[@]}"',
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    assert out == complete(index, words)
@@ -0,0 +1,137 @@
+import json
+import sys
+
+import pytest
+
+from parsonaut import ArgumentParser, Choices, Parsable
+from parsonaut.distributed import broadcast_lazy, parse_args_distributed
+
+
+class Encoder(Parsable):
+    def __init__(self, depth: int = 2, dims: tuple[int, ...] = (1, 2)) -> None:
+        pass
+
+
+class Decoder(Parsable):
+    def __init__(self, width: int = 4) -> None:
+        pass
+
+
+class Model(Choices):
+    enc = Encoder.as_lazy()
+    dec = Decoder.as_lazy()
+
+
+class Train(Parsable):
+    def __init__(self, model: Model = Model.enc, lr: float = 0.1) -> None:
+        pass
+
+
+def test_parse_args_distributed_without_process_group(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["prog", "--model", "dec", "--lr", "0.5"])
+    expected = Train.as_lazy(model=Decoder.as_lazy(), lr=0.5)
+    assert parse_args_distributed(Train) == expected
+
+    monkeypatch.setattr(sys, "argv", ["prog", "--train.model=dec", "--train.lr=0.5"])
+    parser = ArgumentParser()
+    parser.add_options(Train.as_lazy(), dest="train")
+    assert parse_args_distributed(parser).train == expected
+    # Arguments are passed on to the parser.
+    argv = ["--train.model=enc", "--train.lr=0.5"]
+    assert parse_args_distributed(parser, argv).train == Train.as_lazy(lr=0.5)
+    assert broadcast_lazy(expected) is expected
+
+
+def _run(rank, world_size, init_file, out_dir):
+    import torch.distributed as dist
+
+    dist.init_process_group(
+        "gloo", init_method=f"file://{init_file}", rank=rank, world_size=world_size
+    )
+    # Only rank 0 may read the command line.
+    sys.argv = ["prog", "--model.dims", "3", "4", "--lr", "0.5"] if rank == 0 else []
+    lzy = parse_args_distributed(Train)
+    with open(f"{out_dir}/{rank}.json", "w") as f:
+        json.dump(lzy.to_dict(with_class_tag_as_str=True, flatten=True), f)
+    dist.destroy_process_group()
+
+
+def test_parse_args_distributed_gloo(tmp_path):
+    mp = pytest.importorskip("torch.multiprocessing")
+
+    world_size = 2
+    mp.spawn(
+        _run,
+        args=(world_size, tmp_path / "init", tmp_path),
+        nprocs=world_size,
+        join=True,
+    )
+    expected = Train.as_lazy(model=Encoder.as_lazy(dims=(3, 4)), lr=0.5)
+    for rank in range(world_size):
+        with open(tmp_path / f"{rank}.json") as f:
+            assert Train.from_dict(json.load(f)) == expected
+
+
+class FakeDist:
+    """One rank of a process group, `received` is what rank `src` broadcasts."""
+
+    def __init__(self, rank, received=None):
+        self.rank = rank
+        self.received = received
+        self.sent = list()
+
+    def get_rank(self):
+        return self.rank
+
+    def broadcast_object_list(self, objects, src=0, group=None):
+        if self.rank == src:
+            self.sent.append(list(objects))
+        else:
+            objects[:] = self.received
+
+
+def test_parse_args_distributed_releases_ranks_on_errors(monkeypatch):
+    class Local(Parsable):
+        def __init__(self, a: int = 1) -> None:
+            pass
+
+    # local classes cannot be broadcast by name
+    parser = ArgumentParser()
+    parser.add_options(Local.as_lazy())
+    monkeypatch.setattr(sys, "argv", ["prog"])
+    dist = FakeDist(rank=0)
+    monkeypatch.setattr("parsonaut.distributed._dist", lambda: dist)
+    with pytest.raises(TypeError):
+        parse_args_distributed(parser)
+    ((status, value),) = dist.sent[0]
+    assert status == "error"
+
+    monkeypatch.setattr(
+        "parsonaut.distributed._dist", lambda: FakeDist(1, [(status, value)])
+    )
+    with pytest.raises(RuntimeError, match="TypeError"):
+        parse_args_distributed(parser)
+
+    # an invalid choice is an AssertionError on the source rank
+    monkeypatch.setattr(sys, "argv", ["prog", "--model", "bad"])
+    dist = FakeDist(rank=0)
+    monkeypatch.setattr("parsonaut.distributed._dist", lambda: dist)
+    with pytest.raises(AssertionError):
+        parse_args_distributed(Train)
+    monkeypatch.setattr(
+        "parsonaut.distributed._dist", lambda: FakeDist(1, dist.sent[0])
+    )
+    with pytest.raises(RuntimeError, match="invalid choice"):
+        parse_args_distributed(Train)
+
+    monkeypatch.setattr(sys, "argv", ["prog", "--lr", "fast"])
+    dist = FakeDist(rank=0)
+    monkeypatch.setattr("parsonaut.distributed._dist", lambda: dist)
+    with pytest.raises(SystemExit):
+        parse_args_distributed(Train)
+    monkeypatch.setattr(
+        "parsonaut.distributed._dist", lambda: FakeDist(1, dist.sent[0])
+    )
+    with pytest.raises(SystemExit) as e:
+        parse_args_distributed(Train)
+    assert e.value.code == 2
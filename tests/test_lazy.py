@@ -1,3 +1,4 @@
+import io
 from dataclasses import dataclass
 from functools import partial
 
@@ -10,6 +11,7 @@ from parsonaut.lazy import (
     MissingType,
     flatten_dict,
     get_signature,
+    lazy_str,
     set_typecheck_eager,
     should_typecheck_eagerly,
     typecheck_eager,
@@ -558,3 +560,68 @@ def test_Lazy_frozen():
 def test_Lazy__getattr__():
     x = DummyNested.as_lazy(c=0.0)
     assert x.c == 0.0
+
+
+def test_Lazy__str__is_cached():
+    x = DummyNested.as_lazy()
+    assert str(x) is str(x)
+    assert str(x) == lazy_str(x.to_dict(with_class_tag=True))
+
+
+def test_Lazy_write_matches__str__():
+    x = DummyNested.as_lazy(b=DummyFlat.as_lazy(b="hello"))
+    f = io.StringIO()
+    x.write(f)
+    assert f.getvalue() == str(x)
+
+    # cached child renderings are reused
+    y = DummyNested.as_lazy()
+    str(y.b)
+    f = io.StringIO()
+    y.write(f)
+    assert f.getvalue() == str(y)
+
+
+def test_Lazy__str__keeps_newlines_in_strings():
+    x = DummyNested.as_lazy(a="x\ny", b=DummyFlat.as_lazy(b="u\nv"))
+    assert str(x) == (
+        "DummyNested(\n    a='x\ny',\n    b=DummyFlat(\n        b='u\nv',\n"
+        "        c=3.14,\n    ),\n    c=3.14,\n)"
+    )
+    assert str(x) == lazy_str(x.to_dict(with_class_tag=True))
+
+    # also when the cached rendering of the child is reused
+    f = io.StringIO()
+    x.write(f)
+    assert f.getvalue() == str(x)
+
+
+def test_Lazy_write_truncates():
+    class DummyTuple(Parsable):
+        def __init__(self, a: tuple[int, ...] = (1, 2, 3, 4)):
+            pass
+
+    class DummyDeep(Parsable):
+        def __init__(self, a: Lazy[DummyTuple, ...], b: Lazy[DummyNested, ...]):
+            pass
+
+    f = io.StringIO()
+    DummyDeep.as_lazy().write(f, max_depth=1, max_length=2)
+    assert f.getvalue() == (
+        "DummyDeep(\n" "    a=DummyTuple(...),\n" "    b=DummyNested(...),\n" ")"
+    )
+
+    f = io.StringIO()
+    DummyDeep.as_lazy().write(f, max_depth=2, max_length=2)
+    assert f.getvalue() == (
+        "DummyDeep(\n"
+        "    a=DummyTuple(\n"
+        "        a=(1, 2, ...<2 more>),\n"
+        "    ),\n"
+        "    b=DummyNested(\n"
+        "        a=???,\n"
+        "        b=DummyFlat(...),\n"
+        "        c=3.14,\n"
+        "    ),\n"
+        ")"
+    )
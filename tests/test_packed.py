@@ -0,0 +1,136 @@
+import json
+import pickle
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from parsonaut import Lazy, Parsable
+from parsonaut.packed import PACK_MIN_LENGTH, PackedTuple, load_tuple, maybe_pack
+from parsonaut.typecheck import compile_validator, is_flat_tuple_type
+
+N = PACK_MIN_LENGTH
+
+
+class DummyWeights(Parsable):
+    def __init__(
+        self,
+        weights: tuple[float, ...] = tuple(float(i) for i in range(N)),
+        ids: tuple[int, ...] = tuple(range(N)),
+        short: tuple[float, ...] = (1.0, 2.0),
+    ):
+        self.weights = weights
+        self.ids = ids
+        self.short = short
+
+
+def test_maybe_pack():
+    assert isinstance(maybe_pack(tuple(range(N)), int), PackedTuple)
+    assert isinstance(maybe_pack(tuple(map(float, range(N))), float), PackedTuple)
+
+    # short, mixed, bool and huge values stay tuples
+    assert isinstance(maybe_pack(tuple(range(N - 1)), int), tuple)
+    assert isinstance(maybe_pack((1.0,) * (N - 1) + (1,), float), tuple)
+    assert isinstance(maybe_pack((True,) * N, int), tuple)
+    assert isinstance(maybe_pack((2**64,) * N, int), tuple)
+    assert isinstance(maybe_pack(("a",) * N, str), tuple)
+
+
+def test_PackedTuple_behaves_like_tuple():
+    value = tuple(float(i) for i in range(N))
+    packed = maybe_pack(value, float)
+
+    assert packed == value
+    assert len(packed) == N
+    assert packed[3] == 3.0
+    assert packed[-1] == N - 1
+    assert packed[:3] == (0.0, 1.0, 2.0)
+    assert tuple(packed) == value
+    assert 5.0 in packed
+    assert packed.index(7.0) == 7
+    assert repr(packed) == repr(value)
+    assert hash(packed) == hash(maybe_pack(value, float)) == hash(value)
+    assert len({packed, value}) == 1
+    assert {value: 1}[packed] == 1
+    assert packed != maybe_pack(tuple(range(N)), int)
+    assert pickle.loads(pickle.dumps(packed)) == packed
+
+
+def test_PackedTuple_validation():
+    packed = maybe_pack(tuple(range(N)), int)
+    assert is_flat_tuple_type(tuple[int, ...], packed)
+    assert not is_flat_tuple_type(tuple[float, ...], packed)
+    assert not is_flat_tuple_type(tuple[int, int], packed)
+    assert compile_validator(tuple[int, ...] | None)(packed)
+
+
+def test_Lazy_packs_long_numeric_tuples():
+    lzy = DummyWeights.as_lazy()
+    assert isinstance(lzy.signature["weights"][1], PackedTuple)
+    assert isinstance(lzy.signature["ids"][1], PackedTuple)
+    assert isinstance(lzy.short, tuple)
+    # attributes are plain tuples
+    assert type(lzy.weights) is tuple and lzy.weights + (1.0,) == lzy.weights + (1.0,)
+
+    assert lzy == lzy.copy()
+    assert lzy.copy().signature["weights"][1] is lzy.signature["weights"][1]
+    assert lzy != DummyWeights.as_lazy(ids=tuple(range(1, N + 1)))
+
+    obj = lzy.to_eager()
+    assert obj.weights[10] == 10.0
+    assert type(obj.weights) is tuple and type(obj.ids) is tuple
+    assert obj.weights == lzy.weights
+
+
+@pytest.mark.parametrize("ext", ["json", "yaml", "pnb"])
+def test_Lazy_with_packed_tuples_roundtrip(ext):
+    lzy = DummyWeights.as_lazy(short=(3.0,))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / f"config.{ext}"
+        lzy.to_file(path)
+        loaded = Lazy.from_file(path)
+
+    assert loaded == lzy
+    assert isinstance(loaded.signature["weights"][1], PackedTuple)
+    assert loaded.short == (3.0,)
+
+
+def test_load_tuple_text_formats(tmp_path):
+    (tmp_path / "ids.json").write_text(json.dumps(list(range(N))))
+    ids = load_tuple(tmp_path / "ids.json", int)
+    assert isinstance(ids, PackedTuple) and ids == tuple(range(N))
+
+    (tmp_path / "short.json").write_text("[1, 2.5]")
+    assert load_tuple(tmp_path / "short.json", float, 2) == (1.0, 2.5)
+
+    (tmp_path / "w.txt").write_text("1.5 2\n3\n")
+    assert load_tuple(tmp_path / "w.txt", float) == (1.5, 2.0, 3.0)
+
+    (tmp_path / "names.txt").write_text("a b\nc\n")
+    assert load_tuple(tmp_path / "names.txt", str) == ("a b", "c")
+
+    with pytest.raises(ValueError):
+        load_tuple(tmp_path / "short.json", int)
+    with pytest.raises(ValueError):
+        load_tuple(tmp_path / "short.json", float, 3)
+    with pytest.raises(ValueError):
+        load_tuple(tmp_path / "names.txt", int)
+    with pytest.raises(ValueError):
+        load_tuple(tmp_path / "ids.csv", int)
+
+
+def test_load_tuple_npy(tmp_path):
+    np = pytest.importorskip("numpy")
+    np.save(tmp_path / "w.npy", np.arange(N, dtype=np.float32))
+    weights = load_tuple(tmp_path / "w.npy", float)
+    assert isinstance(weights, PackedTuple)
+    assert weights == tuple(float(i) for i in range(N))
+
+    np.save(tmp_path / "ids.npy", np.arange(3, dtype=np.uint8))
+    assert load_tuple(tmp_path / "ids.npy", int, 3) == (0, 1, 2)
+
+    with pytest.raises(ValueError):
+        load_tuple(tmp_path / "w.npy", int)
+    with pytest.raises(ValueError):
+        np.save(tmp_path / "m.npy", np.zeros((2, 2)))
+        load_tuple(tmp_path / "m.npy", float)
@@ -2,7 +2,14 @@ import pytest
 
 from parsonaut import Choices, Lazy, Parsable
 from parsonaut.lazy import Missing
-from parsonaut.parse import BOOL_FALSE_FLAGS, BOOL_TRUE_FLAGS, ArgumentParser, str2bool
+from parsonaut.parse import (
+    BOOL_FALSE_FLAGS,
+    BOOL_TRUE_FLAGS,
+    ENGINES,
+    ArgumentParser,
+    str2bool,
+)
+from parsonaut.serialization import register_class
 
 
 @pytest.mark.parametrize(
@@ -164,3 +171,484 @@ def test_ArgumentParser_choices():
     assert args == Outer2.as_lazy(
         c=Inner2.as_lazy(aa="something"),
     )
+
+
+def test_ArgumentParser_parses_repeatedly():
+    parser = ArgumentParser()
+    parser.add_options(Outer2.as_lazy())
+
+    args = parser.parse_args(["--c", "I2", "--c.aa", "something"])
+    assert args == Outer2.as_lazy(c=Inner2.as_lazy(aa="something"))
+
+    # the other branch is still available
+    args = parser.parse_args(["--c", "I1", "--c.a", "x"])
+    assert args == Outer2.as_lazy(c=Inner.as_lazy(a="x"))
+
+    args = parser.parse_args(["--d", "there"])
+    assert args == Outer2.as_lazy(d="there")
+
+
+def test_ArgumentParser_parse_many():
+    parser = ArgumentParser()
+    parser.add_options(Outer2.as_lazy())
+
+    results = parser.parse_many(
+        [
+            ["--c", "I2", "--c.aa", "x"],
+            ["--c", "I2", "--c.aa", "y"],
+            ["--c.b", "3"],
+        ]
+    )
+    assert results == [
+        Outer2.as_lazy(c=Inner2.as_lazy(aa="x")),
+        Outer2.as_lazy(c=Inner2.as_lazy(aa="y")),
+        Outer2.as_lazy(c=Inner.as_lazy(b=3)),
+    ]
+    # one parser per selection of choices
+    assert len(parser._parsers) == 2
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_ArgumentParser_argparse_groups_and_defaults(engine, capsys):
+    parser = ArgumentParser(prog="prog", engine=engine)
+    parser.add_argument_group("g").add_argument("--y", type=int)
+    parser.set_defaults(z=5)
+    assert vars(parser.parse_args(["--y", "3"])) == dict(y=3, z=5)
+
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--a", action="store_true")
+    group.add_argument("--b", action="store_true")
+    assert vars(parser.parse_args(["--a"])) == dict(y=None, z=5, a=True, b=False)
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--a", "--b"])
+    assert "not allowed with argument" in capsys.readouterr().err
+
+    subparsers = parser.add_subparsers(dest="cmd")
+    subparsers.add_parser("run").add_argument("--n", type=int)
+    args = parser.parse_args(["run", "--n", "2"])
+    assert (args.cmd, args.n, args.z) == ("run", 2, 5)
+    assert "--y" in parser.format_help()
+
+
+def test_ArgumentParser_help_shows_default_choice():
+    parser = ArgumentParser(prog="prog")
+    parser.add_options(Outer2.as_lazy())
+
+    text = parser.format_help()
+    assert text.startswith("usage: prog")
+    assert "--c.a" in text
+    assert "--c.aa" not in text
+
+
+class NestedChoice(Choices):
+    O1 = Outer2.as_lazy()
+    O2 = Outer.as_lazy()
+
+
+class Outer3(Parsable):
+    def __init__(self, e: NestedChoice = NestedChoice.O1, f: int = 0) -> None:
+        pass
+
+
+def test_ArgumentParser_nested_choices():
+    parser = ArgumentParser()
+    parser.add_options(Outer3.as_lazy())
+
+    assert parser.parse_args([]) == Outer3.as_lazy()
+    assert parser.parse_args(["--e.c", "I2", "--e.c.aa", "x"]) == Outer3.as_lazy(
+        e=Outer2.as_lazy(c=Inner2.as_lazy(aa="x"))
+    )
+    assert parser.parse_args(["--e=O2", "--e.c.a", "x"]) == Outer3.as_lazy(
+        e=Outer.as_lazy(c=Inner.as_lazy(a="x"))
+    )
+
+    with pytest.raises(AssertionError):
+        parser.parse_args(["--e", "O3"])
+
+
+def test_ArgumentParser_multiple_roots():
+    parser = ArgumentParser()
+    parser.add_options(Outer2.as_lazy(), dest="outer")
+    parser.add_options(Inner.as_lazy(), dest="inner")
+    parser.add_argument("--outer_name", type=str, default="x")
+
+    args = parser.parse_args(["--outer.c", "I2", "--inner.a", "y"])
+    assert args.outer == Outer2.as_lazy(c=Inner2.as_lazy())
+    assert args.inner == Inner.as_lazy(a="y")
+    assert args.outer_name == "x"
+
+
+def test_ArgumentParser_expands_only_selected_choices():
+    class LazyChoice(Choices):
+        I1 = Inner.as_lazy()
+        I2 = Inner2.as_lazy()
+
+    class Outer4(Parsable):
+        def __init__(self, c: LazyChoice = LazyChoice.I1) -> None:
+            pass
+
+    parser = ArgumentParser()
+    parser.add_options(Outer4.as_lazy())
+    assert "--c.[I1].a" not in parser.args
+    assert "--c.[I2].aa" not in parser.args
+
+    args = parser.parse_args(["--c", "I2", "--c.aa", "x"])
+    assert args == Outer4.as_lazy(c=Inner2.as_lazy(aa="x"))
+    assert "--c.[I2].aa" in parser.args
+    assert "--c.[I1].a" not in parser.args
+
+
+class Wide(Parsable):
+    def __init__(
+        self,
+        a: int = 1,
+        b: float = 0.5,
+        c: str = "hello",
+        d: bool = False,
+        e: tuple[int, ...] = (1, 2),
+        f: tuple[float, float] = (1.0, 2.0),
+        g: int | None = None,
+        h: Lazy[Outer2, ...] = Outer2.as_lazy(),
+    ) -> None:
+        pass
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        [],
+        ["--a", "3", "--b", "-1.5", "--c", "x y"],
+        ["--a=-3", "--d", "yes", "--g", "7"],
+        ["--e", "5", "6", "7", "--f", "3", "4"],
+        ["--e", "--a", "2"],
+        ["--h.c", "I2", "--h.c.aa", "x", "--h.c.bb", "2"],
+        ["--h.c=I1", "--h.c.a", "x", "--h.d", "there"],
+    ],
+)
+def test_ArgumentParser_native_engine_matches_argparse(argv):
+    parser = ArgumentParser()
+    parser.add_options(Wide.as_lazy())
+    native = ArgumentParser(engine="native")
+    native.add_options(Wide.as_lazy())
+
+    assert native.parse_args(argv) == parser.parse_args(argv)
+    # parsed without argparse
+    assert native._get_table(*native._select(argv)).parse(argv) is not None
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--a", "x"],
+        ["--a"],
+        ["--f", "1"],
+        ["--d", "maybe"],
+        ["--h.c", "I3"],
+        ["--unknown", "1"],
+        ["positional"],
+    ],
+)
+def test_ArgumentParser_native_engine_errors_through_argparse(argv):
+    parser = ArgumentParser(engine="native")
+    parser.add_options(Wide.as_lazy())
+
+    with pytest.raises((SystemExit, AssertionError)):
+        parser.parse_args(argv)
+
+
+def test_ArgumentParser_native_engine_help(capsys):
+    parser = ArgumentParser(prog="prog", engine="native")
+    parser.add_options(Wide.as_lazy())
+
+    with pytest.raises(SystemExit):
+        parser.parse_args(["-h"])
+    assert "--h.c.a" in capsys.readouterr().out
+
+
+def test_ArgumentParser_native_engine_falls_back_for_custom_actions():
+    parser = ArgumentParser(engine="native")
+    parser.add_argument("--flag", action="store_true")
+    parser.add_argument("--name", type=str, default="x")
+
+    args = parser.parse_args(["--flag"])
+    assert args.flag is True
+    assert args.name == "x"
+
+
+def test_ArgumentParser_scoped_help(capsys):
+    parser = ArgumentParser(prog="prog")
+    parser.add_options(Wide.as_lazy())
+
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--help", "h.c"])
+    out = capsys.readouterr().out
+    assert "--h.c.a" in out
+    assert "--h.d" not in out
+    assert "--a" not in out
+    assert "selected I1, other choices: I2" in out
+
+    # the selected choice is shown
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--h.c", "I2", "-h", "h.c"])
+    out = capsys.readouterr().out
+    assert "--h.c.aa" in out
+    assert "--h.c.a " not in out
+
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--help=nothing"])
+    assert "no options under 'nothing'" in capsys.readouterr().err
+
+    # A token after the flag that is not an option prefix shows the full help.
+    for args in (["--help", "nothing"], ["-h", "h.c.a.b"], ["-h", "h.c.a_"]):
+        with pytest.raises(SystemExit):
+            parser.parse_args(args)
+        out = capsys.readouterr().out
+        assert "--a" in out and "--h.d" in out
+
+
+def test_ArgumentParser_help_summarizes_large_configs():
+    parser = ArgumentParser(prog="prog", help_max_options=3)
+    parser.add_options(Wide.as_lazy())
+
+    text = parser.format_help()
+    assert "--a int" in text
+    assert "--h.c.a" not in text
+    assert "--h.*" in text
+    assert "4 options, show them with --help h" in text
+
+    text = parser.format_help(scope="h")
+    assert "--h.d" in text
+    assert "--h.c.*" in text
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_ArgumentParser_parse_sweep_product(engine):
+    parser = ArgumentParser(engine=engine)
+    parser.add_options(Wide.as_lazy())
+
+    configs = parser.parse_sweep(
+        ["--b", "0.1,0.2", "--a=-1:5:3", "--c", "x", "--e", "1", "2"]
+    )
+    assert not isinstance(configs, list)
+    assert list(configs) == [
+        Wide.as_lazy(a=a, b=b, c="x", e=(1, 2)) for b in (0.1, 0.2) for a in (-1, 2)
+    ]
+
+
+def test_ArgumentParser_parse_sweep_zip():
+    parser = ArgumentParser()
+    parser.add_options(Wide.as_lazy())
+
+    configs = parser.parse_sweep(["--a", "1,2,3", "--g", "4:7"], mode="zip")
+    assert list(configs) == [Wide.as_lazy(a=a, g=a + 3) for a in (1, 2, 3)]
+
+    with pytest.raises(SystemExit):
+        parser.parse_sweep(["--a", "1,2", "--g", "4:7"], mode="zip")
+
+
+class SweepChoice(Choices):
+    I1 = Inner.as_lazy(a="x")
+    I2 = Inner2.as_lazy(aa="y")
+
+
+class Outer5(Parsable):
+    def __init__(self, c: SweepChoice = SweepChoice.I1, d: str = "hello") -> None:
+        pass
+
+
+def test_ArgumentParser_parse_sweep_choices():
+    parser = ArgumentParser()
+    parser.add_options(Outer5.as_lazy(), dest="model")
+    parser.add_argument("--steps", type=int, default=1)
+
+    results = parser.parse_sweep(
+        ["--model.c", "I1,I2", "--model.d", "a", "--steps", "1,2"]
+    )
+    assert [(r.model, r.steps) for r in results] == [
+        (Outer5.as_lazy(c=Inner.as_lazy(a="x"), d="a"), 1),
+        (Outer5.as_lazy(c=Inner.as_lazy(a="x"), d="a"), 2),
+        (Outer5.as_lazy(c=Inner2.as_lazy(aa="y"), d="a"), 1),
+        (Outer5.as_lazy(c=Inner2.as_lazy(aa="y"), d="a"), 2),
+    ]
+
+
+def test_ArgumentParser_parse_sweep_converts_values_once():
+    calls = list()
+
+    def count(value):
+        calls.append(value)
+        return int(value)
+
+    parser = ArgumentParser()
+    parser.add_argument("--a", type=count, default=0)
+    parser.add_argument("--b", type=count, default=0)
+    parser.add_argument("--c", type=count, default=0)
+    results = list(parser.parse_sweep(["--a", "1,2", "--b", "3,4", "--c", "5"]))
+    assert [(r.a, r.b, r.c) for r in results] == [
+        (1, 3, 5),
+        (1, 4, 5),
+        (2, 3, 5),
+        (2, 4, 5),
+    ]
+    # the base command line once, then each swept value once
+    assert sorted(calls) == ["1", "1", "2", "3", "3", "4", "5"]
+
+
+def test_ArgumentParser_parse_sweep_errors():
+    parser = ArgumentParser()
+    parser.add_options(Wide.as_lazy())
+    with pytest.raises(SystemExit):
+        list(parser.parse_sweep(["--a", "1,x"]))
+    with pytest.raises(SystemExit):
+        list(parser.parse_sweep(["--e", "1,2"]))
+    with pytest.raises(SystemExit):
+        parser.parse_sweep(["--a", "3:1"])
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_ArgumentParser_parse_sweep_abbreviated_flag(engine, capsys):
+    parser = ArgumentParser(prog="prog", engine=engine)
+    parser.add_argument("--lr", type=float, default=0.1)
+    parser.add_argument("--layers", type=int, default=1)
+    parser.add_argument("--steps", type=int, default=1)
+    results = list(parser.parse_sweep(["--st", "1,2", "--la", "3"]))
+    assert [(r.lr, r.layers, r.steps) for r in results] == [(0.1, 3, 1), (0.1, 3, 2)]
+
+    with pytest.raises(SystemExit):
+        list(parser.parse_sweep(["--l", "1,2"]))
+    assert "ambiguous option: --l" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_ArgumentParser_reads_tuples_from_files(engine, tmp_path):
+    (tmp_path / "e.json").write_text("[4, 5, 6]")
+    (tmp_path / "f.txt").write_text("0.5\n1.5\n")
+
+    parser = ArgumentParser(engine=engine)
+    parser.add_options(Wide.as_lazy())
+    args = parser.parse_args(
+        ["--e", f"@{tmp_path / 'e.json'}", f"--f=@{tmp_path / 'f.txt'}", "--a", "2"]
+    )
+    assert args == Wide.as_lazy(a=2, e=(4, 5, 6), f=(0.5, 1.5))
+
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--f", f"@{tmp_path / 'e.json'}"])
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--e", f"@{tmp_path / 'missing.json'}"])
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("ext", ["yaml", "json", "pnb"])
+def test_ArgumentParser_config_file(engine, ext, tmp_path):
+    base = Wide.as_lazy(a=5, e=(7,), h=Outer2.as_lazy(c=Inner2.as_lazy(aa="zz")))
+    base.to_file(tmp_path / f"base.{ext}")
+
+    parser = ArgumentParser(engine=engine, config_flag="--config")
+    parser.add_options(Wide.as_lazy())
+    args = parser.parse_args(
+        ["--config", str(tmp_path / f"base.{ext}"), "--b", "2.5", "--h.c.bb", "3"]
+    )
+    assert args == Wide.as_lazy(
+        a=5, b=2.5, e=(7,), h=Outer2.as_lazy(c=Inner2.as_lazy(aa="zz", bb=3))
+    )
+
+    # the command line selects another choice, values of the other one are ignored
+    args = parser.parse_args(
+        [f"--config={tmp_path / f'base.{ext}'}", "--h.c", "I1", "--h.c.a", "y"]
+    )
+    assert args == Wide.as_lazy(a=5, e=(7,), h=Outer2.as_lazy(c=Inner.as_lazy(a="y")))
+
+
+def test_ArgumentParser_config_env_and_argv_layers(tmp_path, monkeypatch):
+    (tmp_path / "base.yaml").write_text("a: 5\nb: 1.5\nh:\n  d: file\n  c.b: 4\n")
+    monkeypatch.setenv("APP_B", "3.5")
+    monkeypatch.setenv("APP_H__D", "env")
+    monkeypatch.setenv("APP_CONFIG", str(tmp_path / "base.yaml"))
+    monkeypatch.setenv("OTHER_A", "9")
+
+    parser = ArgumentParser(config_flag="--config", env_prefix="APP")
+    parser.add_options(Wide.as_lazy())
+    args = parser.parse_args(["--h.d", "argv"])
+    h = Outer2.as_lazy(c=Inner.as_lazy(b=4), d="argv")
+    assert args == Wide.as_lazy(a=5, b=3.5, h=h)
+    args = parser.parse_args([])
+    assert args == Wide.as_lazy(a=5, b=3.5, h=h.copy({"d": "env"}))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_ArgumentParser_config_values_are_converted(engine, tmp_path):
+    # YAML loads 1 as an int, 1e-3 and '3' as strings
+    (tmp_path / "base.yaml").write_text(
+        "a: '3'\nb: 1e-3\nd: 'yes'\ne: ['4', 5]\nf: [1, 2]\n"
+    )
+    (tmp_path / "int.yaml").write_text("b: 1\n")
+
+    parser = ArgumentParser(engine=engine, config_flag="--config")
+    parser.add_options(Wide.as_lazy())
+    args = parser.parse_args(["--config", str(tmp_path / "base.yaml")])
+    assert args == Wide.as_lazy(a=3, b=1e-3, d=True, e=(4, 5), f=(1.0, 2.0))
+    assert type(args.f[0]) is float
+
+    args = parser.parse_args(["--config", str(tmp_path / "int.yaml")])
+    assert args == Wide.as_lazy(b=1.0)
+    assert type(args.b) is float
+
+
+@pytest.mark.parametrize("value", ["x", "1.5", "[1, 2]"])
+def test_ArgumentParser_config_invalid_values(value, tmp_path, capsys):
+    (tmp_path / "base.yaml").write_text(f"a: {value}\n")
+
+    parser = ArgumentParser(prog="prog", config_flag="--config")
+    parser.add_options(Wide.as_lazy())
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--config", str(tmp_path / "base.yaml")])
+    assert "--config: a: invalid int value" in capsys.readouterr().err
+
+
+def test_ArgumentParser_config_errors(tmp_path, capsys):
+    (tmp_path / "bad.yaml").write_text("a: 5\nz: 1\n")
+    (tmp_path / "list.yaml").write_text("- 1\n")
+
+    parser = ArgumentParser(prog="prog", config_flag="--config")
+    parser.add_options(Wide.as_lazy())
+    assert "--config PATH" in parser.format_help()
+
+    for name in ["bad.yaml", "list.yaml", "missing.yaml"]:
+        with pytest.raises(SystemExit):
+            parser.parse_args(["--config", str(tmp_path / name)])
+    assert "unknown options z" in capsys.readouterr().err
+
+
+def test_Parsable_parse_args_config(tmp_path, monkeypatch):
+    base = Wide.as_lazy(a=3, h=Outer2.as_lazy(c=Inner2.as_lazy(aa="q")))
+    base.to_file(tmp_path / "base.yaml")
+    monkeypatch.setattr(
+        "sys.argv", ["prog", "--config", str(tmp_path / "base.yaml"), "--b", "0.1"]
+    )
+    assert Wide.parse_args() == base.copy({"b": 0.1})
+
+
+@register_class("parse_inner3")
+class Inner3(Parsable):
+    def __init__(self, x: int = 1) -> None:
+        pass
+
+
+class AliasedChoice(Choices):
+    I1 = Inner.as_lazy()
+    I3 = Inner3.as_lazy()
+
+
+class Outer6(Parsable):
+    def __init__(self, c: AliasedChoice = AliasedChoice.I1) -> None:
+        pass
+
+
+def test_ArgumentParser_config_file_with_class_alias(tmp_path):
+    Outer6.as_lazy(c=Inner3.as_lazy(x=5)).to_file(tmp_path / "base.yaml")
+    assert "parse_inner3" in (tmp_path / "base.yaml").read_text()
+
+    parser = ArgumentParser(config_flag="--config")
+    parser.add_options(Outer6.as_lazy())
+    args = parser.parse_args(["--config", str(tmp_path / "base.yaml")])
+    assert args == Outer6.as_lazy(c=Inner3.as_lazy(x=5))
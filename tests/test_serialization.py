@@ -1,9 +1,35 @@
+import asyncio
+import gzip
+import importlib
+import json
+import multiprocessing
+import os
+import sys
 import tempfile
 from pathlib import Path
 
 import pytest
 
-from parsonaut.serialization import Serializable
+import parsonaut.lazy
+from parsonaut import Lazy, Parsable, serialization
+from parsonaut.packed import PackedTuple
+from parsonaut.serialization import (
+    CODECS,
+    COMPRESSION_LEVELS,
+    Codec,
+    ConfigStore,
+    Serializable,
+    clear_import_cache,
+    flush_writes,
+    get_codec,
+    maybe_import,
+    register_class,
+    register_codec,
+    save_jsonl,
+    set_transport_params,
+    use_transport_params,
+)
+from parsonaut.typecheck import Missing
 
 
 # Testable subclass
@@ -60,3 +86,350 @@ def test_serializable_invalid_extension():
             obj.to_file(bad_path)
         with pytest.raises(ValueError):
             DummySerializable.from_file(bad_path)
+
+
+@pytest.mark.parametrize(
+    ("fmt", "codec"),
+    [(fmt, name) for fmt, codecs in CODECS.items() for name in codecs],
+)
+def test_codecs_round_trip(tmp_path, fmt, codec):
+    if not CODECS[fmt][codec].available():
+        pytest.skip(f"{codec} is not installed")
+    obj = DummySerializable(
+        {"a": (1, 2), "b": PackedTuple.from_values(range(100), int)}
+    )
+    path = tmp_path / f"object.{fmt}"
+    obj.to_file(path, codec=codec)
+    for other in CODECS[fmt]:
+        if CODECS[fmt][other].available():
+            loaded = DummySerializable.from_file(path, codec=other)
+            assert loaded.value == {"a": [1, 2], "b": list(range(100))}
+
+
+@pytest.mark.parametrize("fmt", list(CODECS))
+def test_codecs_layout(fmt):
+    dct = {
+        "_class": "pkg.module.Class",
+        "a": [1, 2.5, 0.001, -3],
+        "b": {"c": 'é/"x"', "d": None, "e": True, "f": [], "g": {}},
+    }
+    texts, lines = set(), set()
+    for name, codec in CODECS[fmt].items():
+        if codec.available():
+            text = codec.dumps(dct)
+            text = text.decode() if codec.binary else text
+            assert CODECS[fmt][fmt if fmt == "json" else "pyyaml"].loads(text) == dct
+            if name != "orjson":
+                texts.add(text)
+            if codec.dumps_line is not None:
+                line = codec.dumps_line(dct)
+                lines.add(line.decode() if codec.binary else line)
+    assert len(texts) == 1
+    assert len(lines) <= 1
+    if fmt == "json":
+        # the layout of earlier versions
+        assert texts.pop() == json.dumps(dct, indent=4)
+
+
+def test_yaml_codecs_store_missing(tmp_path):
+    obj = DummySerializable(Missing)
+    for codec in ("libyaml", "pyyaml"):
+        if CODECS["yaml"][codec].available():
+            obj.to_file(tmp_path / "object.yaml", codec=codec)
+            assert (
+                DummySerializable.from_file(tmp_path / "object.yaml").value is Missing
+            )
+
+
+def test_get_codec():
+    assert get_codec("json", "json") is CODECS["json"]["json"]
+    with pytest.raises(ValueError):
+        get_codec("json", "simdjson")
+    unavailable = Codec(loads=None, dumps=None, available=lambda: False)
+    register_codec("json", "unavailable", unavailable, default=True)
+    try:
+        assert get_codec("json") is not unavailable
+        with pytest.raises(ValueError):
+            get_codec("json", "unavailable")
+    finally:
+        del CODECS["json"]["unavailable"]
+
+
+class Inner(Parsable):
+    def __init__(self, a: int = 1, b: tuple[float, ...] = (0.5,)) -> None:
+        pass
+
+
+class Outer(Parsable):
+    def __init__(self, inner: Lazy[Inner, ...] = Inner.as_lazy(), name: str = "x"):
+        pass
+
+
+@pytest.mark.parametrize("name", ["configs.jsonl", "configs.jsonl.gz"])
+def test_jsonl_roundtrip(tmp_path, monkeypatch, name):
+    configs = [Outer.as_lazy(inner=Inner.as_lazy(a=i), name=str(i)) for i in range(50)]
+    assert save_jsonl(iter(configs), tmp_path / name) == 50
+    if name.endswith(".gz"):
+        with gzip.open(tmp_path / name) as f:
+            assert len(f.read().splitlines()) == 50
+
+    imports = list()
+    monkeypatch.setattr(
+        parsonaut.serialization,
+        "maybe_import",
+        lambda p: imports.append(p) or maybe_import(p),
+    )
+    loaded = Lazy.from_jsonl(tmp_path / name)
+    assert next(loaded) == configs[0]
+    assert list(loaded) == configs[1:]
+    assert sorted(imports) == ["test_serialization.Inner", "test_serialization.Outer"]
+
+    assert list(Outer.from_jsonl(tmp_path / name)) == configs
+    assert list(Serializable.from_jsonl(tmp_path / name)) == configs
+
+
+def test_jsonl_generic_serializable(tmp_path):
+    save_jsonl([DummySerializable(1), DummySerializable((2, 3))], tmp_path / "x.jsonl")
+    loaded = list(Serializable.from_jsonl(tmp_path / "x.jsonl", codec="json"))
+    assert [obj.value for obj in loaded] == [1, [2, 3]]
+
+
+def test_config_store(tmp_path):
+    reader = ConfigStore(tmp_path / "store")
+    assert len(reader) == 0 and "run0" not in reader
+
+    with ConfigStore(tmp_path / "store") as store:
+        fps = [store.put(f"run{i}", Outer.as_lazy(name=str(i))) for i in range(20)]
+        size = os.path.getsize(tmp_path / "store" / ConfigStore.DATA)
+        # An identical config is stored once.
+        assert store.put("copy", Outer.as_lazy(name="3")) == fps[3]
+        assert os.path.getsize(tmp_path / "store" / ConfigStore.DATA) == size
+        store.put("run5", Outer.as_lazy(name="replaced"))
+
+    # The reader picks up entries appended after it was opened.
+    assert reader.get("run7") == Outer.as_lazy(name="7")
+    assert reader.get("copy") == Outer.as_lazy(name="3")
+    assert reader.get("run5") == Outer.as_lazy(name="replaced")
+    assert reader.get_by_fingerprint(fps[5]) == Outer.as_lazy(name="5")
+    assert reader.fingerprint("copy") == fps[3]
+    assert len(reader) == 21 and list(reader)[:2] == ["run0", "run1"]
+    # Lookups match whole run ids, including the one on the first index line.
+    assert reader.get("run0") == Outer.as_lazy(name="0")
+    assert "un1" not in reader and "run1" in reader
+    with pytest.raises(KeyError):
+        reader.get("run20")
+
+    # An entry left unfinished by a crashed writer is skipped.
+    with open(tmp_path / "store" / ConfigStore.INDEX, "ab") as f:
+        f.write(b"run20\t")
+    assert "run20" not in reader
+    with ConfigStore(tmp_path / "store") as store:
+        store.put("run21", DummySerializable(21))
+    assert reader.get("run21").value == 21
+    reader.close()
+
+
+def _put_many(directory, worker):
+    store = ConfigStore(directory)
+    for i in range(10):
+        store.put(f"{worker}-{i}", Outer.as_lazy(name=f"{worker}-{i}"))
+
+
+def test_config_store_concurrent_writers(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_put_many, args=(tmp_path, w)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    with ConfigStore(tmp_path) as store:
+        assert len(store) == 40
+        for w in range(4):
+            assert store.get(f"{w}-9") == Outer.as_lazy(name=f"{w}-9")
+
+
+@register_class("aliased")
+class Aliased(Parsable):
+    def __init__(self, inner: Lazy[Inner, ...] = Inner.as_lazy(), k: int = 1):
+        pass
+
+
+def test_register_class(tmp_path):
+    lzy = Aliased.as_lazy(k=3)
+    assert lzy.to_dict(with_class_tag_as_str=True)["_class"] == "aliased"
+    assert maybe_import("aliased") is Aliased
+    for ext in ["yaml", "json", "pnb"]:
+        lzy.to_file(tmp_path / f"config.{ext}")
+        assert Lazy.from_file(tmp_path / f"config.{ext}") == lzy
+    # configs stored with the import path still load
+    assert maybe_import("test_serialization.Aliased") is Aliased
+
+    assert register_class("aliased")(Aliased) is Aliased
+    with pytest.raises(ValueError):
+        register_class("aliased")(Outer)
+    with pytest.raises(ValueError):
+        register_class("other")(Aliased)
+    with pytest.raises(ValueError):
+        register_class("a.b")
+    with pytest.raises(ValueError):
+        maybe_import("unregistered")
+
+
+def test_maybe_import_caches_import_paths(monkeypatch):
+    maybe_import("test_serialization.Inner")
+    calls = list()
+    monkeypatch.setattr(importlib, "import_module", calls.append)
+    assert maybe_import("test_serialization.Inner") is Inner
+    assert calls == []
+
+
+def test_clear_import_cache(monkeypatch):
+    class Replaced(Parsable):
+        def __init__(self, a: int = 1):
+            pass
+
+    assert maybe_import("test_serialization.Inner") is Inner
+    monkeypatch.setattr(sys.modules[__name__], "Inner", Replaced)
+    assert maybe_import("test_serialization.Inner") is not Replaced
+    clear_import_cache()
+    assert maybe_import("test_serialization.Inner") is Replaced
+
+    # registering a class invalidates the cache, too
+    monkeypatch.setattr(sys.modules[__name__], "Inner", Outer)
+    monkeypatch.setitem(serialization._REGISTRY, "replaced", Replaced)
+    monkeypatch.setitem(serialization._ALIASES, Replaced, "replaced")
+    register_class("replaced")(Replaced)
+    assert maybe_import("test_serialization.Inner") is Outer
+    monkeypatch.undo()
+    clear_import_cache()
+
+
+def test_open_best_transport_params(tmp_path, monkeypatch):
+    calls = list()
+
+    def fake_open(pth, mode, **kwargs):
+        calls.append(kwargs.get("transport_params"))
+        return open(pth, mode)
+
+    monkeypatch.setattr(serialization, "_smart_open", lambda: fake_open)
+    session = {"client": object()}
+    lzy = Outer.as_lazy(name="s3")
+    lzy.to_file(tmp_path / "config.yaml", transport_params=session)
+    assert Lazy.from_file(tmp_path / "config.yaml", transport_params=session) == lzy
+    assert calls == [session, session]
+
+    set_transport_params({"client": "global"})
+    try:
+        lzy.to_file(tmp_path / "config.yaml")
+        with use_transport_params(session):
+            Lazy.from_file(tmp_path / "config.yaml")
+    finally:
+        set_transport_params(None)
+    Lazy.from_file(tmp_path / "config.yaml")
+    assert calls[2:] == [{"client": "global"}, session, None]
+
+
+def test_to_from_file_on_s3_stand_in():
+    pytest.importorskip("smart_open")
+    boto3 = pytest.importorskip("boto3")
+    server = pytest.importorskip("moto.server").ThreadedMotoServer(port=0)
+    server.start()
+    try:
+        host, port = server.get_host_and_port()
+        client = boto3.client(
+            "s3",
+            endpoint_url=f"http://{host}:{port}",
+            aws_access_key_id="testing",
+            aws_secret_access_key="testing",
+            region_name="us-east-1",
+        )
+        client.create_bucket(Bucket="configs")
+        set_transport_params({"client": client})
+        lzy = Outer.as_lazy(name="s3")
+        for ext in ["yaml", "json", "pnb"]:
+            lzy.to_file(f"s3://configs/run/config.{ext}")
+            assert Lazy.from_file(f"s3://configs/run/config.{ext}") == lzy
+    finally:
+        set_transport_params(None)
+        server.stop()
+
+
+def test_to_file_async_and_from_file_async(tmp_path):
+    obj = DummySerializable([1])
+    futures = [obj.to_file_async(tmp_path / f"{i}.json") for i in range(10)]
+    # the value is taken when the write is submitted
+    obj.value.append(2)
+    flush_writes()
+    assert all(f.done() and f.result() is None for f in futures)
+    assert DummySerializable.from_file(tmp_path / "9.json").value == [1]
+
+    async def write_then_read():
+        Outer.as_lazy(name="async").to_file_async(tmp_path / "config.pnb")
+        return await Lazy.from_file_async(tmp_path / "config.pnb")
+
+    assert asyncio.run(write_then_read()) == Outer.as_lazy(name="async")
+
+
+@pytest.mark.parametrize("name", ["config.json", "config.yaml", "config.pnb"])
+def test_to_file_async_writes_like_to_file(name, tmp_path):
+    obj = DummySerializable([1, 2])
+    obj.to_file(tmp_path / f"sync.{name}")
+    obj.to_file_async(tmp_path / f"async.{name}").result()
+    assert (tmp_path / f"sync.{name}").read_bytes() == (
+        tmp_path / f"async.{name}"
+    ).read_bytes()
+
+
+def test_flush_writes_raises_errors(tmp_path):
+    future = DummySerializable(1).to_file_async(tmp_path / "config.txt")
+    # the error is kept after the write finished, until a flush reports it
+    assert isinstance(future.exception(), ValueError)
+    with pytest.raises(ValueError):
+        flush_writes()
+    flush_writes()
+
+
+@pytest.mark.parametrize("ext", ["json", "yaml", "pnb"])
+@pytest.mark.parametrize(
+    ("suffix", "magic"),
+    [(".gz", b"\x1f\x8b"), (".bz2", b"BZh"), (".xz", b"\xfd7zXZ"), (".zst", None)],
+)
+def test_compressed_files(tmp_path, ext, suffix, magic):
+    if suffix == ".zst":
+        pytest.importorskip("zstandard")
+        magic = b"\x28\xb5\x2f\xfd"
+    lzy = Outer.as_lazy(name="compressed" * 100)
+    path = tmp_path / f"config.{ext}{suffix}"
+    lzy.to_file(path)
+    assert path.read_bytes().startswith(magic)
+    assert path.stat().st_size < 500
+    assert Lazy.from_file(path) == lzy
+    assert Serializable.from_file(path) == lzy
+
+
+def test_compression_levels(tmp_path, monkeypatch):
+    configs = [Outer.as_lazy(name=str(i)) for i in range(1000)]
+    save_jsonl(configs, tmp_path / "default.jsonl.xz")
+    monkeypatch.setitem(COMPRESSION_LEVELS, ".xz", 0)
+    save_jsonl(configs, tmp_path / "level0.jsonl.xz")
+    assert list(Lazy.from_jsonl(tmp_path / "level0.jsonl.xz")) == configs
+    assert (tmp_path / "default.jsonl.xz").stat().st_size < (
+        tmp_path / "level0.jsonl.xz"
+    ).stat().st_size
+
+
+@pytest.mark.parametrize("name", ["config.json.xz", "config.yaml.gz", "config.pnb.gz"])
+def test_to_file_compresslevel(name, tmp_path):
+    lzy = Outer.as_lazy(name="x" * 1000 + "".join(map(str, range(1000))))
+    lzy.to_file(tmp_path / f"low.{name}", compresslevel=1)
+    lzy.to_file_async(tmp_path / f"high.{name}", compresslevel=9).result()
+    sizes = [(tmp_path / f"{level}.{name}").stat().st_size for level in ("low", "high")]
+    assert sizes[0] != sizes[1]
+    assert Lazy.from_file(tmp_path / f"low.{name}") == lzy
+    assert Lazy.from_file(tmp_path / f"high.{name}") == lzy
+
+
+def test_compression_requires_module(tmp_path, monkeypatch):
+    monkeypatch.setattr(serialization, "is_module_available", lambda module: False)
+    with pytest.raises(ImportError, match="requires lzma"):
+        Outer.as_lazy().to_file(tmp_path / "config.pnb.xz")
@@ -3,8 +3,13 @@ from typing import Optional, Union
 
 import pytest
 
+from parsonaut.lazy import Lazy
 from parsonaut.typecheck import (
     BASIC_TYPES,
+    AnnotationInfo,
+    AnnotationKind,
+    compile_validator,
+    get_annotation_info,
     get_flat_tuple_inner_type,
     is_bool_type,
     is_flat_tuple_type,
@@ -150,3 +155,83 @@ def test_is_parsable_type_accepts(typ):
 )
 def test_is_optional_single_type(typ, value, expected):
     assert is_optional_single_type(typ, value) == expected
+
+
+@pytest.mark.parametrize(
+    "typ, value, expected",
+    [
+        (int, 1, True),
+        (int, True, True),
+        (int, 1.0, False),
+        (float, 1, False),
+        (bool, 0, False),
+        (str, "hello", True),
+        (tuple[int], (1,), True),
+        (tuple[int], (1, 1), False),
+        (tuple[int, ...], (1, 1.0), False),
+        (tuple[float, ...], (1.0, 2.0, 3.0), True),
+        (int | None, None, True),
+        (int | None, "hi", False),
+        (Optional[tuple[int, ...]], (1, 2), True),
+        (Optional[tuple[int, ...]], None, True),
+    ],
+)
+def test_compile_validator(typ, value, expected):
+    validate = compile_validator(typ)
+    assert validate is not None
+    assert validate(value) == expected
+    assert is_parsable_type(typ, value) == expected
+
+
+@pytest.mark.parametrize(
+    "typ",
+    [list[int], tuple[int, str], Union[int, str], tuple, dict],
+)
+def test_compile_validator_rejects_non_parsable(typ):
+    assert compile_validator(typ) is None
+    assert not is_parsable_type(typ)
+
+
+def test_compile_validator_is_cached():
+    assert compile_validator(tuple[int, ...]) is compile_validator(tuple[int, ...])
+
+
+@pytest.mark.parametrize(
+    "typ, expected",
+    [
+        (int, AnnotationInfo(AnnotationKind.INT, int)),
+        (bool, AnnotationInfo(AnnotationKind.BOOL, bool)),
+        (Optional[str], AnnotationInfo(AnnotationKind.STR, str, nullable=True)),
+        (
+            tuple[float, ...],
+            AnnotationInfo(AnnotationKind.FLAT_TUPLE, tuple[float, ...], float, -1),
+        ),
+        (
+            tuple[int, int] | None,
+            AnnotationInfo(
+                AnnotationKind.FLAT_TUPLE, tuple[int, int], int, 2, nullable=True
+            ),
+        ),
+        (Lazy, AnnotationInfo(AnnotationKind.LAZY, Lazy)),
+        (Lazy[int, ...], AnnotationInfo(AnnotationKind.LAZY, Lazy[int, ...])),
+        (
+            tuple[int, ..., int],
+            AnnotationInfo(AnnotationKind.OTHER, tuple[int, ..., int]),
+        ),
+        (Union[int, str], AnnotationInfo(AnnotationKind.OTHER, Union[int, str])),
+        (list[int], AnnotationInfo(AnnotationKind.OTHER, list[int])),
+    ],
+)
+def test_get_annotation_info(typ, expected):
+    assert get_annotation_info(typ) == expected
+    assert get_annotation_info(typ) is get_annotation_info(typ)
+
+
+def test_get_annotation_info_unhashable():
+    class Unhashable:
+        __hash__ = None
+
+    typ = Unhashable()
+    assert get_annotation_info(typ).kind is AnnotationKind.OTHER
+    assert compile_validator(typ) is None
+    assert not is_parsable_type(typ)